@@ -0,0 +1,107 @@
+import asyncio
+import datetime
+from collections import deque
+
+import discord
+
+ACTION_RESET_TIME = 300  # 5 minute sliding window
+ACTION_RING_SIZE = 32  # Timestamps kept per action type (above the 20-action threshold cap)
+ANTI_NUKE_TIMEOUT = datetime.timedelta(minutes=10)
+
+class ActionWindow:
+    """Sliding-window action counter for one user, with a ring buffer of timestamps per action type"""
+    __slots__ = ('events', 'last_seen')
+
+    def __init__(self):
+        self.events = {}  # {action_type: deque of timestamps}
+        self.last_seen = 0
+
+    def expire(self, now):
+        cutoff = now - ACTION_RESET_TIME
+        for action_type in list(self.events):
+            ring = self.events[action_type]
+            while ring and ring[0] <= cutoff:
+                ring.popleft()
+            if not ring:
+                del self.events[action_type]
+
+    def record(self, action_type, now):
+        ring = self.events.get(action_type)
+        if ring is None:
+            ring = self.events[action_type] = deque(maxlen=ACTION_RING_SIZE)
+        ring.append(now)
+        self.last_seen = now
+        self.expire(now)
+
+    def count(self, now):
+        self.expire(now)
+        return sum(len(ring) for ring in self.events.values())
+
+    def weighted_count(self, weights, now):
+        self.expire(now)
+        return sum(len(ring) * weights.get(action_type, 1) for action_type, ring in self.events.items())
+
+    def recent(self, limit=5):
+        """Most recent (action_type, timestamp) pairs, oldest first"""
+        actions = [(timestamp, action_type) for action_type, ring in self.events.items() for timestamp in ring]
+        return [(action_type, timestamp) for timestamp, action_type in sorted(actions)[-limit:]]
+
+def trim_backup_checkpoints(checkpoints, max_backups):
+    """Keep the newest max_backups checkpoints, reaching back to the newest full snapshot
+
+    Incremental checkpoints are derived from the full snapshot before them, so
+    that snapshot and every checkpoint after it always survive the trim.
+    """
+    keep_from = max(0, len(checkpoints) - max_backups)
+    for index in range(len(checkpoints) - 1, -1, -1):
+        if checkpoints[index].get('full', True):
+            keep_from = min(keep_from, index)
+            break
+    return checkpoints[keep_from:]
+
+def get_dangerous_roles(member):
+    """Roles that let a member keep damaging the server"""
+    return [
+        role for role in member.roles
+        if (role.permissions.administrator or role.permissions.manage_guild or
+            role.permissions.manage_channels or role.permissions.manage_roles or
+            role.permissions.ban_members or role.permissions.kick_members)
+    ]
+
+async def strip_dangerous_roles(member):
+    """Remove every dangerous role from a member in a single request"""
+    dangerous_roles = get_dangerous_roles(member)
+    if not dangerous_roles:
+        return None
+    await member.remove_roles(*dangerous_roles, reason="🚨 Anti-nuke protection triggered")
+    return f"Removed {len(dangerous_roles)} dangerous roles"
+
+async def timeout_offender(member, strip_task):
+    """Time out a member, retrying once after role stripping if their roles blocked it"""
+    try:
+        await member.timeout(ANTI_NUKE_TIMEOUT, reason="🚨 Anti-nuke protection - suspicious activity")
+    except discord.Forbidden:
+        # Administrators cannot be timed out until their roles are gone
+        try:
+            await strip_task
+        except Exception:
+            return None
+        await member.timeout(ANTI_NUKE_TIMEOUT, reason="🚨 Anti-nuke protection - suspicious activity")
+    return "Applied 10-minute timeout"
+
+async def contain_anti_nuke_threat(guild, user):
+    """Critical path - strip roles and time out the offender concurrently"""
+    member = guild.get_member(user.id)
+    if not member:
+        return []
+    
+    strip_task = asyncio.create_task(strip_dangerous_roles(member))
+    results = await asyncio.gather(strip_task, timeout_offender(member, strip_task), return_exceptions=True)
+    
+    actions_taken = []
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"❌ Anti-nuke containment step failed: {result}")
+        elif result:
+            actions_taken.append(result)
+    return actions_taken
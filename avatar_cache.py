@@ -0,0 +1,141 @@
+import asyncio
+import io
+import os
+from collections import OrderedDict
+
+import aiohttp
+from PIL import Image
+
+AVATAR_SIZE = 128  # Avatars are resized once to this size and cached as PNG
+AVATAR_FETCH_SIZE = 256
+AVATAR_MEMORY_ENTRIES = 512
+AVATAR_DISK_DIR = "avatar_cache"
+AVATAR_DISK_LIMIT = 50 * 1024 * 1024  # Bytes kept on disk before the oldest avatars are pruned
+AVATAR_PRUNE_EVERY = 50  # Disk writes between prune passes
+
+def resize_avatar(data, size):
+    """Decode, resize and re-encode an avatar as a square RGBA PNG"""
+    image = Image.open(io.BytesIO(data)).convert('RGBA')
+    image = image.resize((size, size), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+class AvatarCache:
+    """Resized avatars keyed by avatar hash, kept in a memory LRU backed by an on-disk LRU"""
+
+    def __init__(self, size=AVATAR_SIZE, memory_entries=AVATAR_MEMORY_ENTRIES, disk_dir=AVATAR_DISK_DIR, disk_limit=AVATAR_DISK_LIMIT):
+        self.size = size
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.disk_limit = disk_limit
+        self.memory = OrderedDict()  # {cache_key: png bytes}
+        self.loads = {}  # {cache_key: in-flight load task}
+        self.session = None
+        self.disk_writes = 0
+
+    def cache_key(self, user):
+        # Asset keys change whenever the avatar changes, so stale entries are never served
+        return f"{user.display_avatar.key}_{self.size}"
+
+    def disk_path(self, cache_key):
+        return os.path.join(self.disk_dir, f"{cache_key}.png")
+
+    async def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self.session
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def get(self, user):
+        """Get a user's resized avatar as PNG bytes, or None if it can't be fetched"""
+        cache_key = self.cache_key(user)
+        avatar = self.memory.get(cache_key)
+        if avatar is not None:
+            self.memory.move_to_end(cache_key)
+            return avatar
+
+        # Concurrent requests for the same avatar share one load
+        load = self.loads.get(cache_key)
+        if load is None:
+            load = asyncio.ensure_future(self.load(user, cache_key))
+            self.loads[cache_key] = load
+            load.add_done_callback(lambda _: self.loads.pop(cache_key, None))
+
+        try:
+            avatar = await load
+        except Exception as e:
+            print(f"❌ Failed to load avatar for {user}: {e}")
+            return None
+
+        self.memory[cache_key] = avatar
+        self.memory.move_to_end(cache_key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+        return avatar
+
+    async def load(self, user, cache_key):
+        avatar = await asyncio.to_thread(self.read_disk, cache_key)
+        if avatar is not None:
+            return avatar
+
+        session = await self.get_session()
+        url = user.display_avatar.with_format('png').with_size(AVATAR_FETCH_SIZE).url
+        async with session.get(url) as response:
+            response.raise_for_status()
+            data = await response.read()
+
+        avatar = await asyncio.to_thread(resize_avatar, data, self.size)
+        await asyncio.to_thread(self.write_disk, cache_key, avatar)
+        return avatar
+
+    def read_disk(self, cache_key):
+        path = self.disk_path(cache_key)
+        try:
+            with open(path, 'rb') as f:
+                avatar = f.read()
+            os.utime(path)  # Mark as recently used for pruning
+            return avatar
+        except OSError:
+            return None
+
+    def write_disk(self, cache_key, avatar):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        with open(self.disk_path(cache_key), 'wb') as f:
+            f.write(avatar)
+
+        self.disk_writes += 1
+        if self.disk_writes % AVATAR_PRUNE_EVERY == 0:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Delete least recently used avatars until the cache fits its size limit"""
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        if total_size <= self.disk_limit:
+            return
+
+        entries.sort()
+        for _, file_size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= file_size
+            if total_size <= self.disk_limit * 0.9:
+                break
+
+# Shared by every image-generating command
+avatar_cache = AvatarCache()
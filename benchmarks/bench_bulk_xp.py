@@ -0,0 +1,84 @@
+"""Bulk XP import and multiply throughput.
+
+Imports a CSV and a JSON export into a guild that shares the table with other
+guilds, then multiplies the guild's XP with the keyset-paginated
+scale_guild_xp. The pre-batching path - one connection, upsert and commit per
+member - is timed on a slice of the same export for comparison.
+"""
+import csv
+import io
+import json
+import random
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import scratch_dir
+from cogs import leveling
+from cogs.level_curve import get_level_curve
+from cogs.leveling import LevelingSystem, import_guild_xp, iter_xp_import_rows, scale_guild_xp
+
+MEMBERS = 200_000
+OTHER_GUILDS = 20
+OTHER_GUILD_MEMBERS = 10_000
+BASELINE_SIZE = 2_000
+GUILD_ID = 1
+
+def make_export(rng):
+    rows = [(100_000 + i, int(rng.paretovariate(1.2) * 500), rng.randrange(5000)) for i in range(MEMBERS)]
+    csv_data = io.StringIO()
+    writer = csv.writer(csv_data)
+    writer.writerow(('user_id', 'xp', 'messages'))
+    writer.writerows(rows)
+    json_data = json.dumps({'players': [{'id': str(user_id), 'xp': xp, 'message_count': messages} for user_id, xp, messages in rows]})
+    return rows, csv_data.getvalue().encode(), json_data.encode()
+
+def fill_other_guilds(rng):
+    conn = sqlite3.connect(leveling.DATABASE_FILE)
+    with conn:
+        conn.executemany(
+            'INSERT INTO user_levels (user_id, guild_id, total_xp) VALUES (?, ?, ?)',
+            ((user_id, guild_id, rng.randrange(50_000)) for guild_id in range(2, 2 + OTHER_GUILDS) for user_id in range(OTHER_GUILD_MEMBERS))
+        )
+    conn.close()
+
+def upsert_one_by_one(guild_id, rows, curve):
+    """The old path - a connection, upsert and commit per member"""
+    for user_id, total_xp, message_count in rows:
+        level, xp = curve.progress(total_xp)[:2]
+        conn = sqlite3.connect(leveling.DATABASE_FILE)
+        conn.execute('''
+            INSERT OR REPLACE INTO user_levels (user_id, guild_id, xp, level, total_xp, message_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, guild_id, xp, level, total_xp, message_count))
+        conn.commit()
+        conn.close()
+
+def timed(label, job, *args):
+    progress = {'done': 0, 'total': None}
+    started = time.perf_counter()
+    done = job(*args, progress, get_level_curve())
+    elapsed = time.perf_counter() - started
+    print(f"{label:<26}{elapsed:6.2f}s  {done / elapsed:>10,.0f} members/s")
+
+def run():
+    LevelingSystem(SimpleNamespace())  # Creates the tables and indexes
+    rng = random.Random(7)
+    rows, csv_data, json_data = make_export(rng)
+    fill_other_guilds(rng)
+    print(f"{MEMBERS:,} members, csv {len(csv_data) / 2 ** 20:.1f} MiB, json {len(json_data) / 2 ** 20:.1f} MiB, "
+          f"{OTHER_GUILDS * OTHER_GUILD_MEMBERS:,} rows in other guilds")
+
+    timed("import csv", lambda progress, curve: import_guild_xp(GUILD_ID, iter_xp_import_rows(csv_data, 'export.csv'), progress, curve))
+    timed("import json", lambda progress, curve: import_guild_xp(GUILD_ID + 100, iter_xp_import_rows(json_data, 'export.json'), progress, curve))
+    timed("multiply x1.5", scale_guild_xp, GUILD_ID, 1.5)
+    timed("decay 10%", scale_guild_xp, GUILD_ID, 0.9)
+
+    started = time.perf_counter()
+    upsert_one_by_one(GUILD_ID + 200, rows[:BASELINE_SIZE], get_level_curve())
+    elapsed = time.perf_counter() - started
+    print(f"{'per-member commit':<26}{elapsed:6.2f}s  {BASELINE_SIZE / elapsed:>10,.0f} members/s ({BASELINE_SIZE:,} members)")
+
+if __name__ == "__main__":
+    with scratch_dir():
+        run()
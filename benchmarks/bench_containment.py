@@ -0,0 +1,72 @@
+"""Time-to-containment for the anti-nuke critical path with simulated API latency.
+
+Compares contain_anti_nuke_threat (role strip and timeout concurrently) against
+running the same two requests one after another, for a moderator (timeout works
+straight away) and an administrator (timeout is refused until roles are gone).
+"""
+import asyncio
+import random
+import time
+
+import discord
+
+from benchmarks.harness import report
+from cogs.anti_nuke import contain_anti_nuke_threat, strip_dangerous_roles
+
+TRIALS = 200
+LATENCY_RANGE = (0.04, 0.12)  # Seconds per API request
+
+class FakeResponse:
+    status = 403
+    reason = "Forbidden"
+
+class FakeRole:
+    def __init__(self, permissions):
+        self.permissions = discord.Permissions(**permissions)
+
+class FakeMember:
+    def __init__(self, rng, administrator):
+        self.id = rng.getrandbits(40)
+        self.rng = rng
+        self.roles = [FakeRole({'administrator': administrator}), FakeRole({'ban_members': True}), FakeRole({'send_messages': True})]
+
+    async def request(self):
+        await asyncio.sleep(self.rng.uniform(*LATENCY_RANGE))
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.request()
+        self.roles = [role for role in self.roles if role not in roles]
+
+    async def timeout(self, duration, reason=None):
+        await self.request()
+        if any(role.permissions.administrator for role in self.roles):
+            raise discord.Forbidden(FakeResponse(), "Missing Permissions")
+
+class FakeGuild:
+    def __init__(self, member):
+        self.member = member
+
+    def get_member(self, user_id):
+        return self.member
+
+async def contain_sequentially(guild, user):
+    """The pre-split behaviour - strip roles, then time out"""
+    member = guild.get_member(user.id)
+    await strip_dangerous_roles(member)
+    await member.timeout(None)
+
+async def trial(contain, administrator, seed):
+    member = FakeMember(random.Random(seed), administrator)
+    started = time.perf_counter()
+    await contain(FakeGuild(member), member)
+    return time.perf_counter() - started
+
+async def run():
+    for administrator in (False, True):
+        who = "administrator" if administrator else "moderator"
+        for name, contain in (("sequential", contain_sequentially), ("concurrent", contain_anti_nuke_threat)):
+            samples = await asyncio.gather(*(trial(contain, administrator, seed) for seed in range(TRIALS)))
+            report(f"{who} / {name}", samples)
+
+if __name__ == "__main__":
+    asyncio.run(run())
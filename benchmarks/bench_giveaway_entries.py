@@ -0,0 +1,89 @@
+"""50k-reaction burst into one giveaway.
+
+Feeds raw reaction events (a fifth of them repeats) through the giveaway cog's
+entry path with the batched flusher running, then draws winners with the
+streamed reservoir sampler. The pre-batching path - one INSERT and commit per
+reaction - is timed on a slice of the same burst for comparison.
+"""
+import asyncio
+import random
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import scratch_dir
+from cogs import giveaways
+from cogs.giveaways import GiveawaySystem, sample_giveaway_entries
+
+BURST_SIZE = 50_000
+DUPLICATE_FRACTION = 0.2
+BASELINE_SIZE = 2_000
+WINNERS = 10
+GIVEAWAY_ID = 1
+MESSAGE_ID = 555
+
+def make_payloads(rng):
+    unique = int(BURST_SIZE * (1 - DUPLICATE_FRACTION))
+    user_ids = [10_000 + i for i in range(unique)]
+    user_ids += rng.choices(user_ids, k=BURST_SIZE - unique)
+    rng.shuffle(user_ids)
+    return [
+        SimpleNamespace(
+            emoji="🎉",
+            message_id=MESSAGE_ID,
+            channel_id=2,
+            guild_id=3,
+            user_id=user_id,
+            member=SimpleNamespace(id=user_id, bot=False, premium_since=None)
+        )
+        for user_id in user_ids
+    ]
+
+def insert_one_by_one(user_ids):
+    """The old path - a connection, insert and commit per reaction"""
+    for user_id in user_ids:
+        conn = sqlite3.connect(giveaways.DATABASE_FILE)
+        conn.execute('INSERT OR IGNORE INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)', (GIVEAWAY_ID + 1, user_id))
+        conn.commit()
+        conn.close()
+
+async def run():
+    system = GiveawaySystem(SimpleNamespace(shard_count=1, shard_id=None))
+    system.register_giveaway(GIVEAWAY_ID, 3, 2, MESSAGE_ID, WINNERS, None)
+    payloads = make_payloads(random.Random(7))
+
+    system.entry_flusher.start()
+    started = time.perf_counter()
+    for index, payload in enumerate(payloads):
+        await system.on_raw_reaction_add(payload)
+        if index % 500 == 0:
+            await asyncio.sleep(0)  # Let the flusher run like it would between gateway events
+    ingest_time = time.perf_counter() - started
+    system.entry_flusher.cancel()
+
+    started = time.perf_counter()
+    await system.flush_entries()
+    final_flush_time = time.perf_counter() - started
+
+    conn = sqlite3.connect(giveaways.DATABASE_FILE)
+    stored = conn.execute('SELECT COUNT(*) FROM giveaway_entries WHERE giveaway_id = ?', (GIVEAWAY_ID,)).fetchone()[0]
+    conn.close()
+
+    started = time.perf_counter()
+    winners = sample_giveaway_entries(GIVEAWAY_ID, WINNERS, set())
+    draw_time = time.perf_counter() - started
+
+    baseline_ids = [payload.user_id for payload in payloads[:BASELINE_SIZE]]
+    started = time.perf_counter()
+    insert_one_by_one(baseline_ids)
+    baseline_time = time.perf_counter() - started
+
+    print(f"reactions                 {BURST_SIZE:,} ({system.get_entry_count(GIVEAWAY_ID):,} unique, {stored:,} stored)")
+    print(f"batched ingest            {ingest_time:.2f}s ({BURST_SIZE / ingest_time:,.0f} reactions/s)")
+    print(f"final flush               {final_flush_time * 1000:.1f}ms")
+    print(f"reservoir draw            {draw_time * 1000:.1f}ms for {len(winners)} winners over {stored:,} entries")
+    print(f"per-reaction commit       {baseline_time:.2f}s for {BASELINE_SIZE:,} ({BASELINE_SIZE / baseline_time:,.0f} reactions/s)")
+
+if __name__ == "__main__":
+    with scratch_dir():
+        asyncio.run(run())
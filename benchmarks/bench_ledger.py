@@ -0,0 +1,95 @@
+"""BalanceLedger under concurrent load, and flush cost by batch size.
+
+Runs concurrent credits, debits and transfers over a pool of users through the
+ledger, checks that every coin is accounted for, then times flushes of
+increasingly large dirty sets. The pre-ledger path - a connection,
+read-modify-write and commit per operation - is timed for comparison.
+"""
+import asyncio
+import random
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import scratch_dir
+from cogs import economy
+from cogs.economy import BalanceLedger, EconomySystem
+
+USERS = 2_000
+WORKERS = 200
+OPERATIONS_PER_WORKER = 250
+STARTING_WALLET = 1_000
+FLUSH_BATCHES = (100, 1_000, 10_000, 50_000)
+BASELINE_SIZE = 1_000
+GUILD_ID = 1
+
+async def worker(ledger, rng):
+    for _ in range(OPERATIONS_PER_WORKER):
+        user_id = rng.randrange(USERS)
+        roll = rng.random()
+        if roll < 0.4:
+            await ledger.credit(GUILD_ID, user_id, rng.randint(1, 100), 'work')
+        elif roll < 0.7:
+            await ledger.debit(GUILD_ID, user_id, rng.randint(1, 100), 'gamble')
+        else:
+            await ledger.transfer(GUILD_ID, user_id, rng.randrange(USERS), rng.randint(1, 100))
+
+def ledger_total(guild_id):
+    conn = sqlite3.connect(economy.DATABASE_FILE)
+    try:
+        wealth = conn.execute('SELECT COALESCE(SUM(wallet + bank), 0) FROM user_economy WHERE guild_id = ?', (guild_id,)).fetchone()[0]
+        recorded = conn.execute('SELECT COALESCE(SUM(amount), 0) FROM economy_transactions WHERE guild_id = ?', (guild_id,)).fetchone()[0]
+        return wealth, recorded
+    finally:
+        conn.close()
+
+def credit_one_by_one(guild_id, user_ids):
+    """The old path - a connection, read-modify-write and commit per operation"""
+    for user_id in user_ids:
+        conn = sqlite3.connect(economy.DATABASE_FILE)
+        row = conn.execute('SELECT wallet FROM user_economy WHERE user_id = ? AND guild_id = ?', (user_id, guild_id)).fetchone()
+        conn.execute('INSERT OR REPLACE INTO user_economy (user_id, guild_id, wallet) VALUES (?, ?, ?)', (user_id, guild_id, (row[0] if row else 0) + 10))
+        conn.execute('INSERT INTO economy_transactions (guild_id, user_id, kind, amount, created_at) VALUES (?, ?, ?, ?, ?)', (guild_id, user_id, 'work', 10, time.time()))
+        conn.commit()
+        conn.close()
+
+async def run():
+    EconomySystem(SimpleNamespace())  # Creates the tables and indexes
+    ledger = BalanceLedger()
+    for user_id in range(USERS):
+        await ledger.credit(GUILD_ID, user_id, STARTING_WALLET, 'opening')
+    await ledger.flush()
+
+    operations = WORKERS * OPERATIONS_PER_WORKER
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(ledger, random.Random(seed)) for seed in range(WORKERS)))
+    elapsed = time.perf_counter() - started
+    flush_started = time.perf_counter()
+    await ledger.flush()
+    flush_time = time.perf_counter() - flush_started
+
+    wealth, recorded = ledger_total(GUILD_ID)
+    assert wealth == recorded, (wealth, recorded)
+    assert all(balance['wallet'] >= 0 for balance in ledger.balances.values())
+    print(f"{operations:,} ops from {WORKERS} tasks over {USERS:,} users: {elapsed:.2f}s ({operations / elapsed:,.0f} ops/s), "
+          f"flush {flush_time * 1000:.1f}ms, books balance at {wealth:,} coins")
+
+    for offset, batch in enumerate(FLUSH_BATCHES, start=1):
+        guild_id = GUILD_ID + offset
+        for user_id in range(batch):
+            ledger.balances[(guild_id, user_id)] = {'wallet': STARTING_WALLET, 'bank': 0, 'daily_streak': 0, 'total_earned': STARTING_WALLET, 'total_spent': 0}
+            ledger.changed((guild_id, user_id))
+            ledger.record(guild_id, user_id, 'opening', STARTING_WALLET)
+        started = time.perf_counter()
+        await ledger.flush()
+        elapsed = time.perf_counter() - started
+        print(f"flush {batch:>7,} balances    {elapsed * 1000:8.1f}ms  ({elapsed / batch * 1e6:.1f}us per balance)")
+
+    started = time.perf_counter()
+    credit_one_by_one(GUILD_ID + 100, range(BASELINE_SIZE))
+    elapsed = time.perf_counter() - started
+    print(f"per-operation commit      {BASELINE_SIZE / elapsed:,.0f} ops/s ({BASELINE_SIZE:,} credits)")
+
+if __name__ == "__main__":
+    with scratch_dir():
+        asyncio.run(run())
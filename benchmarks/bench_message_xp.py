@@ -0,0 +1,53 @@
+"""Message XP burst - buffered awards against a transaction per message.
+
+Sends a burst of messages from distinct members through add_xp, which only
+buffers the award, then times the flush that writes them with one
+write_xp_awards transaction for the guild. The previous path - a
+write_xp_awards transaction per message - is timed on a slice of the burst.
+"""
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import scratch_dir
+from cogs import leveling
+from cogs.leveling import LevelingSystem
+
+MESSAGES = 10_000
+BASELINE_SIZE = 1_000
+GUILD_ID = 1
+
+async def run():
+    cog = LevelingSystem(SimpleNamespace())
+    config = await cog.get_leveling_config(GUILD_ID)
+
+    started = time.perf_counter()
+    for user_id in range(MESSAGES):
+        await cog.add_xp(100_000 + user_id, GUILD_ID)
+    enqueue_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await cog.flush_xp_awards()
+    flush_time = time.perf_counter() - started
+
+    conn = sqlite3.connect(leveling.DATABASE_FILE)
+    stored, messages = conn.execute('SELECT COUNT(*), SUM(message_count) FROM user_levels WHERE guild_id = ?', (GUILD_ID,)).fetchone()
+    conn.close()
+    assert stored == messages == MESSAGES
+
+    started = time.perf_counter()
+    for user_id in range(BASELINE_SIZE):
+        await cog.apply_xp_awards(GUILD_ID + 1, {user_id: 20}, config, messages=1)
+    baseline_time = time.perf_counter() - started
+    for worker in cog.level_up_workers.values():
+        worker.cancel()
+
+    print(f"{MESSAGES:,} messages from {MESSAGES:,} members")
+    print(f"add_xp (buffer only)      {enqueue_time * 1000:.0f}ms ({enqueue_time / MESSAGES * 1e6:.0f}us per message, mostly the premium lookup)")
+    print(f"batched flush             {flush_time * 1000:.0f}ms ({MESSAGES / flush_time:,.0f} awards/s)")
+    print(f"transaction per message   {baseline_time * 1000:.0f}ms for {BASELINE_SIZE:,} ({BASELINE_SIZE / baseline_time:,.0f} awards/s)")
+
+if __name__ == "__main__":
+    with scratch_dir():
+        asyncio.run(run())
@@ -0,0 +1,74 @@
+"""Rank card renders under a /rank burst - worker threads against the cog's process pool.
+
+Throughput alone barely moves on a small host - both paths are bound by the
+same PIL drawing and PNG encoding. What the pool buys is event-loop
+responsiveness: render_rank_card holds the GIL for most of its runtime, so
+rendering in threads stalls every other coroutine, while the pool keeps the
+loop free. A probe coroutine measures how late the loop wakes it during the
+burst, which is the delay every other command and gateway event sees.
+"""
+import asyncio
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from benchmarks.harness import percentile
+from cogs.avatar_cache import AVATAR_SIZE, resize_avatar
+from cogs.leveling import RANK_CARD_WORKERS, init_rank_card_worker, rank_card_mp_context, render_rank_card
+
+CARDS = 200
+CONCURRENT_REQUESTS = 8
+PROBE_INTERVAL = 0.001
+
+def make_avatar():
+    image = Image.effect_noise((256, 256), 64).convert('RGBA')
+    data = io.BytesIO()
+    image.save(data, format='PNG')
+    return resize_avatar(data.getvalue(), AVATAR_SIZE)
+
+def card_args(index, avatar):
+    return (f"User {index}", index + 1, index % 80, index * 137, index * 9, index % 500, 1000, avatar)
+
+async def probe_loop_lag(stop, lags):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+async def burst(label, render, avatar):
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    semaphore = asyncio.Semaphore(CONCURRENT_REQUESTS)
+
+    async def request(index):
+        async with semaphore:
+            return await render(*card_args(index, avatar))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(index) for index in range(CARDS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    print(f"{label:<24}{CARDS / elapsed:6.0f} cards/s   loop lag p50 {percentile(lags, 0.5) * 1000:6.2f}ms  "
+          f"p99 {percentile(lags, 0.99) * 1000:6.2f}ms  max {max(lags) * 1000:6.2f}ms")
+
+async def run():
+    avatar = make_avatar()
+    loop = asyncio.get_running_loop()
+    init_rank_card_worker()
+
+    await burst("asyncio.to_thread", lambda *args: asyncio.to_thread(render_rank_card, *args), avatar)
+
+    pool = ProcessPoolExecutor(max_workers=RANK_CARD_WORKERS, mp_context=rank_card_mp_context(), initializer=init_rank_card_worker)
+    try:
+        await asyncio.gather(*(loop.run_in_executor(pool, init_rank_card_worker) for _ in range(RANK_CARD_WORKERS)))  # Warm the workers
+        await burst(f"{RANK_CARD_WORKERS}-worker process pool", lambda *args: loop.run_in_executor(pool, render_rank_card, *args), avatar)
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(run())
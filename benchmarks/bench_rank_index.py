@@ -0,0 +1,112 @@
+"""RankIndex against the COUNT(*) rank query it replaced.
+
+Fills guilds of 10k, 100k and 1M users on a skewed XP spread, then times the
+cold index build, random rank lookups through the index and through
+`SELECT COUNT(*) ... WHERE total_xp > ?` on the (guild_id, total_xp) index, and
+single-user score updates. A final case packs 100k distinct scores into the
+single widest bucket to time lookups inside a crowded bucket.
+
+Pass --quick to skip the 1M-user guild.
+"""
+import random
+import sqlite3
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import report, scratch_dir
+from cogs import leveling
+from cogs.leveling import LevelingSystem, load_rank_index
+from cogs.rank_index import RankIndex, score_bucket
+
+GUILD_SIZES = (10_000, 100_000, 1_000_000)
+QUICK_GUILD_SIZES = (10_000, 100_000)
+LOOKUPS = 2_000
+QUERY_LOOKUPS = 200  # COUNT(*) is slow enough at 1M rows that fewer samples do
+UPDATES = 20_000
+DENSE_USERS = 1_000_000
+DENSE_BUCKET_USERS = 100_000
+DENSE_BASE = 2 ** 40  # Buckets here are 2^31 wide, so the crowded scores all share one
+GUILD_ID = 1
+
+def fill_guild(guild_id, size, rng):
+    conn = sqlite3.connect(leveling.DATABASE_FILE)
+    conn.executemany(
+        'INSERT INTO user_levels (user_id, guild_id, total_xp) VALUES (?, ?, ?)',
+        ((user_id, guild_id, int(rng.paretovariate(1.2) * 100)) for user_id in range(size))
+    )
+    conn.commit()
+    conn.close()
+
+def count_rank(conn, guild_id, total_xp):
+    above = conn.execute('SELECT COUNT(*) FROM user_levels WHERE guild_id = ? AND total_xp > ?', (guild_id, total_xp)).fetchone()[0]
+    return above + 1
+
+def time_calls(call, args):
+    samples = []
+    for arg in args:
+        started = time.perf_counter()
+        call(arg)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def time_updates(index, rng, user_ids, spread):
+    started = time.perf_counter()
+    for _ in range(UPDATES):
+        user_id = rng.choice(user_ids)
+        index.update(user_id, index.scores[user_id] + rng.randint(-spread, spread))
+    return time.perf_counter() - started
+
+def bench_guild(guild_id, size, rng):
+    fill_guild(guild_id, size, rng)
+
+    started = time.perf_counter()
+    index = load_rank_index(guild_id)
+    build_time = time.perf_counter() - started
+
+    scores = rng.choices(list(index.scores.values()), k=LOOKUPS)
+    index_samples = time_calls(index.rank, scores)
+
+    conn = sqlite3.connect(leveling.DATABASE_FILE)
+    query_samples = []
+    for score in scores[:QUERY_LOOKUPS]:
+        started = time.perf_counter()
+        query_rank = count_rank(conn, guild_id, score)
+        query_samples.append(time.perf_counter() - started)
+        assert index.rank(score) == query_rank
+    conn.close()
+
+    update_time = time_updates(index, rng, range(size), 25)
+    print(f"{size:,} users - index build {build_time * 1000:.0f}ms, {index.size:,} buckets, "
+          f"{UPDATES:,} updates {update_time * 1000:.0f}ms ({update_time / UPDATES * 1e6:.2f}us each)")
+    report("  RankIndex.rank", index_samples, unit='us', scale=1e6)
+    report("  COUNT(*) rank query", query_samples, unit='us', scale=1e6)
+
+def bench_dense_bucket(rng):
+    """Many distinct scores in one wide bucket - the case a per-bucket scan would make linear"""
+    rows = [(user_id, int(rng.paretovariate(1.2) * 100)) for user_id in range(DENSE_USERS - DENSE_BUCKET_USERS)]
+    crowded = list(range(DENSE_USERS - DENSE_BUCKET_USERS, DENSE_USERS))
+    rows += [(user_id, DENSE_BASE + rng.randrange(2 ** 30)) for user_id in crowded]
+    index = RankIndex.from_rows(rows)
+    top_bucket = index.buckets[score_bucket(DENSE_BASE)]
+    assert len(top_bucket) == DENSE_BUCKET_USERS
+
+    scores = [index.scores[user_id] for user_id in rng.choices(crowded, k=LOOKUPS)]
+    positions = [rng.randint(1, DENSE_BUCKET_USERS) for _ in range(LOOKUPS)]
+    update_time = time_updates(index, rng, crowded, 2 ** 20)
+
+    print(f"{DENSE_USERS:,} users, {DENSE_BUCKET_USERS:,} distinct scores in one bucket - "
+          f"{UPDATES:,} updates inside it {update_time * 1000:.0f}ms ({update_time / UPDATES * 1e6:.2f}us each)")
+    report("  RankIndex.rank (crowded bucket)", time_calls(index.rank, scores), unit='us', scale=1e6)
+    report("  RankIndex.score_at (crowded bucket)", time_calls(index.score_at, positions), unit='us', scale=1e6)
+
+def run(guild_sizes):
+    LevelingSystem(SimpleNamespace())  # Creates the tables and indexes
+    rng = random.Random(7)
+    for offset, size in enumerate(guild_sizes):
+        bench_guild(GUILD_ID + offset, size, rng)
+    bench_dense_bucket(rng)
+
+if __name__ == "__main__":
+    with scratch_dir():
+        run(QUICK_GUILD_SIZES if '--quick' in sys.argv[1:] else GUILD_SIZES)
@@ -0,0 +1,86 @@
+"""Voice XP tick with 10k members in voice.
+
+Runs the cog's voice_xp_tick against a guild of 10k voice members spread over
+channels of 20, so every tick is one batched write_xp_awards transaction. The
+first tick inserts every member; later ticks update them. The pre-batching
+path - one connection, read and commit per member - is timed on a slice of the
+same members for comparison.
+"""
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import report, scratch_dir
+from cogs import leveling
+from cogs.leveling import VOICE_XP_PER_TICK, LevelingSystem
+
+VOICE_MEMBERS = 10_000
+CHANNEL_SIZE = 20
+TICKS = 10
+BASELINE_SIZE = 1_000
+GUILD_ID = 1
+
+def make_guild():
+    members = {}
+    for channel_index in range(VOICE_MEMBERS // CHANNEL_SIZE):
+        channel = SimpleNamespace(id=10_000 + channel_index, category_id=None, members=[])
+        for offset in range(CHANNEL_SIZE):
+            user_id = 100_000 + channel_index * CHANNEL_SIZE + offset
+            member = SimpleNamespace(
+                id=user_id, bot=False, roles=[],
+                voice=SimpleNamespace(channel=channel, self_mute=False, self_deaf=False, mute=False, deaf=False)
+            )
+            channel.members.append(member)
+            members[user_id] = member
+    return SimpleNamespace(id=GUILD_ID, afk_channel=None, get_member=members.get), members
+
+def award_one_by_one(user_ids, curve):
+    """The old path - a connection, read and commit per member"""
+    for user_id in user_ids:
+        conn = sqlite3.connect(leveling.DATABASE_FILE)
+        row = conn.execute('SELECT total_xp FROM user_levels WHERE user_id = ? AND guild_id = ?', (user_id, GUILD_ID)).fetchone()
+        total_xp = (row[0] if row else 0) + VOICE_XP_PER_TICK
+        level, xp = curve.progress(total_xp)[:2]
+        conn.execute('''
+            UPDATE user_levels SET xp = ?, level = ?, total_xp = ?
+            WHERE user_id = ? AND guild_id = ?
+        ''', (xp, level, total_xp, user_id, GUILD_ID))
+        conn.commit()
+        conn.close()
+
+async def run():
+    guild, members = make_guild()
+    cog = LevelingSystem(SimpleNamespace(get_guild=lambda guild_id: guild if guild_id == GUILD_ID else None))
+    cog.voice_sessions[GUILD_ID] = {user_id: member.voice.channel.id for user_id, member in members.items()}
+    config = await cog.get_leveling_config(GUILD_ID)
+
+    samples = []
+    for _ in range(TICKS):
+        started = time.perf_counter()
+        await cog.voice_xp_tick()
+        samples.append(time.perf_counter() - started)
+        # Level-up announcements would go to Discord - drop them between ticks
+        for worker in cog.level_up_workers.values():
+            worker.cancel()
+        cog.level_up_pending.clear()
+        cog.level_up_workers.clear()
+
+    conn = sqlite3.connect(leveling.DATABASE_FILE)
+    stored, total_xp = conn.execute('SELECT COUNT(*), SUM(total_xp) FROM user_levels WHERE guild_id = ?', (GUILD_ID,)).fetchone()
+    conn.close()
+    assert total_xp == VOICE_MEMBERS * VOICE_XP_PER_TICK * TICKS
+
+    print(f"{VOICE_MEMBERS:,} members in {VOICE_MEMBERS // CHANNEL_SIZE} channels, {stored:,} rows after {TICKS} ticks")
+    print(f"first tick (inserts)      {samples[0] * 1000:.1f}ms")
+    report("voice_xp_tick (updates)", samples[1:])
+
+    started = time.perf_counter()
+    award_one_by_one(list(members)[:BASELINE_SIZE], config.curve)
+    elapsed = time.perf_counter() - started
+    print(f"per-member commit         {elapsed * 1000:.1f}ms for {BASELINE_SIZE:,} members "
+          f"(~{elapsed * VOICE_MEMBERS / BASELINE_SIZE:.1f}s per tick at {VOICE_MEMBERS:,})")
+
+if __name__ == "__main__":
+    with scratch_dir():
+        asyncio.run(run())
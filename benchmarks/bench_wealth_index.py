@@ -0,0 +1,77 @@
+"""Wealth index over 500k balances with a heavy tail.
+
+Fills a guild with Pareto-distributed balances plus a handful of near-maximum
+ones, then times the index build, rank lookups against the COUNT(*) query on
+idx_user_economy_wealth, score_at page jumps and balance updates. Also reports
+the Fenwick tree size next to what 1024-coin fixed-width buckets would need.
+"""
+import random
+import sqlite3
+import time
+from types import SimpleNamespace
+
+from benchmarks.harness import report, scratch_dir
+from cogs import economy
+from cogs.economy import MAX_WEALTH, EconomySystem, load_wealth_index
+
+USERS = 500_000
+WHALES = 5
+LOOKUPS = 500
+UPDATES = 50_000
+GUILD_ID = 1
+
+def fill_guild(rng):
+    balances = [int(rng.paretovariate(1.1) * 200) for _ in range(USERS - WHALES)]
+    balances += [MAX_WEALTH // (2 ** i) for i in range(WHALES)]
+    conn = sqlite3.connect(economy.DATABASE_FILE)
+    with conn:
+        conn.executemany(
+            'INSERT INTO user_economy (user_id, guild_id, wallet, bank) VALUES (?, ?, ?, 0)',
+            ((user_id, GUILD_ID, wealth) for user_id, wealth in enumerate(balances))
+        )
+    conn.close()
+
+def run():
+    EconomySystem(SimpleNamespace())  # Creates the tables and indexes
+    rng = random.Random(11)
+    fill_guild(rng)
+
+    started = time.perf_counter()
+    index = load_wealth_index(GUILD_ID)
+    build_time = time.perf_counter() - started
+    print(f"{USERS:,} balances up to {max(index.scores.values()):,} - build {build_time * 1000:.0f}ms, "
+          f"{index.size:,} tree buckets (fixed 1024-coin buckets: {MAX_WEALTH // 1024:,})")
+
+    conn = sqlite3.connect(economy.DATABASE_FILE)
+    index_samples, query_samples = [], []
+    for wealth in rng.choices(list(index.scores.values()), k=LOOKUPS):
+        started = time.perf_counter()
+        index_rank = index.rank(wealth)
+        index_samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        above = conn.execute('SELECT COUNT(*) FROM user_economy WHERE guild_id = ? AND wallet + bank > ?', (GUILD_ID, wealth)).fetchone()[0]
+        query_samples.append(time.perf_counter() - started)
+        assert index_rank == above + 1
+    conn.close()
+    report("RankIndex.rank", index_samples, unit='us', scale=1e6)
+    report("COUNT(*) rank query", query_samples, unit='us', scale=1e6)
+
+    samples = []
+    for _ in range(LOOKUPS):
+        position = rng.randrange(1, USERS + 1)
+        started = time.perf_counter()
+        index.score_at(position)
+        samples.append(time.perf_counter() - started)
+    report("RankIndex.score_at (page jump)", samples, unit='us', scale=1e6)
+
+    started = time.perf_counter()
+    for _ in range(UPDATES):
+        user_id = rng.randrange(USERS)
+        index.update(user_id, max(0, index.scores[user_id] + rng.randint(-500, 500)))
+    elapsed = time.perf_counter() - started
+    print(f"{UPDATES:,} updates {elapsed * 1000:.0f}ms ({elapsed / UPDATES * 1e6:.2f}us each)")
+
+if __name__ == "__main__":
+    with scratch_dir():
+        run()
@@ -0,0 +1,37 @@
+"""Shared setup for the benchmark scripts - run them from the repo root with `python -m benchmarks.<name>`"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The bot imports these modules as the `cogs` package - mirror that layout with a `cogs` symlink on sys.path.
+# Worker processes started with spawn or forkserver re-import the benchmark, and reuse the parent's symlink
+if 'cogs' not in sys.modules:
+    if 'BENCHMARK_PACKAGE_ROOT' not in os.environ:
+        os.environ['BENCHMARK_PACKAGE_ROOT'] = tempfile.mkdtemp(prefix='bench_cogs_')
+        atexit.register(shutil.rmtree, os.environ['BENCHMARK_PACKAGE_ROOT'], True)
+        os.symlink(REPO_ROOT, os.path.join(os.environ['BENCHMARK_PACKAGE_ROOT'], 'cogs'))
+    sys.path.insert(0, os.environ['BENCHMARK_PACKAGE_ROOT'])
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def report(label, samples, unit='ms', scale=1000):
+    """Print p50/p95/max for a list of durations in seconds"""
+    print(f"{label:<40} p50 {percentile(samples, 0.5) * scale:8.2f}{unit}  p95 {percentile(samples, 0.95) * scale:8.2f}{unit}  max {max(samples) * scale:8.2f}{unit}")
+
+@contextmanager
+def scratch_dir():
+    """Run inside a temporary directory so the cogs' SQLite files don't touch the working tree"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
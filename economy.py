@@ -1,10 +1,13 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import sqlite3
 import random
 import asyncio
+import time
+from contextlib import asynccontextmanager, AsyncExitStack
 from datetime import datetime, timedelta
 from cogs.premium import is_premium_user, is_premium_guild, require_premium
+from cogs.rank_index import RankIndex
 
 DATABASE_FILE = "bot_database.db"
 
@@ -33,6 +36,266 @@ def create_error_embed(title, description):
     """Create an error embed"""
     return create_embed(title, description, COLORS['error'])
 
+ECONOMY_FLUSH_INTERVAL = 2  # Seconds between balance write-backs
+BALANCE_CACHE_SIZE = 50000  # Clean balances kept in memory before eviction
+BALANCE_FIELDS = ('wallet', 'bank', 'daily_streak', 'total_earned', 'total_spent')
+ECONOMY_COMPACT_INTERVAL = 1  # Hours between transaction compaction passes
+ECONOMY_TRANSACTION_RETENTION_DAYS = 7  # Raw transactions kept before rolling up into daily totals
+ECONOMY_STATS_DAYS = 30
+RICHEST_PAGE_SIZE = 10
+MAX_WEALTH = 2 ** 63 - 1
+
+def load_balance(guild_id, user_id):
+    """Read one user's balance row (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        row = conn.execute('''
+            SELECT wallet, bank, daily_streak, total_earned, total_spent 
+            FROM user_economy WHERE user_id = ? AND guild_id = ?
+        ''', (user_id, guild_id)).fetchone()
+    finally:
+        conn.close()
+    return {field: (value or 0) for field, value in zip(BALANCE_FIELDS, row or (0,) * len(BALANCE_FIELDS))}
+
+def write_balances(rows, transactions=()):
+    """Write a batch of balances and the transactions behind them in one transaction (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        with conn:
+            conn.executemany('''
+                INSERT INTO user_economy (user_id, guild_id, wallet, bank, daily_streak, total_earned, total_spent)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                    wallet = excluded.wallet, bank = excluded.bank, daily_streak = excluded.daily_streak,
+                    total_earned = excluded.total_earned, total_spent = excluded.total_spent
+            ''', rows)
+            conn.executemany('''
+                INSERT INTO economy_transactions (guild_id, user_id, kind, amount, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', transactions)
+    finally:
+        conn.close()
+
+def compact_transactions(cutoff):
+    """Fold transactions older than cutoff into per-day rollups (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        with conn:
+            conn.execute('''
+                INSERT INTO economy_daily_rollups (guild_id, day, user_id, kind, earned, spent, entries)
+                SELECT guild_id, date(created_at, 'unixepoch'), user_id, kind,
+                       SUM(MAX(amount, 0)), SUM(MAX(-amount, 0)), COUNT(*)
+                FROM economy_transactions WHERE created_at < ?
+                GROUP BY guild_id, date(created_at, 'unixepoch'), user_id, kind
+                ON CONFLICT(guild_id, day, user_id, kind) DO UPDATE SET
+                    earned = earned + excluded.earned,
+                    spent = spent + excluded.spent,
+                    entries = entries + excluded.entries
+            ''', (cutoff,))
+            cursor = conn.execute('DELETE FROM economy_transactions WHERE created_at < ?', (cutoff,))
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def load_wealth_index(guild_id):
+    """Build a guild's wealth rank index from the database (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        cursor = conn.execute('SELECT user_id, wallet + bank FROM user_economy WHERE guild_id = ?', (guild_id,))
+        return RankIndex.from_rows(cursor)
+    finally:
+        conn.close()
+
+def load_richest_page(guild_id, cursor=(MAX_WEALTH, -1), skip=0):
+    """One page of the richest users after a (wealth, user_id) keyset cursor (runs in a worker thread)"""
+    wealth, last_user_id = cursor
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        # Walks idx_user_economy_wealth from the cursor - skip only steps over ties at the cursor's wealth
+        return conn.execute('''
+            SELECT user_id, wallet, bank FROM user_economy
+            WHERE guild_id = ? AND wallet + bank <= ? AND (wallet + bank < ? OR user_id > ?)
+            ORDER BY wallet + bank DESC, user_id
+            LIMIT ? OFFSET ?
+        ''', (guild_id, wealth, wealth, last_user_id, RICHEST_PAGE_SIZE, skip)).fetchall()
+    finally:
+        conn.close()
+
+def load_economy_stats(guild_id, since):
+    """Guild economy stats from rollups plus the not-yet-compacted transactions (runs in a worker thread)"""
+    since_day = time.strftime('%Y-%m-%d', time.gmtime(since))
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        cursor = conn.cursor()
+        
+        # Every coin in circulation entered through a transaction (or the opening rollup)
+        cursor.execute('''
+            SELECT
+                (SELECT COALESCE(SUM(earned - spent), 0) FROM economy_daily_rollups WHERE guild_id = ?) +
+                (SELECT COALESCE(SUM(amount), 0) FROM economy_transactions WHERE guild_id = ?)
+        ''', (guild_id, guild_id))
+        money_supply = cursor.fetchone()[0]
+        
+        recent = '''
+            SELECT user_id, kind, earned, spent, entries FROM economy_daily_rollups
+            WHERE guild_id = ? AND day >= ?
+            UNION ALL
+            SELECT user_id, kind, MAX(amount, 0), MAX(-amount, 0), 1 FROM economy_transactions
+            WHERE guild_id = ? AND created_at >= ?
+        '''
+        params = (guild_id, since_day, guild_id, since)
+        
+        cursor.execute(f'''
+            SELECT kind, SUM(earned), SUM(spent), SUM(entries) FROM ({recent})
+            WHERE kind != 'opening' GROUP BY kind ORDER BY SUM(earned) + SUM(spent) DESC
+        ''', params)
+        by_kind = cursor.fetchall()
+        
+        cursor.execute(f'''
+            SELECT user_id, SUM(earned - spent) AS net FROM ({recent})
+            WHERE kind NOT IN ('opening', 'transfer') GROUP BY user_id
+            HAVING net > 0 ORDER BY net DESC LIMIT 5
+        ''', params)
+        top_earners = cursor.fetchall()
+    finally:
+        conn.close()
+    
+    return {'money_supply': money_supply, 'by_kind': by_kind, 'top_earners': top_earners}
+
+class BalanceLedger:
+    """In-memory balances with per-user locks, written back to SQLite in batches
+    
+    Every balance change goes through here, so the cached value is always the
+    latest one and the database trails it by at most one flush interval.
+    """
+    
+    def __init__(self, on_change=None):
+        self.on_change = on_change  # Called with (guild_id, user_id, wallet + bank) after every change
+        self.balances = {}  # {(guild_id, user_id): balance dict}
+        self.locks = {}  # {(guild_id, user_id): asyncio.Lock} - only while held or awaited
+        self.holders = {}  # {(guild_id, user_id): operations holding or waiting on the lock}
+        self.dirty = set()
+        self.pending_transactions = []  # [(guild_id, user_id, kind, amount, created_at)]
+        self.flush_lock = asyncio.Lock()
+    
+    @asynccontextmanager
+    async def hold(self, *keys):
+        """Lock balances in a fixed order (so transfers can't deadlock) and yield {key: balance}"""
+        keys = sorted(set(keys))
+        for key in keys:
+            self.holders[key] = self.holders.get(key, 0) + 1
+            if key not in self.locks:
+                self.locks[key] = asyncio.Lock()
+        
+        try:
+            async with AsyncExitStack() as stack:
+                for key in keys:
+                    await stack.enter_async_context(self.locks[key])
+                
+                balances = {}
+                for key in keys:
+                    balance = self.balances.get(key)
+                    if balance is None:
+                        balance = await asyncio.to_thread(load_balance, *key)
+                        self.balances[key] = balance
+                    balances[key] = balance
+                yield balances
+        finally:
+            for key in keys:
+                self.holders[key] -= 1
+                if not self.holders[key]:
+                    del self.holders[key]
+                    del self.locks[key]
+    
+    async def get(self, guild_id: int, user_id: int) -> dict:
+        key = (guild_id, user_id)
+        async with self.hold(key) as balances:
+            return dict(balances[key])
+    
+    def changed(self, key):
+        self.dirty.add(key)
+        if self.on_change:
+            balance = self.balances[key]
+            self.on_change(key[0], key[1], balance['wallet'] + balance['bank'])
+    
+    def record(self, guild_id: int, user_id: int, kind: str, amount: int):
+        self.pending_transactions.append((guild_id, user_id, kind, amount, time.time()))
+    
+    async def credit(self, guild_id: int, user_id: int, amount: int, kind: str, account: str = 'wallet', daily_streak: int = None) -> dict:
+        """Add coins to an account and return the new balance"""
+        key = (guild_id, user_id)
+        async with self.hold(key) as balances:
+            balance = balances[key]
+            balance[account] += amount
+            balance['total_earned'] += max(0, amount)
+            if daily_streak is not None:
+                balance['daily_streak'] = daily_streak
+            self.changed(key)
+            self.record(guild_id, user_id, kind, amount)
+            return dict(balance)
+    
+    async def debit(self, guild_id: int, user_id: int, amount: int, kind: str, account: str = 'wallet') -> bool:
+        """Take coins from an account only if it holds enough"""
+        key = (guild_id, user_id)
+        async with self.hold(key) as balances:
+            balance = balances[key]
+            if balance[account] < amount:
+                return False
+            balance[account] -= amount
+            balance['total_spent'] += amount
+            self.changed(key)
+            self.record(guild_id, user_id, kind, -amount)
+            return True
+    
+    async def transfer(self, guild_id: int, from_user_id: int, to_user_id: int, amount: int,
+                       from_account: str = 'wallet', to_account: str = 'wallet') -> bool:
+        """Move coins between two accounts atomically, only if the source holds enough"""
+        source_key = (guild_id, from_user_id)
+        target_key = (guild_id, to_user_id)
+        async with self.hold(source_key, target_key) as balances:
+            if amount <= 0 or balances[source_key][from_account] < amount:
+                return False
+            balances[source_key][from_account] -= amount
+            balances[target_key][to_account] += amount
+            self.changed(source_key)
+            self.changed(target_key)
+            self.record(guild_id, from_user_id, 'transfer', -amount)
+            self.record(guild_id, to_user_id, 'transfer', amount)
+            return True
+    
+    async def flush(self):
+        """Write every changed balance and its transactions back in one batched transaction"""
+        async with self.flush_lock:
+            if not self.dirty and not self.pending_transactions:
+                return
+            
+            keys, self.dirty = self.dirty, set()
+            transactions, self.pending_transactions = self.pending_transactions, []
+            rows = [
+                (user_id, guild_id, *(self.balances[(guild_id, user_id)][field] for field in BALANCE_FIELDS))
+                for guild_id, user_id in keys
+            ]
+            
+            try:
+                await asyncio.to_thread(write_balances, rows, transactions)
+            except Exception as e:
+                self.dirty |= keys
+                self.pending_transactions[:0] = transactions
+                print(f"❌ Failed to flush balances: {e}")
+                return
+            
+            self.evict()
+    
+    def evict(self):
+        """Drop clean, idle balances once the cache outgrows its limit"""
+        if len(self.balances) <= BALANCE_CACHE_SIZE:
+            return
+        for key in list(self.balances):
+            if key not in self.dirty and key not in self.holders:
+                del self.balances[key]
+                if len(self.balances) <= BALANCE_CACHE_SIZE // 2:
+                    break
+
 class EconomySystem(commands.Cog):
     """Complete economy system with wallet, shop, gambling, and rewards"""
     
@@ -41,6 +304,72 @@ class EconomySystem(commands.Cog):
         self.init_economy_database()
         self.daily_cooldowns = {}
         self.weekly_cooldowns = {}
+        self.ledger = BalanceLedger(on_change=self.note_wealth_change)
+        self.wealth_indexes = {}  # {guild_id: RankIndex}
+        self.wealth_index_loads = {}  # {guild_id: in-flight load task}
+        self.wealth_index_pending = {}  # {guild_id: {user_id: wealth}} changes made while loading
+    
+    async def cog_load(self):
+        self.balance_flusher.start()
+        self.transaction_compactor.start()
+    
+    async def cog_unload(self):
+        self.balance_flusher.cancel()
+        self.transaction_compactor.cancel()
+        await self.ledger.flush()
+    
+    async def get_wealth_index(self, guild_id: int) -> RankIndex:
+        """Get a guild's wealth rank index, loading it from the database on first use"""
+        index = self.wealth_indexes.get(guild_id)
+        if index:
+            return index
+        
+        load = self.wealth_index_loads.get(guild_id)
+        if load is None:
+            self.wealth_index_pending[guild_id] = {}
+            load = asyncio.ensure_future(asyncio.to_thread(load_wealth_index, guild_id))
+            self.wealth_index_loads[guild_id] = load
+        
+        try:
+            index = await load
+        except Exception:
+            self.wealth_index_loads.pop(guild_id, None)
+            self.wealth_index_pending.pop(guild_id, None)
+            raise
+        
+        if self.wealth_index_loads.get(guild_id) is load:
+            # Cached balances may not be flushed yet, and changes may have raced with the load
+            for (balance_guild_id, user_id), balance in self.ledger.balances.items():
+                if balance_guild_id == guild_id:
+                    index.update(user_id, balance['wallet'] + balance['bank'])
+            for user_id, wealth in self.wealth_index_pending.pop(guild_id, {}).items():
+                index.update(user_id, wealth)
+            self.wealth_indexes[guild_id] = index
+            self.wealth_index_loads.pop(guild_id, None)
+        return self.wealth_indexes.get(guild_id, index)
+    
+    def note_wealth_change(self, guild_id: int, user_id: int, wealth: int):
+        """Keep a guild's wealth index in step with a balance change"""
+        index = self.wealth_indexes.get(guild_id)
+        if index:
+            index.update(user_id, wealth)
+        elif guild_id in self.wealth_index_pending:
+            self.wealth_index_pending[guild_id][user_id] = wealth
+    
+    @tasks.loop(seconds=ECONOMY_FLUSH_INTERVAL)
+    async def balance_flusher(self):
+        await self.ledger.flush()
+    
+    @tasks.loop(hours=ECONOMY_COMPACT_INTERVAL)
+    async def transaction_compactor(self):
+        """Roll whole days of old transactions up into daily totals"""
+        cutoff = (int(time.time()) // 86400 - ECONOMY_TRANSACTION_RETENTION_DAYS) * 86400
+        try:
+            compacted = await asyncio.to_thread(compact_transactions, cutoff)
+            if compacted:
+                print(f"🧾 Compacted {compacted} economy transactions into daily rollups")
+        except Exception as e:
+            print(f"❌ Economy transaction compaction failed: {e}")
     
     def init_economy_database(self):
         """Initialize economy database tables"""
@@ -48,6 +377,9 @@ class EconomySystem(commands.Cog):
             conn = sqlite3.connect(DATABASE_FILE)
             cursor = conn.cursor()
             
+            # WAL keeps batched balance writes crash-safe without blocking readers
+            cursor.execute('PRAGMA journal_mode=WAL')
+            
             # User economy data
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS user_economy (
@@ -109,6 +441,46 @@ class EconomySystem(commands.Cog):
                 )
             ''')
             
+            # Append-only audit trail of every balance change
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS economy_transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,  -- daily, weekly, work, gamble, shop, transfer or admin
+                    amount INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            
+            # Compacted per-day totals of old transactions
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'economy_daily_rollups'")
+            rollups_existed = cursor.fetchone() is not None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS economy_daily_rollups (
+                    guild_id INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    earned INTEGER DEFAULT 0,
+                    spent INTEGER DEFAULT 0,
+                    entries INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, day, user_id, kind)
+                )
+            ''')
+            
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_economy_wealth ON user_economy (guild_id, (wallet + bank) DESC, user_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_economy_transactions_guild ON economy_transactions (guild_id, created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_economy_transactions_created ON economy_transactions (created_at)')
+            
+            # Balances that predate the ledger become one opening entry per user, so rollups account for every coin
+            if not rollups_existed:
+                cursor.execute('''
+                    INSERT INTO economy_daily_rollups (guild_id, day, user_id, kind, earned, spent, entries)
+                    SELECT guild_id, date('now'), user_id, 'opening', MAX(wallet + bank, 0), MAX(-(wallet + bank), 0), 1
+                    FROM user_economy WHERE wallet + bank != 0
+                ''')
+            
             conn.commit()
             conn.close()
             print("✅ Economy system database initialized")
@@ -116,68 +488,22 @@ class EconomySystem(commands.Cog):
         except Exception as e:
             print(f"❌ Economy database initialization failed: {e}")
     
-    def get_user_balance(self, user_id: int, guild_id: int) -> dict:
+    async def get_user_balance(self, user_id: int, guild_id: int) -> dict:
         """Get user's economy data"""
         try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT wallet, bank, daily_streak, total_earned, total_spent 
-                FROM user_economy WHERE user_id = ? AND guild_id = ?
-            ''', (user_id, guild_id))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'wallet': result[0],
-                    'bank': result[1],
-                    'daily_streak': result[2],
-                    'total_earned': result[3],
-                    'total_spent': result[4]
-                }
-            else:
-                # Create new user
-                self.create_user_economy(user_id, guild_id)
-                return {'wallet': 0, 'bank': 0, 'daily_streak': 0, 'total_earned': 0, 'total_spent': 0}
-                
+            return await self.ledger.get(guild_id, user_id)
         except Exception as e:
             print(f"Error getting user balance: {e}")
             return {'wallet': 0, 'bank': 0, 'daily_streak': 0, 'total_earned': 0, 'total_spent': 0}
     
-    def create_user_economy(self, user_id: int, guild_id: int):
-        """Create new user economy entry"""
-        try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR IGNORE INTO user_economy (user_id, guild_id)
-                VALUES (?, ?)
-            ''', (user_id, guild_id))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Error creating user economy: {e}")
-    
-    def update_balance(self, user_id: int, guild_id: int, wallet_change: int = 0, bank_change: int = 0):
-        """Update user's balance"""
+    async def update_balance(self, user_id: int, guild_id: int, wallet_change: int = 0, bank_change: int = 0, kind: str = 'admin'):
+        """Update user's balance - withdrawals only succeed if the account holds enough"""
         try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            
-            # Ensure user exists
-            self.create_user_economy(user_id, guild_id)
-            
-            # Update balance
-            cursor.execute('''
-                UPDATE user_economy 
-                SET wallet = wallet + ?, bank = bank + ?, 
-                    total_earned = total_earned + ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (wallet_change, bank_change, max(0, wallet_change + bank_change), user_id, guild_id))
-            
-            conn.commit()
-            conn.close()
+            for account, change in (('wallet', wallet_change), ('bank', bank_change)):
+                if change > 0:
+                    await self.ledger.credit(guild_id, user_id, change, kind, account)
+                elif change < 0 and not await self.ledger.debit(guild_id, user_id, -change, kind, account):
+                    return False
             return True
         except Exception as e:
             print(f"Error updating balance: {e}")
@@ -188,7 +514,7 @@ class EconomySystem(commands.Cog):
     async def balance(self, interaction: discord.Interaction, user: discord.Member = None):
         """Check user balance"""
         target_user = user or interaction.user
-        balance_data = self.get_user_balance(target_user.id, interaction.guild.id)
+        balance_data = await self.get_user_balance(target_user.id, interaction.guild.id)
         
         embed = create_embed(
             title=f"💰 {target_user.display_name}'s Balance",
@@ -264,18 +590,17 @@ class EconomySystem(commands.Cog):
             # Update streak
             new_streak = (result[1] + 1) if result and result[0] and (datetime.now() - datetime.fromisoformat(result[0])) < timedelta(hours=48) else 1
             
-            # Apply reward
-            self.create_user_economy(user_id, guild_id)
+            # Apply reward - the claim time is stored directly, coins go through the ledger
             cursor.execute('''
-                UPDATE user_economy 
-                SET wallet = wallet + ?, last_daily = datetime('now'), daily_streak = ?,
-                    total_earned = total_earned + ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (total_reward, new_streak, total_reward, user_id, guild_id))
+                INSERT INTO user_economy (user_id, guild_id, last_daily) VALUES (?, ?, datetime('now'))
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET last_daily = excluded.last_daily
+            ''', (user_id, guild_id))
             
             conn.commit()
             conn.close()
             
+            await self.ledger.credit(guild_id, user_id, total_reward, 'daily', daily_streak=new_streak)
+            
             embed = create_success_embed(
                 "🎁 Daily Reward Claimed!",
                 f"You received **{total_reward:,} coins**!",
@@ -336,18 +661,17 @@ class EconomySystem(commands.Cog):
             premium_bonus = 200 if (is_premium_user(user_id) or is_premium_guild(guild_id)) else 0
             total_reward = base_reward + premium_bonus
             
-            # Apply reward
-            self.create_user_economy(user_id, guild_id)
+            # Apply reward - the claim time is stored directly, coins go through the ledger
             cursor.execute('''
-                UPDATE user_economy 
-                SET wallet = wallet + ?, last_weekly = datetime('now'),
-                    total_earned = total_earned + ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (total_reward, total_reward, user_id, guild_id))
+                INSERT INTO user_economy (user_id, guild_id, last_weekly) VALUES (?, ?, datetime('now'))
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET last_weekly = excluded.last_weekly
+            ''', (user_id, guild_id))
             
             conn.commit()
             conn.close()
             
+            await self.ledger.credit(guild_id, user_id, total_reward, 'weekly')
+            
             embed = create_success_embed(
                 "🎁 Weekly Reward Claimed!",
                 f"You received **{total_reward:,} coins**!",
@@ -395,7 +719,7 @@ class EconomySystem(commands.Cog):
         total_earnings = base_earnings + premium_bonus
         
         # Apply earnings
-        self.update_balance(user_id, guild_id, total_earnings)
+        await self.ledger.credit(guild_id, user_id, total_earnings, 'work')
         
         # Random work scenarios
         work_scenarios = [
@@ -466,7 +790,7 @@ class EconomySystem(commands.Cog):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         
-        balance = self.get_user_balance(user_id, guild_id)
+        balance = await self.get_user_balance(user_id, guild_id)
         if balance['wallet'] < amount:
             embed = create_error_embed(
                 "Insufficient Funds",
@@ -488,8 +812,11 @@ class EconomySystem(commands.Cog):
         user_id = interaction.user.id
         guild_id = interaction.guild.id
         
-        # Deduct amount first
-        self.update_balance(user_id, guild_id, -amount)
+        # Deduct amount first - the wallet may have changed since the balance check
+        if not await self.ledger.debit(guild_id, user_id, amount, 'gamble'):
+            embed = create_error_embed("Insufficient Funds", "You no longer have enough coins in your wallet!")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
         
         # Slot symbols
         symbols = ["🍒", "🍋", "🍊", "🍇", "⭐", "💎", "🔔", "🍀"]
@@ -520,7 +847,7 @@ class EconomySystem(commands.Cog):
         
         # Apply winnings
         if winnings > 0:
-            self.update_balance(user_id, guild_id, winnings)
+            await self.ledger.credit(guild_id, user_id, winnings, 'gamble')
         
         # Create result embed
         embed = create_embed(
@@ -558,11 +885,119 @@ class EconomySystem(commands.Cog):
     async def play_blackjack(self, interaction: discord.Interaction, amount: int):
         """Play blackjack game"""
         # Deduct amount first
-        self.update_balance(interaction.user.id, interaction.guild.id, -amount)
+        if not await self.ledger.debit(interaction.guild.id, interaction.user.id, amount, 'gamble'):
+            embed = create_error_embed("Insufficient Funds", "You no longer have enough coins in your wallet!")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
         
         view = BlackjackView(interaction.user.id, amount, self)
         await view.start_game(interaction)
     
+    @discord.app_commands.command(name="richest", description="🏆 View the richest users in the server")
+    @discord.app_commands.describe(page="Page number to view")
+    async def richest(self, interaction: discord.Interaction, page: int = 1):
+        """Show the wealth leaderboard"""
+        try:
+            page = max(1, page)
+            cursor, skip = await self.richest_page_start(interaction.guild.id, page)
+            view = RichestView(self, interaction.user.id, page, cursor, skip)
+            embed = await self.build_richest_embed(interaction, page, cursor, skip, view)
+            await interaction.response.send_message(embed=embed, view=view)
+            
+        except Exception as e:
+            embed = create_error_embed("Leaderboard Error", f"Could not load leaderboard: {str(e)}")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    async def richest_page_start(self, guild_id: int, page: int):
+        """Resolve a page number to a keyset cursor through the wealth index"""
+        index = await self.get_wealth_index(guild_id)
+        offset = (page - 1) * RICHEST_PAGE_SIZE
+        if page == 1 or offset >= len(index):
+            return (MAX_WEALTH, -1), offset
+        
+        high = index.score_at(offset + 1)
+        return (high, -1), offset - index.count_above(high)
+    
+    async def build_richest_embed(self, interaction: discord.Interaction, page: int, cursor, skip: int, view):
+        """Render one leaderboard page and point the view at the next one"""
+        guild = interaction.guild
+        await self.ledger.flush()
+        rows = await asyncio.to_thread(load_richest_page, guild.id, cursor, skip)
+        index = await self.get_wealth_index(guild.id)
+        total_users = len(index)
+        max_pages = max(1, (total_users + RICHEST_PAGE_SIZE - 1) // RICHEST_PAGE_SIZE)
+        
+        if not rows:
+            embed = create_embed(
+                title="🏆 Richest Users",
+                description="**No users found on this page**",
+                color=COLORS['warning']
+            )
+        else:
+            embed = create_embed(
+                title="🏆 Richest Users",
+                description=f"**Top users by wallet + bank** • Page {page}",
+                color=COLORS['gold']
+            )
+            
+            offset = (page - 1) * RICHEST_PAGE_SIZE
+            leaderboard_text = ""
+            for i, (user_id, wallet, bank) in enumerate(rows):
+                rank = offset + i + 1
+                member = guild.get_member(user_id)
+                username = member.display_name if member else f"User {user_id}"
+                medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
+                leaderboard_text += f"{medal} **{username}** • {wallet + bank:,} coins\n"
+            
+            embed.add_field(name="💰 Rankings", value=leaderboard_text, inline=False)
+        
+        balance = await self.ledger.get(guild.id, interaction.user.id)
+        my_rank = index.rank(balance['wallet'] + balance['bank'])
+        embed.set_footer(text=f"Page {page}/{max_pages} • Your rank: #{my_rank} of {total_users}")
+        
+        view.next_cursor = (rows[-1][1] + rows[-1][2], rows[-1][0]) if len(rows) == RICHEST_PAGE_SIZE else None
+        view.previous_page.disabled = page <= 1
+        view.next_page.disabled = view.next_cursor is None or page >= max_pages
+        return embed
+    
+    @discord.app_commands.command(name="economy_stats", description="📊 View server economy statistics")
+    async def economy_stats(self, interaction: discord.Interaction):
+        """Show money supply, activity and top earners"""
+        try:
+            await self.ledger.flush()
+            since = time.time() - ECONOMY_STATS_DAYS * 86400
+            stats = await asyncio.to_thread(load_economy_stats, interaction.guild.id, since)
+            
+            embed = create_embed(
+                title="📊 Server Economy",
+                description=f"**Money supply:** {stats['money_supply']:,} coins",
+                color=COLORS['gold']
+            )
+            
+            if stats['by_kind']:
+                embed.add_field(
+                    name=f"💱 Activity ({ECONOMY_STATS_DAYS} days)",
+                    value="\n".join(
+                        f"**{kind.title()}** • +{earned:,} / -{spent:,} • {entries:,} transactions"
+                        for kind, earned, spent, entries in stats['by_kind']
+                    ),
+                    inline=False
+                )
+            
+            if stats['top_earners']:
+                lines = []
+                for i, (user_id, net) in enumerate(stats['top_earners']):
+                    member = interaction.guild.get_member(user_id)
+                    name = member.display_name if member else f"User {user_id}"
+                    lines.append(f"{i + 1}. **{name}** • +{net:,} coins")
+                embed.add_field(name=f"🏆 Top Earners ({ECONOMY_STATS_DAYS} days)", value="\n".join(lines), inline=False)
+            
+            await interaction.response.send_message(embed=embed)
+            
+        except Exception as e:
+            embed = create_error_embed("Stats Error", f"Could not load economy stats: {str(e)}")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @discord.app_commands.command(name="shop", description="🛒 Browse the server shop")
     async def shop(self, interaction: discord.Interaction):
         """Show server shop"""
@@ -605,6 +1040,47 @@ class EconomySystem(commands.Cog):
             embed = create_error_embed("Shop Error", f"Could not load shop: {str(e)}")
             await interaction.response.send_message(embed=embed, ephemeral=True)
 
+class RichestView(discord.ui.View):
+    """Page through the richest users with keyset cursors"""
+    
+    def __init__(self, economy_system, user_id: int, page: int, cursor, skip: int):
+        super().__init__(timeout=300)
+        self.economy = economy_system
+        self.user_id = user_id
+        self.page = page
+        self.page_starts = [(cursor, skip)]  # Start of each page visited, for going back
+        self.next_cursor = None
+    
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, emoji="⬅️")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ Only the command user can change pages.", ephemeral=True)
+            return
+        
+        self.page -= 1
+        if len(self.page_starts) > 1:
+            self.page_starts.pop()
+        else:
+            self.page_starts[0] = await self.economy.richest_page_start(interaction.guild.id, self.page)
+        await self.show_page(interaction)
+    
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, emoji="➡️")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ Only the command user can change pages.", ephemeral=True)
+            return
+        
+        if not self.next_cursor:
+            return
+        self.page += 1
+        self.page_starts.append((self.next_cursor, 0))
+        await self.show_page(interaction)
+    
+    async def show_page(self, interaction: discord.Interaction):
+        cursor, skip = self.page_starts[-1]
+        embed = await self.economy.build_richest_embed(interaction, self.page, cursor, skip, self)
+        await interaction.response.edit_message(embed=embed, view=self)
+
 class CoinflipView(discord.ui.View):
     """Interactive coinflip game"""
     
@@ -631,7 +1107,10 @@ class CoinflipView(discord.ui.View):
     async def flip_coin(self, interaction: discord.Interaction, choice: str):
         """Execute coinflip"""
         # Deduct amount
-        self.economy.update_balance(self.user_id, interaction.guild.id, -self.amount)
+        if not await self.economy.ledger.debit(interaction.guild.id, self.user_id, self.amount, 'gamble'):
+            embed = create_error_embed("Insufficient Funds", "You no longer have enough coins in your wallet!")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
         
         # Flip coin
         result = random.choice(["heads", "tails"])
@@ -640,7 +1119,7 @@ class CoinflipView(discord.ui.View):
         # Calculate winnings
         winnings = self.amount * 2 if won else 0
         if winnings > 0:
-            self.economy.update_balance(self.user_id, interaction.guild.id, winnings)
+            await self.economy.ledger.credit(interaction.guild.id, self.user_id, winnings, 'gamble')
         
         # Create result embed
         embed = create_embed(
@@ -769,7 +1248,7 @@ class BlackjackView(discord.ui.View):
             
             # Apply winnings
             if winnings > 0:
-                self.economy.update_balance(self.user_id, interaction.guild.id, winnings)
+                await self.economy.ledger.credit(interaction.guild.id, self.user_id, winnings, 'gamble')
             
             # Disable buttons
             for item in self.children:
@@ -1,8 +1,13 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import sqlite3
 import random
 import asyncio
+import heapq
+from collections import deque
+import time
+import ast
+import json
 from datetime import datetime, timedelta
 from cogs.premium import is_premium_user, is_premium_guild
 
@@ -33,13 +38,455 @@ def create_error_embed(title, description):
     """Create an error embed"""
     return create_embed(title, description, COLORS['error'])
 
+GIVEAWAY_END_CONCURRENCY = 5  # Overdue giveaways ended at once after downtime
+GIVEAWAY_ENTRY_FLUSH_INTERVAL = 2  # Seconds between batched entry writes
+GIVEAWAY_CANDIDATE_SLACK = 5  # Spare candidates drawn in case some fail re-validation
+GIVEAWAY_PREMIUM_BONUS = 1.0  # Extra entry weight for premium users
+GIVEAWAY_BOOSTER_BONUS = 0.5  # Extra entry weight for server boosters
+GIVEAWAY_NOTICE_INTERVAL = 30  # Seconds between batched requirement-failure DMs
+LEVELING_SNAPSHOT_TTL = 60  # Seconds a guild's level/message snapshot stays fresh
+GIVEAWAY_EMBED_UPDATE_INTERVAL = 15  # Minimum seconds between entry-count edits of one giveaway
+CHANNEL_EDIT_LIMIT = 5  # Message edits allowed per channel...
+CHANNEL_EDIT_WINDOW = 5  # ...within this many seconds
+GIVEAWAY_END_RETRY_DELAY = 60  # Seconds before a giveaway that failed to end is tried again
+
+def write_giveaway_entries(entries, withdrawals):
+    """Apply a batch of (giveaway_id, user_id, weight) entries and (giveaway_id, user_id) withdrawals in one transaction"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        conn.executemany('INSERT OR IGNORE INTO giveaway_entries (giveaway_id, user_id, weight) VALUES (?, ?, ?)', entries)
+        conn.executemany('DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?', withdrawals)
+        conn.commit()
+    finally:
+        conn.close()
+
+def sample_giveaway_entries(giveaway_id, count, exclude):
+    """Weighted sample of up to count entrants, streamed from the database (A-Res reservoir)"""
+    reservoir = []  # min-heap of (key, user_id)
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        cursor = conn.execute('SELECT user_id, weight FROM giveaway_entries WHERE giveaway_id = ?', (giveaway_id,))
+        for user_id, weight in cursor:
+            if user_id in exclude or not weight or weight <= 0:
+                continue
+            key = random.random() ** (1.0 / weight)
+            if len(reservoir) < count:
+                heapq.heappush(reservoir, (key, user_id))
+            elif key > reservoir[0][0]:
+                heapq.heapreplace(reservoir, (key, user_id))
+    finally:
+        conn.close()
+    return [user_id for _, user_id in sorted(reservoir, reverse=True)]
+
+def get_entry_weight(member):
+    """Entry weight for a member - premium users and boosters get bonus entries"""
+    weight = 1.0
+    if is_premium_user(member.id):
+        weight += GIVEAWAY_PREMIUM_BONUS
+    if getattr(member, 'premium_since', None):
+        weight += GIVEAWAY_BOOSTER_BONUS
+    return weight
+
+def load_leveling_snapshot(guild_id):
+    """Load {user_id: (level, message_count)} for a guild from the leveling tables"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        cursor = conn.execute('SELECT user_id, level, message_count FROM user_levels WHERE guild_id = ?', (guild_id,))
+        return {user_id: (level or 0, message_count or 0) for user_id, level, message_count in cursor}
+    except sqlite3.OperationalError:
+        # Leveling cog not initialized yet
+        return {}
+    finally:
+        conn.close()
+
+def optional_int(value):
+    return int(value) if value is not None else None
+
+class GiveawayRequirements:
+    """Entry requirements parsed once into typed checks"""
+    
+    __slots__ = ('role_id', 'min_messages', 'min_server_age', 'min_level')
+    
+    def __init__(self, role_id=None, min_messages=None, min_server_age=None, min_level=None):
+        self.role_id = role_id
+        self.min_messages = min_messages
+        self.min_server_age = min_server_age
+        self.min_level = min_level
+    
+    @classmethod
+    def parse(cls, requirements_str):
+        """Parse stored requirements - JSON, or the legacy dict repr"""
+        if not requirements_str:
+            return cls()
+        try:
+            data = json.loads(requirements_str)
+        except ValueError:
+            try:
+                data = ast.literal_eval(requirements_str)
+            except (ValueError, SyntaxError):
+                return cls()
+        if not isinstance(data, dict):
+            return cls()
+        return cls(
+            role_id=optional_int(data.get('role')),
+            min_messages=optional_int(data.get('messages')),
+            min_server_age=optional_int(data.get('server_age')),
+            min_level=optional_int(data.get('level'))
+        )
+    
+    def __bool__(self):
+        return any(value is not None for value in (self.role_id, self.min_messages, self.min_server_age, self.min_level))
+    
+    @property
+    def needs_leveling(self):
+        return self.min_messages is not None or self.min_level is not None
+    
+    def failure_reason(self, member, stats=None):
+        """Why a member fails these requirements, or None if they qualify"""
+        if self.role_id is not None and not any(role.id == self.role_id for role in member.roles):
+            return f"You need the <@&{self.role_id}> role"
+        
+        if self.min_server_age is not None:
+            days_in_server = (discord.utils.utcnow() - member.joined_at).days if member.joined_at else 0
+            if days_in_server < self.min_server_age:
+                return f"You need to be in the server for {self.min_server_age} days"
+        
+        level, message_count = stats or (0, 0)
+        if self.min_level is not None and level < self.min_level:
+            return f"You need to be level {self.min_level} (you are level {level})"
+        if self.min_messages is not None and message_count < self.min_messages:
+            return f"You need {self.min_messages} messages (you have {message_count})"
+        
+        return None
+
+class GiveawayScheduler:
+    """Single timer that ends giveaways in end-time order using a min-heap"""
+    
+    def __init__(self, end_callback, max_concurrent=GIVEAWAY_END_CONCURRENCY):
+        self.end_callback = end_callback
+        self.heap = []  # [(ends_at_timestamp, giveaway_id)]
+        self.scheduled = {}  # {giveaway_id: ends_at_timestamp}
+        self.wakeup = asyncio.Event()
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.running = set()
+        self.task = None
+    
+    def schedule(self, giveaway_id, ends_at):
+        """Schedule (or reschedule) a giveaway to end at a unix timestamp"""
+        self.scheduled[giveaway_id] = ends_at
+        heapq.heappush(self.heap, (ends_at, giveaway_id))
+        if self.heap[0] == (ends_at, giveaway_id):
+            self.wakeup.set()
+    
+    def cancel(self, giveaway_id):
+        """Stop tracking a giveaway; its heap entry is discarded lazily"""
+        self.scheduled.pop(giveaway_id, None)
+    
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+    
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+    
+    def pop_due(self, now):
+        """Pop every giveaway whose end time has passed, skipping stale entries"""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            ends_at, giveaway_id = heapq.heappop(self.heap)
+            if self.scheduled.get(giveaway_id) == ends_at:
+                del self.scheduled[giveaway_id]
+                due.append(giveaway_id)
+        return due
+    
+    async def fire(self, giveaway_id):
+        async with self.semaphore:
+            try:
+                await self.end_callback(giveaway_id)
+            except Exception as e:
+                print(f"❌ Scheduled giveaway end failed for {giveaway_id}: {e}")
+    
+    async def run(self):
+        while True:
+            self.wakeup.clear()
+            for giveaway_id in self.pop_due(time.time()):
+                task = asyncio.create_task(self.fire(giveaway_id))
+                self.running.add(task)
+                task.add_done_callback(self.running.discard)
+            
+            # Drop cancelled entries so the head is always a live giveaway
+            while self.heap and self.scheduled.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            
+            if not self.heap:
+                await self.wakeup.wait()
+                continue
+            
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=max(0, self.heap[0][0] - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+class GiveawayEmbedUpdater:
+    """Coalesces entry changes into throttled giveaway embed edits through one shared queue"""
+    
+    def __init__(self, edit_callback, interval=GIVEAWAY_EMBED_UPDATE_INTERVAL, channel_limit=CHANNEL_EDIT_LIMIT,
+                 channel_window=CHANNEL_EDIT_WINDOW, clock=time.monotonic, sleep=asyncio.sleep, tick=1):
+        self.edit_callback = edit_callback
+        self.interval = interval
+        self.channel_limit = channel_limit
+        self.channel_window = channel_window
+        self.clock = clock
+        self.sleep = sleep
+        self.tick = tick
+        self.dirty = {}  # {giveaway_id: channel_id} with changes not yet shown
+        self.last_edit = {}  # {giveaway_id: timestamp}
+        self.channel_edits = {}  # {channel_id: deque of recent edit timestamps}
+        self.editing = {}  # {giveaway_id: asyncio.Event set when its in-flight edit finishes}
+        self.task = None
+    
+    def mark_dirty(self, giveaway_id, channel_id):
+        self.dirty[giveaway_id] = channel_id
+    
+    def forget(self, giveaway_id):
+        self.dirty.pop(giveaway_id, None)
+        self.last_edit.pop(giveaway_id, None)
+    
+    async def settle(self, giveaway_id):
+        """Drop a giveaway's pending edit and wait out one already in flight"""
+        self.dirty.pop(giveaway_id, None)
+        done = self.editing.get(giveaway_id)
+        if done:
+            await done.wait()
+    
+    def channel_has_capacity(self, channel_id, now):
+        edits = self.channel_edits.get(channel_id)
+        if not edits:
+            return True
+        while edits and now - edits[0] >= self.channel_window:
+            edits.popleft()
+        return len(edits) < self.channel_limit
+    
+    def due_updates(self, now):
+        """Pick dirty giveaways whose interval has passed and whose channel can take another edit"""
+        due = []
+        for giveaway_id, channel_id in list(self.dirty.items()):
+            if now - self.last_edit.get(giveaway_id, float('-inf')) < self.interval:
+                continue
+            if not self.channel_has_capacity(channel_id, now):
+                continue
+            del self.dirty[giveaway_id]
+            self.last_edit[giveaway_id] = now
+            self.channel_edits.setdefault(channel_id, deque()).append(now)
+            due.append(giveaway_id)
+        return due
+    
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+    
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+    
+    async def run(self):
+        while True:
+            for giveaway_id in self.due_updates(self.clock()):
+                done = self.editing[giveaway_id] = asyncio.Event()
+                try:
+                    await self.edit_callback(giveaway_id)
+                except Exception as e:
+                    print(f"❌ Failed to update giveaway embed {giveaway_id}: {e}")
+                finally:
+                    del self.editing[giveaway_id]
+                    done.set()
+            await self.sleep(self.tick)
+
 class GiveawaySystem(commands.Cog):
     """Complete giveaway system with requirements and interactive setup"""
     
     def __init__(self, bot):
         self.bot = bot
         self.init_giveaway_database()
-        self.active_giveaways = {}
+        self.active_giveaways = {}  # {message_id: giveaway record}
+        self.giveaway_messages = {}  # {giveaway_id: message_id}
+        self.pending_entries = {}  # {(giveaway_id, user_id): weight, or None to withdraw} awaiting the next batched write
+        self.ending_giveaways = set()  # giveaway_ids closed to entries while end_giveaway runs
+        self.entry_flush_lock = asyncio.Lock()
+        self.leveling_snapshots = {}  # {guild_id: (loaded_at, {user_id: (level, message_count)})}
+        self.snapshot_loads = {}  # {guild_id: in-flight load task}
+        self.requirement_notices = {}  # {user_id: (member, [(jump_url, reason)])}
+        self.scheduler = GiveawayScheduler(self.end_scheduled_giveaway)
+        self.embed_updater = GiveawayEmbedUpdater(self.update_giveaway_embed)
+    
+    async def cog_load(self):
+        """Resume pending giveaways - overdue ones end as soon as the bot is ready"""
+        self.load_pending_giveaways()
+        self.scheduler.start()
+        self.embed_updater.start()
+        self.entry_flusher.start()
+        self.requirement_notifier.start()
+    
+    async def cog_unload(self):
+        self.scheduler.stop()
+        self.embed_updater.stop()
+        self.entry_flusher.cancel()
+        self.requirement_notifier.cancel()
+        await self.flush_entries()
+    
+    def handles_guild(self, guild_id):
+        """Whether this process's shard owns the guild"""
+        shard_count = self.bot.shard_count or 1
+        shard_ids = getattr(self.bot, 'shard_ids', None) or ([self.bot.shard_id] if self.bot.shard_id is not None else None)
+        if shard_count == 1 or not shard_ids:
+            return True
+        return (guild_id >> 22) % shard_count in shard_ids
+    
+    def register_giveaway(self, giveaway_id, guild_id, channel_id, message_id, winners, requirements):
+        """Add an active giveaway to the message index"""
+        self.active_giveaways[message_id] = {
+            'id': giveaway_id,
+            'guild_id': guild_id,
+            'channel_id': channel_id,
+            'message_id': message_id,
+            'winners': winners,
+            'requirements': GiveawayRequirements.parse(requirements),
+            'entrants': set()
+        }
+        self.giveaway_messages[giveaway_id] = message_id
+    
+    def unregister_giveaway(self, giveaway_id):
+        """Remove an ended giveaway from the message index"""
+        message_id = self.giveaway_messages.pop(giveaway_id, None)
+        if message_id is not None:
+            self.active_giveaways.pop(message_id, None)
+        self.embed_updater.forget(giveaway_id)
+    
+    def drop_pending_entries(self, giveaway_id):
+        """Discard buffered entries for a giveaway that has already ended"""
+        for key in [key for key in self.pending_entries if key[0] == giveaway_id]:
+            del self.pending_entries[key]
+    
+    def get_entry_count(self, giveaway_id):
+        """Live entry count for an active giveaway, including unflushed entries"""
+        message_id = self.giveaway_messages.get(giveaway_id)
+        giveaway = self.active_giveaways.get(message_id)
+        return len(giveaway['entrants']) if giveaway else 0
+    
+    def add_entry(self, giveaway, user_id, weight=1.0):
+        """Record an entry in memory; returns False for duplicates or a giveaway that is ending"""
+        if user_id in giveaway['entrants'] or giveaway['id'] in self.ending_giveaways:
+            return False
+        giveaway['entrants'].add(user_id)
+        self.pending_entries[(giveaway['id'], user_id)] = weight
+        self.embed_updater.mark_dirty(giveaway['id'], giveaway['channel_id'])
+        return True
+    
+    def remove_entry(self, giveaway, user_id):
+        """Withdraw an entry in memory; returns False if the user had not entered or the giveaway is ending"""
+        if user_id not in giveaway['entrants'] or giveaway['id'] in self.ending_giveaways:
+            return False
+        giveaway['entrants'].discard(user_id)
+        self.pending_entries[(giveaway['id'], user_id)] = None
+        self.embed_updater.mark_dirty(giveaway['id'], giveaway['channel_id'])
+        return True
+    
+    async def update_giveaway_embed(self, giveaway_id):
+        """Show the live entry count on a giveaway message"""
+        giveaway = self.active_giveaways.get(self.giveaway_messages.get(giveaway_id))
+        if not giveaway or giveaway_id in self.ending_giveaways:
+            return
+        
+        channel = self.bot.get_channel(giveaway['channel_id'])
+        if not channel:
+            return
+        
+        # Fetch the embed once, then edit the cached copy
+        if 'embed' not in giveaway:
+            message = await channel.fetch_message(giveaway['message_id'])
+            if not message.embeds:
+                return
+            giveaway['embed'] = message.embeds[0]
+            # The giveaway may have started ending during the fetch - its results embed must not be overwritten
+            if giveaway_id not in self.giveaway_messages or giveaway_id in self.ending_giveaways:
+                return
+        embed = giveaway['embed']
+        
+        entries_text = f"**{len(giveaway['entrants']):,}** entries"
+        for index, field in enumerate(embed.fields):
+            if field.name == "📊 Entries":
+                embed.set_field_at(index, name="📊 Entries", value=entries_text, inline=False)
+                break
+        else:
+            embed.add_field(name="📊 Entries", value=entries_text, inline=False)
+        
+        await channel.get_partial_message(giveaway['message_id']).edit(embed=embed)
+    
+    async def flush_entries(self):
+        """Write all buffered entries and withdrawals in a single transaction"""
+        async with self.entry_flush_lock:
+            if not self.pending_entries:
+                return
+            pending, self.pending_entries = self.pending_entries, {}
+            entries = [(giveaway_id, user_id, weight) for (giveaway_id, user_id), weight in pending.items() if weight is not None]
+            withdrawals = [key for key, weight in pending.items() if weight is None]
+            try:
+                await asyncio.to_thread(write_giveaway_entries, entries, withdrawals)
+            except Exception as e:
+                print(f"❌ Failed to save giveaway entries: {e}")
+                # Keep the changes for the next flush unless newer ones arrived meanwhile
+                for key, weight in pending.items():
+                    self.pending_entries.setdefault(key, weight)
+    
+    @tasks.loop(seconds=GIVEAWAY_ENTRY_FLUSH_INTERVAL)
+    async def entry_flusher(self):
+        await self.flush_entries()
+    
+    def load_pending_giveaways(self):
+        """Load every unfinished giveaway into the message index and scheduler"""
+        try:
+            conn = sqlite3.connect(DATABASE_FILE)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, guild_id, channel_id, message_id, winners, requirements, ends_at
+                FROM giveaways WHERE ended = 0
+            ''')
+            pending = cursor.fetchall()
+            conn.close()
+            
+            loaded = 0
+            for giveaway_id, guild_id, channel_id, message_id, winners, requirements, ends_at in pending:
+                if self.handles_guild(guild_id):
+                    self.register_giveaway(giveaway_id, guild_id, channel_id, message_id, winners, requirements)
+                    self.scheduler.schedule(giveaway_id, datetime.fromisoformat(ends_at).timestamp())
+                    loaded += 1
+            
+            # Seed entrant sets so duplicate reactions never reach the database
+            if self.giveaway_messages:
+                conn = sqlite3.connect(DATABASE_FILE)
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT e.giveaway_id, e.user_id FROM giveaway_entries e
+                    JOIN giveaways g ON g.id = e.giveaway_id
+                    WHERE g.ended = 0
+                ''')
+                for giveaway_id, user_id in cursor:
+                    message_id = self.giveaway_messages.get(giveaway_id)
+                    if message_id is not None:
+                        self.active_giveaways[message_id]['entrants'].add(user_id)
+                conn.close()
+            
+            print(f"🎉 Scheduled {loaded} pending giveaways")
+            
+        except Exception as e:
+            print(f"❌ Failed to load pending giveaways: {e}")
+    
+    async def end_scheduled_giveaway(self, giveaway_id: int):
+        await self.bot.wait_until_ready()
+        await self.end_giveaway(giveaway_id)
     
     def init_giveaway_database(self):
         """Initialize giveaway database tables"""
@@ -75,10 +522,19 @@ class GiveawaySystem(commands.Cog):
                     giveaway_id INTEGER NOT NULL,
                     user_id INTEGER NOT NULL,
                     entered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    weight REAL DEFAULT 1,
                     UNIQUE(giveaway_id, user_id)
                 )
             ''')
             
+            cursor.execute('PRAGMA table_info(giveaway_entries)')
+            if 'weight' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE giveaway_entries ADD COLUMN weight REAL DEFAULT 1')
+            
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_giveaways_message ON giveaways (message_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_giveaways_pending ON giveaways (ended, ends_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_giveaways_guild ON giveaways (guild_id, ended)')
+            
             conn.commit()
             conn.close()
             print("✅ Giveaway system database initialized")
@@ -207,6 +663,290 @@ class GiveawaySystem(commands.Cog):
         except Exception as e:
             embed = create_error_embed("Error", f"Could not load giveaways: {str(e)}")
             await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    async def is_valid_winner(self, guild, user_id, requirements):
+        """Re-check a drawn candidate - they must still be in the server and meet requirements"""
+        member = guild.get_member(user_id)
+        if not member:
+            return False
+        if requirements:
+            return await self.check_requirements(member, requirements) is None
+        return True
+    
+    async def draw_winners(self, giveaway_id, winners, guild, requirements, exclude=()):
+        """Draw weighted winners, validating only the drawn candidates"""
+        rejected = set(exclude)
+        winner_ids = []
+        
+        while len(winner_ids) < winners:
+            pool_size = winners - len(winner_ids) + GIVEAWAY_CANDIDATE_SLACK
+            candidates = await asyncio.to_thread(sample_giveaway_entries, giveaway_id, pool_size, rejected | set(winner_ids))
+            
+            for user_id in candidates:
+                if len(winner_ids) >= winners:
+                    break
+                if not guild or await self.is_valid_winner(guild, user_id, requirements):
+                    winner_ids.append(user_id)
+                else:
+                    rejected.add(user_id)
+            
+            if len(candidates) < pool_size:
+                # Every remaining entry has been considered
+                break
+        
+        return winner_ids
+    
+    async def end_giveaway(self, giveaway_id: int):
+        """End giveaway and pick winners"""
+        if giveaway_id in self.ending_giveaways:
+            return
+        
+        # Stop taking entries and embed edits first, then put the buffered entries on disk before winners are drawn
+        self.ending_giveaways.add(giveaway_id)
+        committed = False
+        try:
+            await self.embed_updater.settle(giveaway_id)
+            await self.flush_entries()
+            if any(key[0] == giveaway_id for key in self.pending_entries):
+                raise RuntimeError("buffered entries could not be saved")
+            
+            conn = sqlite3.connect(DATABASE_FILE)
+            cursor = conn.cursor()
+            
+            # Get giveaway data
+            cursor.execute('''
+                SELECT guild_id, channel_id, message_id, title, prize, winners, host_id, requirements
+                FROM giveaways WHERE id = ? AND ended = 0
+            ''', (giveaway_id,))
+            giveaway_data = cursor.fetchone()
+            
+            if not giveaway_data:
+                # Already ended or deleted
+                conn.close()
+                self.unregister_giveaway(giveaway_id)
+                self.scheduler.cancel(giveaway_id)
+                return
+            
+            guild_id, channel_id, message_id, title, prize, winners, host_id, requirements = giveaway_data
+            
+            cursor.execute('SELECT COUNT(*) FROM giveaway_entries WHERE giveaway_id = ?', (giveaway_id,))
+            total_entries = cursor.fetchone()[0]
+            conn.close()
+            
+            # Pick winners
+            guild = self.bot.get_guild(guild_id)
+            winner_ids = await self.draw_winners(giveaway_id, winners, guild, GiveawayRequirements.parse(requirements))
+            
+            # Update giveaway as ended
+            conn = sqlite3.connect(DATABASE_FILE)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE giveaways SET ended = 1, winner_ids = ? WHERE id = ?
+            ''', (str(winner_ids), giveaway_id))
+            
+            conn.commit()
+            conn.close()
+            committed = True
+            
+            # Only now that the end is committed does the giveaway leave the index and the schedule
+            self.unregister_giveaway(giveaway_id)
+            self.scheduler.cancel(giveaway_id)
+            self.drop_pending_entries(giveaway_id)
+            
+            # Get guild and channel
+            if not guild:
+                return
+            
+            channel = guild.get_channel(channel_id)
+            if not channel:
+                return
+            
+            # Create results embed
+            if winner_ids:
+                winners_text = "\n".join([f"🎉 <@{user_id}>" for user_id in winner_ids])
+                embed = create_success_embed(
+                    f"🎉 {title} - ENDED",
+                    f"**Prize:** {prize}\n\n**🏆 Winner{'s' if len(winner_ids) != 1 else ''}:**\n{winners_text}",
+                )
+                
+                embed.add_field(
+                    name="📊 Statistics",
+                    value=f"Total Entries: **{total_entries}**\nWinners Selected: **{len(winner_ids)}**",
+                    inline=False
+                )
+            else:
+                embed = create_embed(
+                    title=f"🎉 {title} - ENDED",
+                    description=f"**Prize:** {prize}\n\n❌ **No valid entries** - Giveaway cancelled",
+                    color=COLORS['error']
+                )
+            
+            # Try to edit original message
+            try:
+                message = await channel.fetch_message(message_id)
+                await message.edit(embed=embed)
+            except:
+                await channel.send(embed=embed)
+                
+        except Exception as e:
+            if not committed and giveaway_id in self.giveaway_messages:
+                # Nothing was committed - the giveaway reopens for entries and is tried again shortly
+                self.scheduler.schedule(giveaway_id, time.time() + GIVEAWAY_END_RETRY_DELAY)
+                print(f"❌ Error ending giveaway {giveaway_id}, retrying in {GIVEAWAY_END_RETRY_DELAY}s: {e}")
+            else:
+                print(f"Error ending giveaway: {e}")
+        finally:
+            self.ending_giveaways.discard(giveaway_id)
+    
+    async def reroll_giveaway(self, giveaway_id: int, count: int = 1):
+        """Draw replacement winners for an ended giveaway, excluding everyone who already won"""
+        conn = sqlite3.connect(DATABASE_FILE)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT guild_id, channel_id, title, prize, requirements, winner_ids
+            FROM giveaways WHERE id = ? AND ended = 1
+        ''', (giveaway_id,))
+        giveaway_data = cursor.fetchone()
+        conn.close()
+        
+        if not giveaway_data:
+            return None
+        
+        guild_id, channel_id, title, prize, requirements, winner_ids = giveaway_data
+        previous_winners = ast.literal_eval(winner_ids) if winner_ids else []
+        guild = self.bot.get_guild(guild_id)
+        new_winners = await self.draw_winners(giveaway_id, count, guild, GiveawayRequirements.parse(requirements), exclude=previous_winners)
+        
+        conn = sqlite3.connect(DATABASE_FILE)
+        cursor = conn.cursor()
+        cursor.execute('UPDATE giveaways SET winner_ids = ? WHERE id = ?', (str(previous_winners + new_winners), giveaway_id))
+        conn.commit()
+        conn.close()
+        
+        channel = guild.get_channel(channel_id) if guild else None
+        if channel and new_winners:
+            winners_text = "\n".join([f"🎉 <@{user_id}>" for user_id in new_winners])
+            embed = create_success_embed(
+                f"🔄 {title} - REROLLED",
+                f"**Prize:** {prize}\n\n**🏆 New Winner{'s' if len(new_winners) != 1 else ''}:**\n{winners_text}"
+            )
+            await channel.send(embed=embed)
+        
+        return new_winners
+    
+    async def show_reroll_interface(self, interaction: discord.Interaction):
+        """Let the host pick a recently ended giveaway to reroll"""
+        if not interaction.user.guild_permissions.manage_guild:
+            embed = create_error_embed("Permission Denied", "You need `Manage Server` permission to reroll giveaways.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        conn = sqlite3.connect(DATABASE_FILE)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, title, prize FROM giveaways
+            WHERE guild_id = ? AND ended = 1
+            ORDER BY ends_at DESC LIMIT 25
+        ''', (interaction.guild.id,))
+        ended_giveaways = cursor.fetchall()
+        conn.close()
+        
+        if not ended_giveaways:
+            embed = create_error_embed("No Ended Giveaways", "There are no ended giveaways to reroll.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        view = GiveawayRerollView(self, interaction.user.id, ended_giveaways)
+        await interaction.response.send_message("🔄 **Select a giveaway to reroll**", view=view, ephemeral=True)
+    
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        """Handle giveaway entries without depending on the message cache"""
+        if str(payload.emoji) != "🎉" or not payload.member or payload.member.bot:
+            return
+        
+        # Check if this is a giveaway message
+        giveaway = self.active_giveaways.get(payload.message_id)
+        if not giveaway or payload.user_id in giveaway['entrants']:
+            return
+        
+        try:
+            user = payload.member
+            requirements = giveaway['requirements']
+            
+            # Check requirements
+            if requirements:
+                reason = await self.check_requirements(user, requirements)
+                if reason:
+                    # Tell the user in the next batched DM instead of one DM per reaction
+                    jump_url = f"https://discord.com/channels/{payload.guild_id}/{payload.channel_id}/{payload.message_id}"
+                    self.requirement_notices.setdefault(user.id, (user, []))[1].append((jump_url, reason))
+                    channel = user.guild.get_channel(payload.channel_id)
+                    if channel:
+                        await channel.get_partial_message(payload.message_id).remove_reaction(payload.emoji, user)
+                    return
+            
+            # Add entry - written by the next batched flush
+            self.add_entry(giveaway, user.id, get_entry_weight(user))
+            
+        except Exception as e:
+            print(f"Error handling giveaway entry: {e}")
+    
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        """Withdraw a giveaway entry when the reaction is removed"""
+        if str(payload.emoji) != "🎉":
+            return
+        
+        giveaway = self.active_giveaways.get(payload.message_id)
+        if giveaway:
+            self.remove_entry(giveaway, payload.user_id)
+    
+    async def get_leveling_snapshot(self, guild_id):
+        """Level and message counts for a guild, refreshed at most once per TTL"""
+        cached = self.leveling_snapshots.get(guild_id)
+        if cached and time.monotonic() - cached[0] < LEVELING_SNAPSHOT_TTL:
+            return cached[1]
+        
+        # Concurrent reactions share a single load
+        load = self.snapshot_loads.get(guild_id)
+        if load is None:
+            load = asyncio.ensure_future(asyncio.to_thread(load_leveling_snapshot, guild_id))
+            self.snapshot_loads[guild_id] = load
+            load.add_done_callback(lambda _: self.snapshot_loads.pop(guild_id, None))
+        
+        snapshot = await load
+        self.leveling_snapshots[guild_id] = (time.monotonic(), snapshot)
+        return snapshot
+    
+    async def check_requirements(self, member, requirements):
+        """Return why a member fails giveaway requirements, or None if they qualify"""
+        try:
+            stats = None
+            if requirements.needs_leveling:
+                snapshot = await self.get_leveling_snapshot(member.guild.id)
+                stats = snapshot.get(member.id)
+            return requirements.failure_reason(member, stats)
+            
+        except Exception as e:
+            print(f"Error checking requirements: {e}")
+            return "Your eligibility could not be checked"
+    
+    @tasks.loop(seconds=GIVEAWAY_NOTICE_INTERVAL)
+    async def requirement_notifier(self):
+        """Send one DM per user covering every giveaway they could not enter"""
+        notices, self.requirement_notices = self.requirement_notices, {}
+        for member, failures in notices.values():
+            embed = create_error_embed(
+                "Entry Requirements Not Met",
+                "You don't meet the requirements for these giveaways:"
+            )
+            for jump_url, reason in failures[:10]:
+                embed.add_field(name="🎉 Giveaway", value=f"{reason}\n[Jump to giveaway]({jump_url})", inline=False)
+            try:
+                await member.send(embed=embed)
+            except:
+                pass
 
 class GiveawaySetupView(discord.ui.View):
     """Interactive giveaway setup interface"""
@@ -360,15 +1100,21 @@ class GiveawaySetupView(discord.ui.View):
             ''', (
                 interaction.guild.id, channel.id, giveaway_msg.id, interaction.user.id,
                 self.config['title'], self.config['prize'], self.config['winners'],
-                ends_at.isoformat(), str(self.config['requirements'])
+                ends_at.isoformat(), json.dumps(self.config['requirements'])
             ))
             
             giveaway_id = cursor.lastrowid
             conn.commit()
             conn.close()
             
-            # Schedule giveaway end
-            asyncio.create_task(self.schedule_giveaway_end(giveaway_id, total_seconds))
+            # Index the message for reaction entry and schedule giveaway end
+            giveaway_system = interaction.client.get_cog('GiveawaySystem')
+            if giveaway_system:
+                giveaway_system.register_giveaway(
+                    giveaway_id, interaction.guild.id, channel.id, giveaway_msg.id,
+                    self.config['winners'], json.dumps(self.config['requirements'])
+                )
+                giveaway_system.scheduler.schedule(giveaway_id, ends_at.timestamp())
             
             embed = create_success_embed(
                 "🎉 Giveaway Created!",
@@ -387,175 +1133,38 @@ class GiveawaySetupView(discord.ui.View):
         except Exception as e:
             embed = create_error_embed("Creation Failed", f"Could not create giveaway: {str(e)}")
             await interaction.response.send_message(embed=embed, ephemeral=True)
+
+class GiveawayRerollView(discord.ui.View):
+    """Pick an ended giveaway and draw a replacement winner"""
     
-    async def schedule_giveaway_end(self, giveaway_id: int, duration: int):
-        """Schedule giveaway to end"""
-        await asyncio.sleep(duration)
-        await self.end_giveaway(giveaway_id)
-    
-    async def end_giveaway(self, giveaway_id: int):
-        """End giveaway and pick winners"""
-        try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            
-            # Get giveaway data
-            cursor.execute('''
-                SELECT guild_id, channel_id, message_id, title, prize, winners, host_id
-                FROM giveaways WHERE id = ? AND ended = 0
-            ''', (giveaway_id,))
-            giveaway_data = cursor.fetchone()
-            
-            if not giveaway_data:
-                conn.close()
-                return
-            
-            guild_id, channel_id, message_id, title, prize, winners, host_id = giveaway_data
-            
-            # Get entries
-            cursor.execute('SELECT user_id FROM giveaway_entries WHERE giveaway_id = ?', (giveaway_id,))
-            entries = [row[0] for row in cursor.fetchall()]
-            
-            # Pick winners
-            if len(entries) < winners:
-                winner_ids = entries
-            else:
-                winner_ids = random.sample(entries, winners)
-            
-            # Update giveaway as ended
-            cursor.execute('''
-                UPDATE giveaways SET ended = 1, winner_ids = ? WHERE id = ?
-            ''', (str(winner_ids), giveaway_id))
-            
-            conn.commit()
-            conn.close()
-            
-            # Get guild and channel
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                return
-            
-            channel = guild.get_channel(channel_id)
-            if not channel:
-                return
-            
-            # Create results embed
-            if winner_ids:
-                winners_text = "\n".join([f"🎉 <@{user_id}>" for user_id in winner_ids])
-                embed = create_success_embed(
-                    f"🎉 {title} - ENDED",
-                    f"**Prize:** {prize}\n\n**🏆 Winner{'s' if len(winner_ids) != 1 else ''}:**\n{winners_text}",
-                )
-                
-                embed.add_field(
-                    name="📊 Statistics",
-                    value=f"Total Entries: **{len(entries)}**\nWinners Selected: **{len(winner_ids)}**",
-                    inline=False
-                )
-            else:
-                embed = create_embed(
-                    title=f"🎉 {title} - ENDED",
-                    description=f"**Prize:** {prize}\n\n❌ **No valid entries** - Giveaway cancelled",
-                    color=COLORS['error']
-                )
-            
-            # Try to edit original message
-            try:
-                message = await channel.fetch_message(message_id)
-                await message.edit(embed=embed)
-            except:
-                await channel.send(embed=embed)
-                
-        except Exception as e:
-            print(f"Error ending giveaway: {e}")
+    def __init__(self, giveaway_system, user_id: int, ended_giveaways):
+        super().__init__(timeout=120)
+        self.giveaway_system = giveaway_system
+        self.user_id = user_id
+        
+        self.giveaway_select = discord.ui.Select(
+            placeholder="Choose a giveaway...",
+            options=[
+                discord.SelectOption(label=title[:100], description=f"Prize: {prize}"[:100], value=str(giveaway_id))
+                for giveaway_id, title, prize in ended_giveaways
+            ]
+        )
+        self.giveaway_select.callback = self.reroll_selected
+        self.add_item(self.giveaway_select)
     
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        """Handle giveaway entries"""
-        if user.bot or str(reaction.emoji) != "🎉":
+    async def reroll_selected(self, interaction: discord.Interaction):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ Only the command user can reroll this.", ephemeral=True)
             return
         
-        try:
-            # Check if this is a giveaway message
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, requirements FROM giveaways 
-                WHERE message_id = ? AND ended = 0
-            ''', (reaction.message.id,))
-            giveaway_data = cursor.fetchone()
-            
-            if not giveaway_data:
-                conn.close()
-                return
-            
-            giveaway_id, requirements_str = giveaway_data
-            
-            # Check requirements
-            if requirements_str:
-                requirements = eval(requirements_str)  # In production, use json.loads
-                
-                # Validate requirements
-                if not await self.check_requirements(user, reaction.message.guild, requirements):
-                    # Send DM about requirements not met
-                    try:
-                        req_embed = create_error_embed(
-                            "Entry Requirements Not Met",
-                            "You don't meet the requirements for this giveaway."
-                        )
-                        await user.send(embed=req_embed)
-                    except:
-                        pass
-                    await reaction.remove(user)
-                    conn.close()
-                    return
-            
-            # Add entry
-            cursor.execute('''
-                INSERT OR IGNORE INTO giveaway_entries (giveaway_id, user_id)
-                VALUES (?, ?)
-            ''', (giveaway_id, user.id))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            print(f"Error handling giveaway entry: {e}")
-    
-    async def check_requirements(self, user, guild, requirements):
-        """Check if user meets giveaway requirements"""
-        try:
-            member = guild.get_member(user.id)
-            if not member:
-                return False
-            
-            # Check role requirement
-            if 'role' in requirements:
-                required_role_id = requirements['role']
-                if not any(role.id == required_role_id for role in member.roles):
-                    return False
-            
-            # Check message count requirement
-            if 'messages' in requirements:
-                # This would need to check against leveling system
-                pass
-            
-            # Check server age requirement
-            if 'server_age' in requirements:
-                days_required = requirements['server_age']
-                if (datetime.now() - member.joined_at).days < days_required:
-                    return False
-            
-            # Check level requirement
-            if 'level' in requirements:
-                # This would need to check against leveling system
-                pass
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error checking requirements: {e}")
-            return False
+        await interaction.response.defer(ephemeral=True)
+        new_winners = await self.giveaway_system.reroll_giveaway(int(self.giveaway_select.values[0]))
+        
+        if new_winners:
+            embed = create_success_embed("🔄 Giveaway Rerolled", f"New winner: {', '.join(f'<@{user_id}>' for user_id in new_winners)}", interaction.user)
+        else:
+            embed = create_error_embed("Reroll Failed", "No eligible entries are left to draw from.")
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
 class GiveawayDetailsModal(discord.ui.Modal):
     """Modal for giveaway details"""
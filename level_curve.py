@@ -0,0 +1,126 @@
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LEVEL_CURVE_TABLE_SIZE = 512  # Levels precomputed up front; tables grow on demand past this
+LEVEL_CURVE_TABLE_MAX = 65536  # Beyond this, lookups search the formula instead of the table
+LEVEL_CURVE_NUMPY_MIN = 256  # Batches smaller than this aren't worth converting to arrays
+DEFAULT_LEVEL_CURVE = 'classic'
+
+class LevelCurve(ABC):
+    """Cumulative XP thresholds for a level formula, precomputed once and searched with bisect"""
+
+    name = None
+    label = None
+
+    def __init__(self):
+        self.thresholds = [self.threshold(level) for level in range(LEVEL_CURVE_TABLE_SIZE)]
+        self.threshold_array = None
+
+    @abstractmethod
+    def threshold(self, level: int) -> int:
+        """Total XP needed to reach a level - must be exact and strictly increasing"""
+
+    def extend(self, total_xp: int) -> bool:
+        """Grow the threshold table to cover total_xp, returning False if that would pass the size cap"""
+        if self.thresholds[-1] > total_xp:
+            return True
+        size = len(self.thresholds)
+        while self.threshold(size - 1) <= total_xp:
+            size *= 2
+            if size > LEVEL_CURVE_TABLE_MAX:
+                return False
+        self.thresholds.extend(self.threshold(level) for level in range(len(self.thresholds), size))
+        self.threshold_array = None
+        return True
+
+    def xp_for_level(self, level: int) -> int:
+        if level < len(self.thresholds):
+            return self.thresholds[max(0, level)]
+        return self.threshold(level)
+
+    def level_for_xp(self, total_xp: int) -> int:
+        total_xp = max(0, total_xp)
+        if self.extend(total_xp):
+            return bisect_right(self.thresholds, total_xp) - 1
+
+        # Past the table - gallop then binary search over the formula
+        low = len(self.thresholds) - 1
+        high = low * 2
+        while self.threshold(high) <= total_xp:
+            low, high = high, high * 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if self.threshold(mid) <= total_xp:
+                low = mid
+            else:
+                high = mid
+        return low
+
+    def progress(self, total_xp: int):
+        """(level, XP into the level, XP span of the level) for a total"""
+        level = self.level_for_xp(total_xp)
+        level_start = self.xp_for_level(level)
+        return level, max(0, total_xp) - level_start, self.xp_for_level(level + 1) - level_start
+
+    def split_xp(self, total_xps):
+        """Batch level_for_xp - returns (levels, XP into each level) as lists of ints"""
+        if np is not None and len(total_xps) >= LEVEL_CURVE_NUMPY_MIN and max(total_xps) < 2 ** 62:
+            totals = np.maximum(np.asarray(total_xps, dtype=np.int64), 0)
+        else:
+            totals = None
+
+        if totals is not None and self.extend(int(totals.max())):
+            if self.threshold_array is None:
+                self.threshold_array = np.asarray(self.thresholds, dtype=np.int64)
+            levels = np.searchsorted(self.threshold_array, totals, side='right') - 1
+            return levels.tolist(), (totals - self.threshold_array[levels]).tolist()
+
+        levels = [self.level_for_xp(total_xp) for total_xp in total_xps]
+        return levels, [max(0, total_xp) - self.xp_for_level(level) for total_xp, level in zip(total_xps, levels)]
+
+class ClassicCurve(LevelCurve):
+    """100 × level² total XP - the original formula"""
+
+    name = 'classic'
+    label = "📈 Classic (100 × level²)"
+
+    def threshold(self, level):
+        return level * level * 100
+
+    def level_for_xp(self, total_xp):
+        # Exact integer square root - no float error at any XP
+        return math.isqrt(max(0, total_xp) // 100)
+
+class LinearCurve(LevelCurve):
+    """A flat 500 XP per level"""
+
+    name = 'linear'
+    label = "📏 Linear (500 XP per level)"
+
+    def threshold(self, level):
+        return level * 500
+
+    def level_for_xp(self, total_xp):
+        return max(0, total_xp) // 500
+
+class SteepCurve(LevelCurve):
+    """5 × level² + 50 × level + 100 XP per level, as used by many popular leveling bots"""
+
+    name = 'steep'
+    label = "⛰️ Steep (5L² + 50L + 100 per level)"
+
+    def threshold(self, level):
+        # Sum of the per-level cost over levels 0..level-1
+        return 5 * (level - 1) * level * (2 * level - 1) // 6 + 25 * (level - 1) * level + 100 * level
+
+LEVEL_CURVES = {curve.name: curve for curve in (ClassicCurve(), LinearCurve(), SteepCurve())}
+
+def get_level_curve(name=None) -> LevelCurve:
+    """Look up a curve by name, falling back to the default"""
+    return LEVEL_CURVES.get(name) or LEVEL_CURVES[DEFAULT_LEVEL_CURVE]
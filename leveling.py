@@ -1,12 +1,22 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import sqlite3
 import random
 import asyncio
-from datetime import datetime
+import json
+import csv
+import time
+from datetime import datetime, timedelta
 from cogs.premium import is_premium_user, is_premium_guild
+from cogs.avatar_cache import avatar_cache, AVATAR_SIZE
+from cogs.level_curve import LEVEL_CURVES, get_level_curve
+from cogs.rank_index import RankIndex
 from PIL import Image, ImageDraw, ImageFont
 import io
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
 
 DATABASE_FILE = "bot_database.db"
 
@@ -36,6 +46,366 @@ def create_error_embed(title, description):
     """Create an error embed"""
     return create_embed(title, description, COLORS['error'])
 
+RANK_CARD_WORKERS = 2
+RANK_CARD_CACHE_SIZE = 256
+RANK_CARD_SIZE = (800, 200)
+RANK_CARD_ACCENT = (114, 137, 218)
+RANK_CARD_TEXT = (255, 255, 255)
+RANK_BAR = (20, 80, 400, 20)  # x, y, width, height
+RANK_AVATAR_POSITION = (RANK_CARD_SIZE[0] - AVATAR_SIZE - 36, (RANK_CARD_SIZE[1] - AVATAR_SIZE) // 2)
+
+# Per-process render assets, loaded once by init_rank_card_worker
+rank_card_fonts = None
+rank_card_background = None
+rank_card_avatar_mask = None
+
+def init_rank_card_worker():
+    """Load fonts and pre-render the static card layer once per worker process"""
+    global rank_card_fonts, rank_card_background, rank_card_avatar_mask
+    try:
+        rank_card_fonts = (
+            ImageFont.truetype("arial.ttf", 24),
+            ImageFont.truetype("arial.ttf", 18),
+            ImageFont.truetype("arial.ttf", 14)
+        )
+    except:
+        default_font = ImageFont.load_default()
+        rank_card_fonts = (default_font, default_font, default_font)
+    
+    width, height = RANK_CARD_SIZE
+    bar_x, bar_y, bar_width, bar_height = RANK_BAR
+    background = Image.new('RGB', RANK_CARD_SIZE, color=(47, 49, 54))
+    draw = ImageDraw.Draw(background)
+    draw.rectangle([10, 10, width-10, height-10], fill=(54, 57, 63), outline=RANK_CARD_ACCENT, width=2)
+    draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height], fill=(32, 34, 37), outline=RANK_CARD_ACCENT)
+    rank_card_background = background
+    
+    # Circular avatar mask
+    rank_card_avatar_mask = Image.new('L', (AVATAR_SIZE, AVATAR_SIZE), 0)
+    ImageDraw.Draw(rank_card_avatar_mask).ellipse([0, 0, AVATAR_SIZE - 1, AVATAR_SIZE - 1], fill=255)
+
+def rank_card_mp_context():
+    """Start render workers from a clean process - forking the threaded bot can deadlock the child on a held lock"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Each worker forks from a server that has already imported this module (and PIL)
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+def render_rank_card(display_name, rank, level, total_xp, message_count, current_level_xp, next_level_xp, avatar=None):
+    """Render a rank card to PNG bytes (runs in a worker process)"""
+    if rank_card_background is None:
+        init_rank_card_worker()
+    title_font, text_font, small_font = rank_card_fonts
+    bar_x, bar_y, bar_width, bar_height = RANK_BAR
+    
+    img = rank_card_background.copy()
+    draw = ImageDraw.Draw(img)
+    
+    # Avatar - already resized by the avatar cache
+    if avatar:
+        avatar_image = Image.open(io.BytesIO(avatar)).convert('RGBA')
+        img.paste(avatar_image, RANK_AVATAR_POSITION, rank_card_avatar_mask)
+    
+    # User info
+    draw.text((20, 20), display_name, font=title_font, fill=RANK_CARD_TEXT)
+    draw.text((20, 50), f"Rank #{rank} • Level {level}", font=text_font, fill=RANK_CARD_ACCENT)
+    
+    # Progress bar
+    progress = current_level_xp / next_level_xp if next_level_xp > 0 else 1
+    progress_width = int(bar_width * min(1, max(0, progress)))
+    if progress_width > 0:
+        draw.rectangle([bar_x, bar_y, bar_x + progress_width, bar_y + bar_height], fill=RANK_CARD_ACCENT)
+    
+    # XP text
+    draw.text((bar_x, bar_y + 25), f"{current_level_xp:,} / {next_level_xp:,} XP", font=small_font, fill=RANK_CARD_TEXT)
+    
+    # Statistics
+    draw.text((20, 120), f"Total XP: {total_xp:,}", font=text_font, fill=RANK_CARD_TEXT)
+    draw.text((20, 145), f"Messages: {message_count:,}", font=text_font, fill=RANK_CARD_TEXT)
+    
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format='PNG', compress_level=1)
+    return img_bytes.getvalue()
+
+DEFAULT_LEVEL_UP_MESSAGE = "Congratulations {user}! You reached level {level}!"
+LEVEL_UP_ANNOUNCE_INTERVAL = 1.5  # Minimum seconds between level-up announcements per guild
+VOICE_XP_INTERVAL = 60  # Seconds between voice XP ticks
+VOICE_XP_PER_TICK = 10
+XP_LOOKUP_CHUNK_SIZE = 900  # Stays under SQLite's bound parameter limit
+XP_AWARD_FLUSH_INTERVAL = 2  # Seconds between batched writes of message XP
+
+def parse_id_list(value):
+    """Parse a stored ID list - a JSON array or comma-separated text"""
+    if not value:
+        return frozenset()
+    try:
+        data = json.loads(value)
+    except ValueError:
+        data = value.split(',')
+    if not isinstance(data, list):
+        data = [data]
+    ids = set()
+    for item in data:
+        try:
+            ids.add(int(str(item).strip()))
+        except ValueError:
+            continue
+    return frozenset(ids)
+
+class LevelingConfig:
+    """A guild's leveling settings and reward table, loaded once and kept in memory"""
+    
+    __slots__ = ('enabled', 'xp_per_message', 'cooldown', 'level_up_message', 'level_up_channel',
+                 'no_xp_channels', 'no_xp_roles', 'double_xp_channels', 'double_xp_roles', 'rewards', 'curve')
+    
+    def __init__(self, enabled=True, xp_per_message=15, cooldown=60, level_up_message=None, level_up_channel=None,
+                 no_xp_channels=frozenset(), no_xp_roles=frozenset(), double_xp_channels=frozenset(),
+                 double_xp_roles=frozenset(), rewards=None, curve=None):
+        self.enabled = enabled
+        self.xp_per_message = xp_per_message
+        self.cooldown = cooldown
+        self.level_up_message = level_up_message or DEFAULT_LEVEL_UP_MESSAGE
+        self.level_up_channel = level_up_channel
+        self.no_xp_channels = no_xp_channels
+        self.no_xp_roles = no_xp_roles
+        self.double_xp_channels = double_xp_channels
+        self.double_xp_roles = double_xp_roles
+        self.rewards = rewards or {}  # {level: [role_id, ...]}
+        self.curve = curve or get_level_curve()
+    
+    def xp_multiplier(self, member, channel) -> int:
+        """0 if the member earns no XP here, 2 for double XP, otherwise 1"""
+        role_ids = {role.id for role in member.roles}
+        channel_ids = {channel.id, getattr(channel, 'category_id', None), getattr(channel, 'parent_id', None)}
+        
+        if not self.no_xp_channels.isdisjoint(channel_ids) or not self.no_xp_roles.isdisjoint(role_ids):
+            return 0
+        if not self.double_xp_channels.isdisjoint(channel_ids) or not self.double_xp_roles.isdisjoint(role_ids):
+            return 2
+        return 1
+
+def load_leveling_config(guild_id):
+    """Load a guild's leveling config from the database (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT enabled, xp_per_message, xp_cooldown, level_up_message, level_up_channel,
+                   no_xp_channels, no_xp_roles, double_xp_channels, double_xp_roles, level_curve
+            FROM leveling_settings WHERE guild_id = ?
+        ''', (guild_id,))
+        settings = cursor.fetchone()
+        
+        rewards = {}
+        cursor.execute('''
+            SELECT level, role_id FROM level_rewards
+            WHERE guild_id = ? AND active = 1
+        ''', (guild_id,))
+        for level, role_id in cursor.fetchall():
+            role_ids = rewards.setdefault(level, [])
+            if role_id not in role_ids:
+                role_ids.append(role_id)
+    finally:
+        conn.close()
+    
+    if not settings:
+        return LevelingConfig(rewards=rewards)
+    
+    enabled, xp_per_message, cooldown, message, channel_id, no_xp_channels, no_xp_roles, double_xp_channels, double_xp_roles, curve_name = settings
+    return LevelingConfig(
+        enabled=bool(enabled) if enabled is not None else True,
+        xp_per_message=xp_per_message if xp_per_message is not None else 15,
+        cooldown=cooldown if cooldown is not None else 60,
+        level_up_message=message,
+        level_up_channel=channel_id,
+        no_xp_channels=parse_id_list(no_xp_channels),
+        no_xp_roles=parse_id_list(no_xp_roles),
+        double_xp_channels=parse_id_list(double_xp_channels),
+        double_xp_roles=parse_id_list(double_xp_roles),
+        rewards=rewards,
+        curve=get_level_curve(curve_name)
+    )
+
+XP_BULK_CHUNK_SIZE = 5000  # Rows per executemany transaction
+XP_BULK_PROGRESS_INTERVAL = 3  # Seconds between progress edits
+XP_IMPORT_MAX_BYTES = 25 * 1024 * 1024
+XP_IMPORT_USER_FIELDS = ('user_id', 'id', 'userid', 'user')
+XP_IMPORT_XP_FIELDS = ('total_xp', 'xp', 'experience')
+XP_IMPORT_MESSAGE_FIELDS = ('message_count', 'messages', 'msg_count')
+
+def iter_chunks(rows, size=XP_BULK_CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def first_field(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value not in (None, ''):
+            return value
+    return None
+
+def parse_xp_import_record(record):
+    """Turn one exported record into (user_id, total_xp, message_count), or None if unusable"""
+    record = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    try:
+        user_id = int(first_field(record, XP_IMPORT_USER_FIELDS))
+        total_xp = max(0, int(float(first_field(record, XP_IMPORT_XP_FIELDS))))
+    except (TypeError, ValueError):
+        return None
+    try:
+        message_count = max(0, int(first_field(record, XP_IMPORT_MESSAGE_FIELDS) or 0))
+    except (TypeError, ValueError):
+        message_count = 0
+    return user_id, total_xp, message_count
+
+def iter_xp_import_rows(data, filename):
+    """Yield (user_id, total_xp, message_count) rows from a CSV or JSON export"""
+    # CSV is read row by row off the buffer; JSON has no stdlib streaming parser, so it is
+    # decoded whole - the upload cap (XP_IMPORT_MAX_BYTES) bounds that
+    if filename.lower().endswith('.json'):
+        records = json.loads(data)
+        if isinstance(records, dict):
+            if isinstance(records.get('players'), list):
+                records = records['players']
+            elif isinstance(records.get('users'), list):
+                records = records['users']
+            else:
+                # {user_id: xp} mapping
+                records = ({'user_id': user_id, 'xp': xp} for user_id, xp in records.items())
+        records = (record for record in records if isinstance(record, dict))
+    else:
+        records = csv.DictReader(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline=''))
+    
+    for record in records:
+        row = parse_xp_import_record(record)
+        if row:
+            yield row
+
+def import_guild_xp(guild_id, rows, progress, curve):
+    """Upsert imported XP in chunked transactions (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        for chunk in iter_chunks(rows):
+            user_ids, total_xps, message_counts = zip(*chunk)
+            levels, xps = curve.split_xp(total_xps)
+            with conn:
+                conn.executemany('''
+                    INSERT INTO user_levels (user_id, guild_id, xp, level, total_xp, message_count)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                        xp = excluded.xp, level = excluded.level, total_xp = excluded.total_xp,
+                        message_count = MAX(message_count, excluded.message_count)
+                ''', zip(user_ids, repeat(guild_id), xps, levels, total_xps, message_counts))
+            progress['done'] += len(chunk)
+    finally:
+        conn.close()
+    return progress['done']
+
+def write_xp_awards(guild_id, awards, curve, messages=0):
+    """Add XP for many members of a guild in one transaction (runs in a worker thread)
+    
+    messages is the message count to add for every award, or {user_id: count}.
+    Returns (user_id, old_level, new_level, new_total_xp) for each award.
+    """
+    user_ids = list(awards)
+    message_counts = [messages.get(user_id, 0) for user_id in user_ids] if isinstance(messages, dict) else repeat(messages)
+    conn = sqlite3.connect(DATABASE_FILE, isolation_level=None)
+    try:
+        # Take the write lock up front so concurrent XP writers can't interleave read-modify-write
+        conn.execute('BEGIN IMMEDIATE')
+        
+        current_totals = {}
+        for chunk in iter_chunks(user_ids, XP_LOOKUP_CHUNK_SIZE):
+            placeholders = ','.join('?' * len(chunk))
+            current_totals.update(conn.execute(
+                f'SELECT user_id, total_xp FROM user_levels WHERE guild_id = ? AND user_id IN ({placeholders})',
+                (guild_id, *chunk)
+            ))
+        
+        old_totals = [current_totals.get(user_id) or 0 for user_id in user_ids]
+        new_totals = [total_xp + awards[user_id] for user_id, total_xp in zip(user_ids, old_totals)]
+        old_levels, _ = curve.split_xp(old_totals)
+        new_levels, new_xps = curve.split_xp(new_totals)
+        
+        conn.executemany('''
+            INSERT INTO user_levels (user_id, guild_id, xp, level, total_xp, last_message, message_count)
+            VALUES (?, ?, ?, ?, ?, datetime('now'), ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                xp = excluded.xp, level = excluded.level, total_xp = excluded.total_xp,
+                last_message = CASE WHEN excluded.message_count > 0 THEN excluded.last_message ELSE last_message END,
+                message_count = message_count + excluded.message_count
+        ''', zip(user_ids, repeat(guild_id), new_xps, new_levels, new_totals, message_counts))
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+    
+    return list(zip(user_ids, old_levels, new_levels, new_totals))
+
+def reset_guild_xp(guild_id, progress):
+    """Reset every member of a guild in one statement (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        with conn:
+            cursor = conn.execute('''
+                UPDATE user_levels SET xp = 0, level = 0, total_xp = 0, message_count = 0
+                WHERE guild_id = ?
+            ''', (guild_id,))
+        progress['done'] = cursor.rowcount
+    finally:
+        conn.close()
+    return progress['done']
+
+def scale_guild_xp(guild_id, factor, progress, curve):
+    """Multiply every member's XP by factor, recomputing levels chunk by chunk (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE, isolation_level=None)
+    try:
+        progress['total'] = conn.execute('SELECT COUNT(*) FROM user_levels WHERE guild_id = ?', (guild_id,)).fetchone()[0]
+        last_user_id = -1
+        while True:
+            # Read and write each chunk under one write lock so XP awarded in between isn't overwritten
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Keyset pagination over idx_user_levels_guild_user keeps each read cheap
+                chunk = conn.execute('''
+                    SELECT user_id, total_xp FROM user_levels
+                    WHERE guild_id = ? AND user_id > ?
+                    ORDER BY user_id LIMIT ?
+                ''', (guild_id, last_user_id, XP_BULK_CHUNK_SIZE)).fetchall()
+                if chunk:
+                    user_ids = [user_id for user_id, _ in chunk]
+                    total_xps = [max(0, int((total_xp or 0) * factor)) for _, total_xp in chunk]
+                    levels, xps = curve.split_xp(total_xps)
+                    conn.executemany('''
+                        UPDATE user_levels SET xp = ?, level = ?, total_xp = ?
+                        WHERE user_id = ? AND guild_id = ?
+                    ''', zip(xps, levels, total_xps, user_ids, repeat(guild_id)))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            if not chunk:
+                break
+            last_user_id = chunk[-1][0]
+            progress['done'] += len(chunk)
+    finally:
+        conn.close()
+    return progress['done']
+
+def load_rank_index(guild_id):
+    """Build a guild's XP rank index from the database (runs in a worker thread)"""
+    conn = sqlite3.connect(DATABASE_FILE)
+    try:
+        cursor = conn.execute('SELECT user_id, total_xp FROM user_levels WHERE guild_id = ?', (guild_id,))
+        return RankIndex.from_rows(cursor)
+    finally:
+        conn.close()
+
 class LevelingSystem(commands.Cog):
     """Complete XP and leveling system with rank cards and role rewards"""
     
@@ -43,6 +413,36 @@ class LevelingSystem(commands.Cog):
         self.bot = bot
         self.init_leveling_database()
         self.xp_cooldowns = {}
+        self.leveling_configs = {}  # {guild_id: LevelingConfig}
+        self.bulk_jobs = set()  # guild_ids with a bulk XP job running
+        self.level_up_pending = {}  # {guild_id: {user_id: (from_level, to_level)}}
+        self.level_up_workers = {}  # {guild_id: worker task}
+        self.voice_sessions = {}  # {guild_id: {user_id: channel_id}}
+        self.pending_xp_awards = {}  # {guild_id: {user_id: [xp, messages]}} awaiting the next batched write
+        self.xp_flush_lock = asyncio.Lock()
+        self.rank_indexes = {}  # {guild_id: RankIndex}
+        self.rank_index_loads = {}  # {guild_id: in-flight load task}
+        self.rank_index_pending = {}  # {guild_id: {user_id: total_xp}} changes made while loading
+        self.rank_card_pool = None
+        self.rank_card_cache = OrderedDict()  # {(user_id, name, avatar_key, level, total_xp, message_count, rank): png bytes}
+    
+    async def cog_load(self):
+        self.voice_xp_tick.start()
+        self.xp_award_flusher.start()
+        self.rank_card_pool = ProcessPoolExecutor(
+            max_workers=RANK_CARD_WORKERS, mp_context=rank_card_mp_context(), initializer=init_rank_card_worker
+        )
+    
+    async def cog_unload(self):
+        self.voice_xp_tick.cancel()
+        self.xp_award_flusher.cancel()
+        await self.flush_xp_awards()
+        if self.rank_card_pool:
+            self.rank_card_pool.shutdown(wait=False, cancel_futures=True)
+            self.rank_card_pool = None
+        await avatar_cache.close()
+        for worker in self.level_up_workers.values():
+            worker.cancel()
     
     def init_leveling_database(self):
         """Initialize leveling database tables"""
@@ -89,10 +489,18 @@ class LevelingSystem(commands.Cog):
                     no_xp_channels TEXT,
                     no_xp_roles TEXT,
                     double_xp_channels TEXT,
-                    double_xp_roles TEXT
+                    double_xp_roles TEXT,
+                    level_curve TEXT DEFAULT 'classic'
                 )
             ''')
             
+            cursor.execute('PRAGMA table_info(leveling_settings)')
+            if 'level_curve' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE leveling_settings ADD COLUMN level_curve TEXT DEFAULT 'classic'")
+            
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_levels_guild_xp ON user_levels (guild_id, total_xp DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_levels_guild_user ON user_levels (guild_id, user_id)')
+            
             conn.commit()
             conn.close()
             print("✅ Leveling system database initialized")
@@ -100,160 +508,219 @@ class LevelingSystem(commands.Cog):
         except Exception as e:
             print(f"❌ Leveling database initialization failed: {e}")
     
-    def calculate_level(self, total_xp: int) -> int:
+    def calculate_level(self, total_xp: int, curve=None) -> int:
         """Calculate level from total XP"""
-        # Level formula: level = floor(sqrt(total_xp / 100))
-        return int((total_xp / 100) ** 0.5)
+        return (curve or get_level_curve()).level_for_xp(total_xp)
     
-    def xp_for_level(self, level: int) -> int:
+    def xp_for_level(self, level: int, curve=None) -> int:
         """Calculate XP needed for specific level"""
-        return (level ** 2) * 100
+        return (curve or get_level_curve()).xp_for_level(level)
     
-    def xp_for_next_level(self, current_level: int) -> int:
+    def xp_for_next_level(self, current_level: int, curve=None) -> int:
         """Calculate XP needed for next level"""
-        return self.xp_for_level(current_level + 1)
+        return self.xp_for_level(current_level + 1, curve)
+    
+    async def get_leveling_config(self, guild_id: int) -> LevelingConfig:
+        """Get a guild's cached leveling config, loading it on first use"""
+        config = self.leveling_configs.get(guild_id)
+        if config is None:
+            config = await asyncio.to_thread(load_leveling_config, guild_id)
+            self.leveling_configs[guild_id] = config
+        return config
+    
+    def invalidate_leveling_config(self, guild_id: int):
+        """Drop a guild's cached config so the next use reloads it"""
+        self.leveling_configs.pop(guild_id, None)
+    
+    async def get_rank_index(self, guild_id: int) -> RankIndex:
+        """Get a guild's rank index, loading it from the database on first use"""
+        index = self.rank_indexes.get(guild_id)
+        if index:
+            return index
+        
+        load = self.rank_index_loads.get(guild_id)
+        if load is None:
+            self.rank_index_pending[guild_id] = {}
+            load = asyncio.ensure_future(asyncio.to_thread(load_rank_index, guild_id))
+            self.rank_index_loads[guild_id] = load
+        
+        try:
+            index = await load
+        except Exception:
+            self.rank_index_loads.pop(guild_id, None)
+            self.rank_index_pending.pop(guild_id, None)
+            raise
+        
+        if self.rank_index_loads.get(guild_id) is load:
+            # Replay XP changes that raced with the load
+            for user_id, total_xp in self.rank_index_pending.pop(guild_id, {}).items():
+                index.update(user_id, total_xp)
+            self.rank_indexes[guild_id] = index
+            self.rank_index_loads.pop(guild_id, None)
+        return self.rank_indexes.get(guild_id, index)
+    
+    def invalidate_rank_index(self, guild_id: int):
+        """Drop a guild's rank index after bulk changes so the next use rebuilds it"""
+        self.rank_indexes.pop(guild_id, None)
+        self.rank_index_loads.pop(guild_id, None)
+        self.rank_index_pending.pop(guild_id, None)
     
-    def get_user_level_data(self, user_id: int, guild_id: int) -> dict:
+    def note_rank_change(self, guild_id: int, user_id: int, total_xp: int):
+        """Keep a guild's rank index in step with a user's new total XP"""
+        index = self.rank_indexes.get(guild_id)
+        if index:
+            index.update(user_id, total_xp)
+        elif guild_id in self.rank_index_pending:
+            self.rank_index_pending[guild_id][user_id] = total_xp
+    
+    def get_user_level_data(self, user_id: int, guild_id: int, curve=None) -> dict:
         """Get user's level data"""
+        curve = curve or get_level_curve()
         try:
             conn = sqlite3.connect(DATABASE_FILE)
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT xp, level, total_xp, message_count 
+                SELECT total_xp, message_count 
                 FROM user_levels WHERE user_id = ? AND guild_id = ?
             ''', (user_id, guild_id))
             result = cursor.fetchone()
             conn.close()
             
-            if result:
-                xp, level, total_xp, message_count = result
-                return {
-                    'xp': xp,
-                    'level': level,
-                    'total_xp': total_xp,
-                    'message_count': message_count,
-                    'xp_needed': self.xp_for_next_level(level) - total_xp
-                }
-            else:
-                return {'xp': 0, 'level': 0, 'total_xp': 0, 'message_count': 0, 'xp_needed': 100}
-                
+            total_xp, message_count = result or (0, 0)
         except Exception as e:
             print(f"Error getting user level data: {e}")
-            return {'xp': 0, 'level': 0, 'total_xp': 0, 'message_count': 0, 'xp_needed': 100}
+            total_xp, message_count = 0, 0
+        
+        level, level_xp, level_span = curve.progress(total_xp)
+        return {
+            'xp': level_xp,
+            'level': level,
+            'total_xp': total_xp,
+            'message_count': message_count,
+            'xp_needed': level_span - level_xp,
+            'level_span': level_span
+        }
     
-    async def add_xp(self, user_id: int, guild_id: int, xp_amount: int = None) -> bool:
-        """Add XP to user and check for level up"""
+    async def add_xp(self, user_id: int, guild_id: int, xp_amount: int = None, multiplier: int = 1) -> bool:
+        """Queue message XP for the next batched write - returns False while the user is on cooldown"""
+        config = await self.get_leveling_config(guild_id)
+        
         # Check cooldown
         cooldown_key = f"{user_id}_{guild_id}"
         if cooldown_key in self.xp_cooldowns:
             if datetime.now() < self.xp_cooldowns[cooldown_key]:
                 return False
         
-        # Set cooldown (shorter for premium)
-        cooldown_seconds = 30 if (is_premium_user(user_id) or is_premium_guild(guild_id)) else 60
+        # Set cooldown (halved for premium)
+        is_premium = is_premium_user(user_id) or is_premium_guild(guild_id)
+        cooldown_seconds = config.cooldown // 2 if is_premium else config.cooldown
         self.xp_cooldowns[cooldown_key] = datetime.now() + timedelta(seconds=cooldown_seconds)
         
         # Calculate XP gain
         if xp_amount is None:
-            base_xp = random.randint(10, 25)
-            premium_bonus = random.randint(5, 10) if (is_premium_user(user_id) or is_premium_guild(guild_id)) else 0
-            xp_amount = base_xp + premium_bonus
+            base_xp = random.randint(max(1, config.xp_per_message - 5), config.xp_per_message + 10)
+            premium_bonus = random.randint(5, 10) if is_premium else 0
+            xp_amount = (base_xp + premium_bonus) * multiplier
+        
+        # Written by the next batched flush; level-ups are queued from its results
+        pending = self.pending_xp_awards.setdefault(guild_id, {}).setdefault(user_id, [0, 0])
+        pending[0] += xp_amount
+        pending[1] += 1
+        return True
+    
+    async def flush_xp_awards(self):
+        """Write buffered message XP with one write_xp_awards transaction per guild"""
+        async with self.xp_flush_lock:
+            pending, self.pending_xp_awards = self.pending_xp_awards, {}
+            for guild_id, guild_awards in pending.items():
+                awards = {user_id: xp for user_id, (xp, _) in guild_awards.items()}
+                messages = {user_id: count for user_id, (_, count) in guild_awards.items()}
+                try:
+                    config = await self.get_leveling_config(guild_id)
+                    await self.apply_xp_awards(guild_id, awards, config, messages=messages)
+                except Exception as e:
+                    print(f"❌ Failed to save message XP for guild {guild_id}: {e}")
+                    # Fold the awards back in for the next flush, alongside any that arrived meanwhile
+                    retry = self.pending_xp_awards.setdefault(guild_id, {})
+                    for user_id, (xp, count) in guild_awards.items():
+                        queued = retry.setdefault(user_id, [0, 0])
+                        queued[0] += xp
+                        queued[1] += count
+    
+    @tasks.loop(seconds=XP_AWARD_FLUSH_INTERVAL)
+    async def xp_award_flusher(self):
+        await self.flush_xp_awards()
+    
+    async def apply_xp_awards(self, guild_id: int, awards: dict, config: LevelingConfig, messages=0) -> list:
+        """Write a batch of {user_id: xp} awards for one guild and queue any level-ups"""
+        results = await asyncio.to_thread(write_xp_awards, guild_id, awards, config.curve, messages)
+        
+        leveled_up = []
+        for user_id, old_level, new_level, new_total_xp in results:
+            self.note_rank_change(guild_id, user_id, new_total_xp)
+            if new_level > old_level:
+                self.queue_level_up(guild_id, user_id, old_level, new_level)
+                leveled_up.append(user_id)
+        return leveled_up
+    
+    def queue_level_up(self, guild_id: int, user_id: int, from_level: int, to_level: int):
+        """Queue level-up effects without waiting on Discord, merging repeat level-ups of the same user"""
+        pending = self.level_up_pending.setdefault(guild_id, {})
+        if user_id in pending:
+            queued_from, queued_to = pending[user_id]
+            pending[user_id] = (min(queued_from, from_level), max(queued_to, to_level))
+        else:
+            pending[user_id] = (from_level, to_level)
         
+        worker = self.level_up_workers.get(guild_id)
+        if worker is None or worker.done():
+            self.level_up_workers[guild_id] = asyncio.create_task(self.process_level_ups(guild_id))
+    
+    async def process_level_ups(self, guild_id: int):
+        """Drain a guild's level-up queue, pacing announcements"""
+        pending = self.level_up_pending.get(guild_id, {})
         try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            
-            # Get current data
-            cursor.execute('''
-                SELECT xp, level, total_xp FROM user_levels 
-                WHERE user_id = ? AND guild_id = ?
-            ''', (user_id, guild_id))
-            result = cursor.fetchone()
-            
-            if result:
-                current_xp, current_level, total_xp = result
-                new_total_xp = total_xp + xp_amount
-                new_level = self.calculate_level(new_total_xp)
-                new_xp = new_total_xp - self.xp_for_level(new_level)
-                
-                cursor.execute('''
-                    UPDATE user_levels 
-                    SET xp = ?, level = ?, total_xp = ?, last_message = datetime('now'),
-                        message_count = message_count + 1
-                    WHERE user_id = ? AND guild_id = ?
-                ''', (new_xp, new_level, new_total_xp, user_id, guild_id))
-            else:
-                # Create new user
-                new_level = self.calculate_level(xp_amount)
-                new_xp = xp_amount - self.xp_for_level(new_level)
-                
-                cursor.execute('''
-                    INSERT INTO user_levels (user_id, guild_id, xp, level, total_xp, last_message, message_count)
-                    VALUES (?, ?, ?, ?, ?, datetime('now'), 1)
-                ''', (user_id, guild_id, new_xp, new_level, xp_amount))
-                
-                current_level = 0
-            
-            conn.commit()
-            conn.close()
-            
-            # Check for level up
-            if new_level > current_level:
-                await self.handle_level_up(user_id, guild_id, new_level)
-                return True
-            
-            return False
-            
-        except Exception as e:
-            print(f"Error adding XP: {e}")
-            return False
+            while pending:
+                user_id = next(iter(pending))
+                from_level, to_level = pending.pop(user_id)
+                if await self.handle_level_up(user_id, guild_id, to_level, from_level):
+                    await asyncio.sleep(LEVEL_UP_ANNOUNCE_INTERVAL)
+        finally:
+            if not pending:
+                self.level_up_pending.pop(guild_id, None)
+            self.level_up_workers.pop(guild_id, None)
     
-    async def handle_level_up(self, user_id: int, guild_id: int, new_level: int):
-        """Handle level up event"""
+    async def handle_level_up(self, user_id: int, guild_id: int, new_level: int, from_level: int = None) -> bool:
+        """Handle level up event - returns True if an announcement was sent"""
         try:
             guild = self.bot.get_guild(guild_id)
             user = guild.get_member(user_id) if guild else None
             
             if not guild or not user:
-                return
+                return False
             
-            # Check for level rewards
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT role_id FROM level_rewards 
-                WHERE guild_id = ? AND level = ? AND active = 1
-            ''', (guild_id, new_level))
-            rewards = cursor.fetchall()
+            config = await self.get_leveling_config(guild_id)
             
-            # Get leveling settings
-            cursor.execute('''
-                SELECT level_up_message, level_up_channel 
-                FROM leveling_settings WHERE guild_id = ?
-            ''', (guild_id,))
-            settings = cursor.fetchone()
-            conn.close()
+            # Collect role rewards for every level gained and apply them in one member edit
+            from_level = new_level - 1 if from_level is None else from_level
+            roles = []
+            for level in range(from_level + 1, new_level + 1):
+                for role_id in config.rewards.get(level, []):
+                    role = guild.get_role(role_id)
+                    if role and role not in user.roles and role not in roles:
+                        roles.append(role)
             
-            # Apply role rewards
             roles_given = []
-            for (role_id,) in rewards:
-                role = guild.get_role(role_id)
-                if role and role not in user.roles:
-                    try:
-                        await user.add_roles(role, reason=f"Level {new_level} reward")
-                        roles_given.append(role.name)
-                    except:
-                        pass
+            if roles:
+                try:
+                    await user.add_roles(*roles, reason=f"Level {new_level} reward", atomic=False)
+                    roles_given = [role.name for role in roles]
+                except discord.HTTPException:
+                    pass
             
             # Send level up message
-            if settings:
-                message_template = settings[0] or "Congratulations {user}! You reached level {level}!"
-                channel_id = settings[1]
-            else:
-                message_template = "Congratulations {user}! You reached level {level}!"
-                channel_id = None
-            
-            message = message_template.format(user=user.mention, level=new_level)
+            message = config.level_up_message.format(user=user.mention, level=new_level)
+            channel_id = config.level_up_channel
             
             embed = create_success_embed(
                 "🎉 Level Up!",
@@ -292,11 +759,14 @@ class LevelingSystem(commands.Cog):
             if channel:
                 try:
                     await channel.send(embed=embed)
+                    return True
                 except:
                     pass
+            return False
                 
         except Exception as e:
             print(f"Error handling level up: {e}")
+            return False
     
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -304,39 +774,102 @@ class LevelingSystem(commands.Cog):
         if message.author.bot or not message.guild:
             return
         
-        # Check if leveling is enabled
+        # Check if leveling is enabled and this message earns XP
         try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('SELECT enabled FROM leveling_settings WHERE guild_id = ?', (message.guild.id,))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result and not result[0]:
-                return
-        except:
-            pass
+            config = await self.get_leveling_config(message.guild.id)
+        except Exception as e:
+            print(f"Error loading leveling config: {e}")
+            return
+        
+        if not config.enabled:
+            return
+        
+        multiplier = config.xp_multiplier(message.author, message.channel)
+        if not multiplier:
+            return
         
         # Add XP
-        await self.add_xp(message.author.id, message.guild.id)
+        await self.add_xp(message.author.id, message.guild.id, multiplier=multiplier)
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Track who is in voice - XP itself is awarded by voice_xp_tick"""
+        if member.bot:
+            return
+        
+        sessions = self.voice_sessions.setdefault(member.guild.id, {})
+        if after.channel:
+            sessions[member.id] = after.channel.id
+        else:
+            sessions.pop(member.id, None)
+            if not sessions:
+                del self.voice_sessions[member.guild.id]
+    
+    @tasks.loop(seconds=VOICE_XP_INTERVAL)
+    async def voice_xp_tick(self):
+        """Award voice XP to every active voice member, one batched write per guild"""
+        for guild_id, sessions in list(self.voice_sessions.items()):
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                self.voice_sessions.pop(guild_id, None)
+                continue
+            
+            try:
+                config = await self.get_leveling_config(guild_id)
+                if not config.enabled:
+                    continue
+                
+                awards = {}
+                listeners = {}  # {channel_id: humans in channel}
+                for user_id in list(sessions):
+                    member = guild.get_member(user_id)
+                    voice = member.voice if member else None
+                    if not voice or not voice.channel:
+                        sessions.pop(user_id, None)
+                        continue
+                    
+                    channel = voice.channel
+                    if channel == guild.afk_channel or voice.self_mute or voice.self_deaf or voice.mute or voice.deaf:
+                        continue
+                    
+                    # Talking to nobody doesn't count
+                    if channel.id not in listeners:
+                        listeners[channel.id] = sum(1 for m in channel.members if not m.bot)
+                    if listeners[channel.id] < 2:
+                        continue
+                    
+                    multiplier = config.xp_multiplier(member, channel)
+                    if multiplier:
+                        awards[user_id] = VOICE_XP_PER_TICK * multiplier
+                
+                if awards:
+                    await self.apply_xp_awards(guild_id, awards, config)
+                    
+            except Exception as e:
+                print(f"Error awarding voice XP: {e}")
+    
+    @voice_xp_tick.before_loop
+    async def before_voice_xp_tick(self):
+        """Pick up members already in voice when the bot starts"""
+        await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels + guild.stage_channels:
+                for member in channel.members:
+                    if not member.bot:
+                        self.voice_sessions.setdefault(guild.id, {})[member.id] = channel.id
     
     @discord.app_commands.command(name="rank", description="📊 Check your or someone's rank")
     @discord.app_commands.describe(user="User to check rank for")
     async def rank(self, interaction: discord.Interaction, user: discord.Member = None):
         """Show user rank with card"""
         target_user = user or interaction.user
-        level_data = self.get_user_level_data(target_user.id, interaction.guild.id)
+        config = await self.get_leveling_config(interaction.guild.id)
+        level_data = self.get_user_level_data(target_user.id, interaction.guild.id, config.curve)
         
         # Get user's rank
         try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT COUNT(*) + 1 FROM user_levels 
-                WHERE guild_id = ? AND total_xp > ?
-            ''', (interaction.guild.id, level_data['total_xp']))
-            rank = cursor.fetchone()[0]
-            conn.close()
+            rank_index = await self.get_rank_index(interaction.guild.id)
+            rank = rank_index.rank(level_data['total_xp'])
         except:
             rank = 1
         
@@ -363,66 +896,32 @@ class LevelingSystem(commands.Cog):
             await interaction.response.send_message(embed=embed)
     
     async def create_rank_card(self, user: discord.Member, level_data: dict, rank: int) -> io.BytesIO:
-        """Create a visual rank card"""
+        """Create a visual rank card without blocking the event loop"""
         try:
-            # Create image
-            width, height = 800, 200
-            img = Image.new('RGB', (width, height), color=(47, 49, 54))
-            draw = ImageDraw.Draw(img)
+            level = level_data['level']
+            # Every value drawn on the card is part of the key, so a cached card is never stale
+            cache_key = (user.id, user.display_name, user.display_avatar.key, level, level_data['total_xp'], level_data['message_count'], rank)
+            card = self.rank_card_cache.get(cache_key)
             
-            # Try to load fonts (fallback to default if not available)
-            try:
-                title_font = ImageFont.truetype("arial.ttf", 24)
-                text_font = ImageFont.truetype("arial.ttf", 18)
-                small_font = ImageFont.truetype("arial.ttf", 14)
-            except:
-                title_font = ImageFont.load_default()
-                text_font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-            
-            # Colors
-            bg_color = (54, 57, 63)
-            accent_color = (114, 137, 218)
-            text_color = (255, 255, 255)
-            
-            # Draw background
-            draw.rectangle([10, 10, width-10, height-10], fill=bg_color, outline=accent_color, width=2)
-            
-            # User info
-            draw.text((20, 20), f"{user.display_name}", font=title_font, fill=text_color)
-            draw.text((20, 50), f"Rank #{rank} • Level {level_data['level']}", font=text_font, fill=accent_color)
-            
-            # XP Progress bar
-            bar_width = 400
-            bar_height = 20
-            bar_x = 20
-            bar_y = 80
-            
-            # Background bar
-            draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height], fill=(32, 34, 37), outline=accent_color)
-            
-            # Progress bar
-            current_level_xp = level_data['total_xp'] - self.xp_for_level(level_data['level'])
-            next_level_xp = self.xp_for_next_level(level_data['level']) - self.xp_for_level(level_data['level'])
-            progress = current_level_xp / next_level_xp if next_level_xp > 0 else 1
-            progress_width = int(bar_width * progress)
-            
-            if progress_width > 0:
-                draw.rectangle([bar_x, bar_y, bar_x + progress_width, bar_y + bar_height], fill=accent_color)
-            
-            # XP text
-            draw.text((bar_x, bar_y + 25), f"{current_level_xp:,} / {next_level_xp:,} XP", font=small_font, fill=text_color)
-            
-            # Statistics
-            draw.text((20, 120), f"Total XP: {level_data['total_xp']:,}", font=text_font, fill=text_color)
-            draw.text((20, 145), f"Messages: {level_data['message_count']:,}", font=text_font, fill=text_color)
-            
-            # Save to bytes
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            
-            return img_bytes
+            if card is None:
+                current_level_xp = level_data['xp']
+                next_level_xp = level_data['level_span']
+                
+                avatar = await avatar_cache.get(user)
+                
+                card = await asyncio.get_running_loop().run_in_executor(
+                    self.rank_card_pool, render_rank_card,
+                    user.display_name, rank, level, level_data['total_xp'], level_data['message_count'],
+                    current_level_xp, next_level_xp, avatar
+                )
+                
+                self.rank_card_cache[cache_key] = card
+                if len(self.rank_card_cache) > RANK_CARD_CACHE_SIZE:
+                    self.rank_card_cache.popitem(last=False)
+            else:
+                self.rank_card_cache.move_to_end(cache_key)
+            
+            return io.BytesIO(card)
             
         except Exception as e:
             print(f"Error creating rank card: {e}")
@@ -436,20 +935,26 @@ class LevelingSystem(commands.Cog):
         offset = (page - 1) * 10
         
         try:
-            conn = sqlite3.connect(DATABASE_FILE)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, level, total_xp, message_count 
-                FROM user_levels WHERE guild_id = ? 
-                ORDER BY total_xp DESC 
-                LIMIT 10 OFFSET ?
-            ''', (interaction.guild.id, offset))
-            results = cursor.fetchall()
-            
-            # Get total users
-            cursor.execute('SELECT COUNT(*) FROM user_levels WHERE guild_id = ?', (interaction.guild.id,))
-            total_users = cursor.fetchone()[0]
-            conn.close()
+            rank_index = await self.get_rank_index(interaction.guild.id)
+            total_users = len(rank_index)
+            results = []
+            
+            if offset < total_users:
+                # Resolve the page to an XP range, then read just that slice through the index
+                high_xp = rank_index.score_at(offset + 1)
+                low_xp = rank_index.score_at(min(offset + 10, total_users))
+                skip = offset - rank_index.count_above(high_xp)
+                
+                conn = sqlite3.connect(DATABASE_FILE)
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT user_id, level, total_xp, message_count 
+                    FROM user_levels WHERE guild_id = ? AND total_xp BETWEEN ? AND ?
+                    ORDER BY total_xp DESC, user_id
+                    LIMIT 10 OFFSET ?
+                ''', (interaction.guild.id, low_xp, high_xp, skip))
+                results = cursor.fetchall()
+                conn.close()
             
             if not results:
                 embed = create_embed(
@@ -527,6 +1032,111 @@ class LevelingSystem(commands.Cog):
             
             await self.execute_level_admin_action(interaction, action.value, user, amount)
     
+    @discord.app_commands.command(name="level_bulk", description="📦 [ADMIN] Import or bulk-edit server XP")
+    @discord.app_commands.describe(
+        action="Bulk action to perform",
+        file="CSV or JSON export to import (user_id, xp, messages)",
+        factor="XP multiplier for Multiply, or percent to remove for Decay"
+    )
+    @discord.app_commands.choices(action=[
+        discord.app_commands.Choice(name="📥 Import XP", value="import"),
+        discord.app_commands.Choice(name="🔄 Reset Everyone", value="reset"),
+        discord.app_commands.Choice(name="✖️ Multiply XP", value="multiply"),
+        discord.app_commands.Choice(name="📉 Decay XP", value="decay")
+    ])
+    async def level_bulk(self, interaction: discord.Interaction,
+                         action: discord.app_commands.Choice[str],
+                         file: discord.Attachment = None,
+                         factor: float = None):
+        """Bulk leveling administration"""
+        
+        if not interaction.user.guild_permissions.manage_guild:
+            embed = create_error_embed("Permission Denied", "You need `Manage Server` permission to use admin commands.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        guild_id = interaction.guild.id
+        if guild_id in self.bulk_jobs:
+            embed = create_error_embed("Job Running", "A bulk XP job is already running for this server.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        if action.value == "import":
+            if not file or not file.filename.lower().endswith(('.csv', '.json')):
+                embed = create_error_embed("File Required", "Please attach a `.csv` or `.json` export to import.")
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            if file.size > XP_IMPORT_MAX_BYTES:
+                embed = create_error_embed("File Too Large", f"Imports are limited to {XP_IMPORT_MAX_BYTES // (1024 * 1024)} MB.")
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+        elif action.value == "multiply" and (factor is None or factor < 0):
+            embed = create_error_embed("Factor Required", "Please specify a non-negative multiplier.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        elif action.value == "decay" and (factor is None or not 0 < factor <= 100):
+            embed = create_error_embed("Factor Required", "Please specify a decay percent between 0 and 100.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        self.bulk_jobs.add(guild_id)
+        try:
+            embed = create_embed(f"{action.name}", "⏳ **Starting...**", COLORS['info'])
+            await interaction.response.send_message(embed=embed)
+            
+            progress = {'done': 0, 'total': None}
+            curve = (await self.get_leveling_config(guild_id)).curve
+            if action.value == "import":
+                data = await file.read()
+                job = asyncio.to_thread(import_guild_xp, guild_id, iter_xp_import_rows(data, file.filename), progress, curve)
+            elif action.value == "reset":
+                job = asyncio.to_thread(reset_guild_xp, guild_id, progress)
+            elif action.value == "multiply":
+                job = asyncio.to_thread(scale_guild_xp, guild_id, factor, progress, curve)
+            else:
+                job = asyncio.to_thread(scale_guild_xp, guild_id, 1 - factor / 100, progress, curve)
+            
+            await self.run_bulk_job(interaction, action.name, job, progress)
+            
+            self.invalidate_rank_index(guild_id)
+            self.rank_card_cache.clear()
+            
+        except Exception as e:
+            embed = create_error_embed("Bulk Action Failed", f"Could not complete action: {str(e)}")
+            await interaction.edit_original_response(embed=embed)
+        finally:
+            self.bulk_jobs.discard(guild_id)
+    
+    async def run_bulk_job(self, interaction: discord.Interaction, title: str, job, progress) -> int:
+        """Run a bulk XP job, editing the response with progress and final throughput"""
+        started = time.perf_counter()
+        task = asyncio.ensure_future(job)
+        
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=XP_BULK_PROGRESS_INTERVAL)
+            if done:
+                break
+            
+            status = f"⏳ **{progress['done']:,}** members processed"
+            if progress['total']:
+                status += f" of **{progress['total']:,}** ({progress['done'] * 100 // progress['total']}%)"
+            try:
+                await interaction.edit_original_response(embed=create_embed(title, status, COLORS['info']))
+            except discord.HTTPException:
+                pass
+        
+        rows = task.result()
+        elapsed = time.perf_counter() - started
+        
+        embed = create_success_embed(title, f"✅ Updated **{rows:,}** members", interaction.user)
+        embed.add_field(
+            name="⚡ Throughput",
+            value=f"{elapsed:.1f}s • {rows / elapsed if elapsed else 0:,.0f} members/s",
+            inline=True
+        )
+        await interaction.edit_original_response(embed=embed)
+        return rows
+    
     async def show_leveling_config(self, interaction: discord.Interaction):
         """Show leveling configuration interface"""
         view = LevelingConfigView(interaction.user.id, interaction.guild.id)
@@ -539,7 +1149,7 @@ class LevelingSystem(commands.Cog):
         
         embed.add_field(
             name="🎯 Configuration Options",
-            value="• **Toggle System** - Enable/disable leveling\n• **XP Settings** - Amount and cooldowns\n• **Level Rewards** - Roles for reaching levels\n• **Channels** - Where level up messages are sent",
+            value="• **Toggle System** - Enable/disable leveling\n• **XP Settings** - Amount and cooldowns\n• **Level Rewards** - Roles for reaching levels\n• **Level Curve** - How much XP each level takes\n• **Channels** - Where level up messages are sent",
             inline=False
         )
         
@@ -548,15 +1158,22 @@ class LevelingSystem(commands.Cog):
     async def execute_level_admin_action(self, interaction: discord.Interaction, action: str, user: discord.Member, amount: int = None):
         """Execute admin level actions"""
         try:
+            curve = (await self.get_leveling_config(interaction.guild.id)).curve
+            
             conn = sqlite3.connect(DATABASE_FILE)
             cursor = conn.cursor()
             
+            cursor.execute('SELECT total_xp FROM user_levels WHERE user_id = ? AND guild_id = ?', (user.id, interaction.guild.id))
+            result = cursor.fetchone()
+            current_total_xp = result[0] if result else 0
+            
             if action == "add_xp":
+                new_level, new_xp, _ = curve.progress(current_total_xp + amount)
                 cursor.execute('''
                     UPDATE user_levels 
-                    SET total_xp = total_xp + ?, level = ?, xp = total_xp - ?
+                    SET total_xp = ?, level = ?, xp = ?
                     WHERE user_id = ? AND guild_id = ?
-                ''', (amount, self.calculate_level(amount), self.xp_for_level(self.calculate_level(amount)), user.id, interaction.guild.id))
+                ''', (current_total_xp + amount, new_level, new_xp, user.id, interaction.guild.id))
                 
                 embed = create_success_embed(
                     "✅ XP Added",
@@ -565,11 +1182,13 @@ class LevelingSystem(commands.Cog):
                 )
                 
             elif action == "remove_xp":
+                new_total_xp = max(0, current_total_xp - amount)
+                new_level, new_xp, _ = curve.progress(new_total_xp)
                 cursor.execute('''
                     UPDATE user_levels 
-                    SET total_xp = MAX(0, total_xp - ?), level = ?, xp = MAX(0, total_xp - ?)
+                    SET total_xp = ?, level = ?, xp = ?
                     WHERE user_id = ? AND guild_id = ?
-                ''', (amount, self.calculate_level(max(0, amount)), self.xp_for_level(self.calculate_level(max(0, amount))), user.id, interaction.guild.id))
+                ''', (new_total_xp, new_level, new_xp, user.id, interaction.guild.id))
                 
                 embed = create_success_embed(
                     "✅ XP Removed",
@@ -578,7 +1197,7 @@ class LevelingSystem(commands.Cog):
                 )
                 
             elif action == "set_level":
-                new_total_xp = self.xp_for_level(amount)
+                new_total_xp = curve.xp_for_level(amount)
                 cursor.execute('''
                     UPDATE user_levels 
                     SET level = ?, total_xp = ?, xp = 0
@@ -604,9 +1223,15 @@ class LevelingSystem(commands.Cog):
                     interaction.user
                 )
             
+            cursor.execute('SELECT total_xp FROM user_levels WHERE user_id = ? AND guild_id = ?', (user.id, interaction.guild.id))
+            result = cursor.fetchone()
+            
             conn.commit()
             conn.close()
             
+            if result:
+                self.note_rank_change(interaction.guild.id, user.id, result[0])
+            
             await interaction.response.send_message(embed=embed)
             
         except Exception as e:
@@ -645,6 +1270,10 @@ class LevelingConfigView(discord.ui.View):
             conn.commit()
             conn.close()
             
+            cog = interaction.client.get_cog('LevelingSystem')
+            if cog:
+                cog.invalidate_leveling_config(self.guild_id)
+            
             embed = create_success_embed(
                 "✅ Leveling System Updated",
                 f"Leveling system is now **{'Enabled' if new_status else 'Disabled'}**",
@@ -666,6 +1295,70 @@ class LevelingConfigView(discord.ui.View):
         # Show level rewards management
         modal = LevelRewardModal(self.guild_id)
         await interaction.response.send_modal(modal)
+    
+    @discord.ui.button(label="📐 Level Curve", style=discord.ButtonStyle.secondary, emoji="📐")
+    async def level_curve(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ Only the command user can configure this.", ephemeral=True)
+            return
+        
+        view = LevelCurveView(self.user_id, self.guild_id)
+        await interaction.response.send_message("📐 **Select how much XP each level takes**", view=view, ephemeral=True)
+
+class LevelCurveView(discord.ui.View):
+    """Pick a guild's level curve and recompute stored levels"""
+    
+    def __init__(self, user_id: int, guild_id: int):
+        super().__init__(timeout=120)
+        self.user_id = user_id
+        self.guild_id = guild_id
+        
+        self.curve_select = discord.ui.Select(
+            placeholder="Choose a level curve...",
+            options=[discord.SelectOption(label=curve.label, value=name) for name, curve in LEVEL_CURVES.items()]
+        )
+        self.curve_select.callback = self.curve_selected
+        self.add_item(self.curve_select)
+    
+    async def curve_selected(self, interaction: discord.Interaction):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ Only the command user can configure this.", ephemeral=True)
+            return
+        
+        cog = interaction.client.get_cog('LevelingSystem')
+        if not cog or self.guild_id in cog.bulk_jobs:
+            embed = create_error_embed("Job Running", "A bulk XP job is already running for this server.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        curve = get_level_curve(self.curve_select.values[0])
+        cog.bulk_jobs.add(self.guild_id)
+        try:
+            conn = sqlite3.connect(DATABASE_FILE)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO leveling_settings (guild_id, level_curve) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET level_curve = excluded.level_curve
+            ''', (self.guild_id, curve.name))
+            conn.commit()
+            conn.close()
+            
+            cog.invalidate_leveling_config(self.guild_id)
+            
+            # Stored levels follow the new curve; total XP and ranks are unchanged
+            title = f"📐 Level Curve: {curve.label}"
+            await interaction.response.send_message(embed=create_embed(title, "⏳ **Recomputing levels...**", COLORS['info']), ephemeral=True)
+            progress = {'done': 0, 'total': None}
+            await cog.run_bulk_job(interaction, title, asyncio.to_thread(scale_guild_xp, self.guild_id, 1, progress, curve), progress)
+            
+        except Exception as e:
+            embed = create_error_embed("Configuration Error", f"Could not update level curve: {str(e)}")
+            if interaction.response.is_done():
+                await interaction.edit_original_response(embed=embed)
+            else:
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+        finally:
+            cog.bulk_jobs.discard(self.guild_id)
 
 class LevelRewardModal(discord.ui.Modal):
     """Modal for adding level rewards"""
@@ -715,6 +1408,10 @@ class LevelRewardModal(discord.ui.Modal):
             conn.commit()
             conn.close()
             
+            cog = interaction.client.get_cog('LevelingSystem')
+            if cog:
+                cog.invalidate_leveling_config(self.guild_id)
+            
             embed = create_success_embed(
                 "🎁 Level Reward Added",
                 f"Users will now receive **{role.name}** role when they reach **Level {level}**!",
@@ -17,7 +17,10 @@ import pickle
 import traceback
 import io
 import sqlite3
+from collections import deque
 import config
+from cogs.restore_engine import RestoreEngine
+from cogs.anti_nuke import ActionWindow, ACTION_RESET_TIME, ACTION_RING_SIZE, contain_anti_nuke_threat, trim_backup_checkpoints
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -97,12 +100,80 @@ def init_db():
         )
     ''')
 
+    # Reaction roles
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reaction_roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            message_id INTEGER,
+            emoji TEXT,
+            role_id INTEGER,
+            UNIQUE(message_id, emoji)
+        )
+    ''')
+
+    # Tables created before the UNIQUE constraint need an index for INSERT OR REPLACE - keep the newest duplicate
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_reaction_roles_message_emoji'")
+    if not cursor.fetchone():
+        cursor.execute('DELETE FROM reaction_roles WHERE rowid NOT IN (SELECT MAX(rowid) FROM reaction_roles GROUP BY message_id, emoji)')
+        cursor.execute('CREATE UNIQUE INDEX idx_reaction_roles_message_emoji ON reaction_roles (message_id, emoji)')
+
+    # Anti-nuke state
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS anti_nuke_settings (
+            guild_id INTEGER PRIMARY KEY,
+            settings TEXT NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS anti_nuke_raid_alerts (
+            guild_id INTEGER PRIMARY KEY,
+            last_alert REAL DEFAULT 0,
+            alert_count INTEGER DEFAULT 0
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS anti_nuke_user_actions (
+            guild_id INTEGER,
+            user_id INTEGER,
+            action_type TEXT,
+            timestamps TEXT,
+            PRIMARY KEY (guild_id, user_id, action_type)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS server_backups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            name TEXT,
+            timestamp INTEGER,
+            checkpoint_at REAL,
+            full INTEGER DEFAULT 1,
+            data TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS server_backup_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            timestamp REAL,
+            kind TEXT,
+            op TEXT,
+            object_id INTEGER,
+            data TEXT
+        )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_server_backups_guild ON server_backups (guild_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_server_backup_changes_guild ON server_backup_changes (guild_id, timestamp)')
+
     conn.commit()
     conn.close()
 
-# Initialize database on startup
-init_db()
-
 # Bot Configuration
 TOKEN = config.token
 BOT_OWNER_ID = 1209807688435892285
@@ -128,8 +199,9 @@ def get_prefix(bot, message):
         return "!"  # Fallback
 
 # Bot Setup
+MESSAGE_CACHE_SIZE = 100  # Reaction features (including confirmations) use raw events, so only a small message cache is needed
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix=get_prefix, intents=intents)
+bot = commands.Bot(command_prefix=get_prefix, intents=intents, max_messages=MESSAGE_CACHE_SIZE)
 
 @bot.event
 async def on_ready():
@@ -172,12 +244,16 @@ async def on_guild_channel_delete(channel):
     if not hasattr(channel, 'guild') or not channel.guild:
         return
     
+    record_channel_backup_change(channel, 'delete')
+    invalidate_log_channel_cache(channel)
+    
+    if not is_anti_nuke_enabled(channel.guild.id):
+        return
+    
     try:
-        async for entry in channel.guild.audit_logs(action=discord.AuditLogAction.channel_delete, limit=1):
-            if entry.target.id == channel.id:
-                if await increment_user_action(channel.guild.id, entry.user.id, 'channel_delete', channel.guild):
-                    await trigger_anti_nuke(channel.guild, entry.user, 'Mass Channel Deletion')
-                break
+        entry = await resolve_audit_log_entry(channel.guild, discord.AuditLogAction.channel_delete, channel.id)
+        if entry and await increment_user_action(channel.guild.id, entry.user.id, 'channel_delete', channel.guild):
+            await trigger_anti_nuke(channel.guild, entry.user, 'Mass Channel Deletion')
     except:
         pass
 
@@ -186,61 +262,88 @@ async def on_guild_channel_create(channel):
     """Handle channel creation for anti-nuke protection"""
     if not hasattr(channel, 'guild') or not channel.guild:
         return
+    
+    record_channel_backup_change(channel, 'upsert')
+    invalidate_log_channel_cache(channel)
         
+    if not is_anti_nuke_enabled(channel.guild.id):
+        return
+    
     try:
-        async for entry in channel.guild.audit_logs(action=discord.AuditLogAction.channel_create, limit=1):
-            if entry.target.id == channel.id:
-                if await increment_user_action(channel.guild.id, entry.user.id, 'channel_create', channel.guild):
-                    await trigger_anti_nuke(channel.guild, entry.user, 'Mass Channel Creation')
-                break
+        entry = await resolve_audit_log_entry(channel.guild, discord.AuditLogAction.channel_create, channel.id)
+        if entry and await increment_user_action(channel.guild.id, entry.user.id, 'channel_create', channel.guild):
+            await trigger_anti_nuke(channel.guild, entry.user, 'Mass Channel Creation')
     except:
         pass
 
 @bot.event
 async def on_guild_role_delete(role):
     """Handle role deletion for anti-nuke protection"""
+    record_role_backup_change(role, 'delete')
+    
+    if not is_anti_nuke_enabled(role.guild.id):
+        return
+    
     try:
-        async for entry in role.guild.audit_logs(action=discord.AuditLogAction.role_delete, limit=1):
-            if entry.target.id == role.id:
-                if await increment_user_action(role.guild.id, entry.user.id, 'role_delete', role.guild):
-                    await trigger_anti_nuke(role.guild, entry.user, 'Mass Role Deletion')
-                break
+        entry = await resolve_audit_log_entry(role.guild, discord.AuditLogAction.role_delete, role.id)
+        if entry and await increment_user_action(role.guild.id, entry.user.id, 'role_delete', role.guild):
+            await trigger_anti_nuke(role.guild, entry.user, 'Mass Role Deletion')
     except:
         pass
 
 @bot.event
 async def on_guild_role_create(role):
     """Handle role creation for anti-nuke protection"""
+    record_role_backup_change(role, 'upsert')
+    
+    if not is_anti_nuke_enabled(role.guild.id):
+        return
+    
     try:
-        async for entry in role.guild.audit_logs(action=discord.AuditLogAction.role_create, limit=1):
-            if entry.target.id == role.id:
-                if await increment_user_action(role.guild.id, entry.user.id, 'role_create', role.guild):
-                    await trigger_anti_nuke(role.guild, entry.user, 'Mass Role Creation')
-                break
+        entry = await resolve_audit_log_entry(role.guild, discord.AuditLogAction.role_create, role.id)
+        if entry and await increment_user_action(role.guild.id, entry.user.id, 'role_create', role.guild):
+            await trigger_anti_nuke(role.guild, entry.user, 'Mass Role Creation')
     except:
         pass
 
+@bot.event
+async def on_guild_channel_update(before, after):
+    """Track channel edits and overwrite changes for incremental backups"""
+    if not hasattr(after, 'guild') or not after.guild:
+        return
+    
+    record_channel_backup_change(after, 'upsert')
+    if before.name != after.name:
+        invalidate_log_channel_cache(after)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    """Track role edits for incremental backups"""
+    record_role_backup_change(after, 'upsert')
+
 @bot.event
 async def on_member_ban(guild, user):
     """Handle member bans for anti-nuke protection"""
+    if not is_anti_nuke_enabled(guild.id):
+        return
+    
     try:
-        async for entry in guild.audit_logs(action=discord.AuditLogAction.ban, limit=1):
-            if entry.target.id == user.id:
-                if await increment_user_action(guild.id, entry.user.id, 'member_ban', guild):
-                    await trigger_anti_nuke(guild, entry.user, 'Mass Banning')
-                break
+        entry = await resolve_audit_log_entry(guild, discord.AuditLogAction.ban, user.id)
+        if entry and await increment_user_action(guild.id, entry.user.id, 'member_ban', guild):
+            await trigger_anti_nuke(guild, entry.user, 'Mass Banning')
     except:
         pass
 
 @bot.event
 async def on_member_kick(guild, user):
     """Handle member kicks for anti-nuke protection"""
+    if not is_anti_nuke_enabled(guild.id):
+        return
+    
     try:
-        async for entry in guild.audit_logs(action=discord.AuditLogAction.kick, limit=1):
-            if entry.target.id == user.id:
-                if await increment_user_action(guild.id, entry.user.id, 'member_kick', guild):
-                    await trigger_anti_nuke(guild, entry.user, 'Mass Kicking')
-                break
+        entry = await resolve_audit_log_entry(guild, discord.AuditLogAction.kick, user.id)
+        if entry and await increment_user_action(guild.id, entry.user.id, 'member_kick', guild):
+            await trigger_anti_nuke(guild, entry.user, 'Mass Kicking')
     except:
         pass
 
@@ -250,11 +353,15 @@ async def on_webhooks_update(channel):
     if not hasattr(channel, 'guild') or not channel.guild:
         return
         
+    if not is_anti_nuke_enabled(channel.guild.id):
+        return
+        
     try:
-        async for entry in channel.guild.audit_logs(action=discord.AuditLogAction.webhook_create, limit=1):
-            if await increment_user_action(channel.guild.id, entry.user.id, 'webhook_create', channel.guild):
-                await trigger_anti_nuke(channel.guild, entry.user, 'Mass Webhook Creation')
-            break
+        # The event doesn't say what changed, so claim the channel's oldest unclaimed webhook entry of any kind
+        entry = await resolve_audit_log_entry(channel.guild, tuple(WEBHOOK_AUDIT_ACTIONS), channel_id=channel.id)
+        action_type = WEBHOOK_AUDIT_ACTIONS.get(entry.action) if entry else None
+        if action_type and await increment_user_action(channel.guild.id, entry.user.id, action_type, channel.guild):
+            await trigger_anti_nuke(channel.guild, entry.user, 'Mass Webhook Creation' if action_type == 'webhook_create' else 'Mass Webhook Deletion')
     except:
         pass
 
@@ -817,16 +924,16 @@ async def confirm_dangerous_action(interaction: discord.Interaction, action_name
     await message.add_reaction("✅")
     await message.add_reaction("❌")
 
-    def check(reaction, user):
-        return (user == interaction.user and
-                str(reaction.emoji) in ["✅", "❌"] and
-                reaction.message.id == message.id)
+    def check(payload):
+        return (payload.user_id == interaction.user.id and
+                str(payload.emoji) in ["✅", "❌"] and
+                payload.message_id == message.id)
 
     try:
-        # Wait for user reaction with timeout
-        reaction, user = await bot.wait_for('reaction_add', timeout=timeout, check=check)
+        # Raw events fire even after the message leaves the small message cache
+        payload = await bot.wait_for('raw_reaction_add', timeout=timeout, check=check)
 
-        if str(reaction.emoji) == "✅":
+        if str(payload.emoji) == "✅":
             # Confirmed
             confirmed_embed = create_success_embed(
                 "Action Confirmed",
@@ -5904,7 +6011,6 @@ async def mediaonly(interaction: discord.Interaction, action: discord.app_comman
 anti_nuke_settings = {}  # {guild_id: {'enabled': bool, 'whitelist': [user_ids], 'max_actions': int, 'owner_notifications': bool, 'backup_enabled': bool, 'backup_interval': int}}
 server_backups = {}  # {guild_id: [{'timestamp': int, 'data': dict, 'name': str}]}
 raid_alerts = {}  # {guild_id: {'last_alert': timestamp, 'alert_count': int}}
-backup_tasks = {}  # {guild_id: task}
 
 def is_whitelisted(guild_id, user_id):
     """Check if user is whitelisted for anti-nuke"""
@@ -5920,59 +6026,290 @@ def is_premium_server(guild_id):
     return guild_id in premium_servers or True  # Temporarily allow all servers
 
 # Enhanced anti-nuke tracking with raid detection
-user_actions = {}  # {guild_id: {user_id: {'count': int, 'last_reset': timestamp, 'actions': []}}}
+user_actions = {}  # {guild_id: {user_id: ActionWindow}}
 ANTI_NUKE_ACTIONS = ['channel_delete', 'channel_create', 'role_delete', 'role_create', 'member_ban', 'member_kick', 'webhook_create', 'webhook_delete']
-ACTION_RESET_TIME = 300  # 5 minutes
+ANTI_NUKE_ACTION_WEIGHTS = {action: 1 for action in ANTI_NUKE_ACTIONS}  # Default weight per action type
+ACTION_EVICT_INTERVAL = 60  # Seconds between idle user sweeps
 RAID_DETECTION_THRESHOLD = 3  # Actions to consider suspicious
 RAID_ALERT_COOLDOWN = 1800  # 30 minutes between raid alerts
+last_action_eviction = 0
+
+def get_action_window(guild_id, user_id):
+    """Get a user's action window (an empty one if they have no recent actions)"""
+    return user_actions.get(guild_id, {}).get(user_id) or ActionWindow()
+
+def get_action_weights(guild_id):
+    """Get action weights with the guild's overrides applied"""
+    weights = dict(ANTI_NUKE_ACTION_WEIGHTS)
+    weights.update(anti_nuke_settings.get(guild_id, {}).get('action_weights', {}))
+    return weights
+
+def evict_idle_user_actions(now):
+    """Drop windows for users with no actions inside the sliding window"""
+    global last_action_eviction
+    if now - last_action_eviction < ACTION_EVICT_INTERVAL:
+        return
+    last_action_eviction = now
+    
+    cutoff = now - ACTION_RESET_TIME
+    for guild_id in list(user_actions):
+        guild_windows = user_actions[guild_id]
+        idle_users = [user_id for user_id, window in guild_windows.items() if window.last_seen <= cutoff]
+        for user_id in idle_users:
+            del guild_windows[user_id]
+            mark_anti_nuke_dirty('user_actions', (guild_id, user_id))
+        if not guild_windows:
+            del user_actions[guild_id]
 
 def reset_user_actions(guild_id, user_id):
     """Reset user action count"""
-    if guild_id in user_actions and user_id in user_actions[guild_id]:
-        user_actions[guild_id][user_id]['count'] = 0
-        user_actions[guild_id][user_id]['last_reset'] = time.time()
-        user_actions[guild_id][user_id]['actions'] = []
+    if guild_id in user_actions:
+        user_actions[guild_id].pop(user_id, None)
+        mark_anti_nuke_dirty('user_actions', (guild_id, user_id))
+
+# Coalesced audit-log lookups - one fetch per guild per window instead of one per event
+audit_log_pollers = {}  # {guild_id: AuditLogPoller}
+AUDIT_LOG_POLL_WINDOW = 1.0  # Seconds to gather events before fetching
+AUDIT_LOG_MAX_POLLS = 3  # Fetches before a waiting event gives up
+AUDIT_LOG_ENTRY_TTL = 120  # Seconds an entry stays in the index
+WEBHOOK_AUDIT_ACTIONS = {
+    discord.AuditLogAction.webhook_create: 'webhook_create',
+    discord.AuditLogAction.webhook_delete: 'webhook_delete',
+    discord.AuditLogAction.webhook_update: None  # Claimed so it can't be misattributed, but not counted
+}
+
+def get_audit_entry_channel_id(entry):
+    """Channel a webhook audit entry belongs to - its channel after a create or move, before a delete"""
+    for state in (entry.after, entry.before):
+        channel = getattr(state, 'channel', None)
+        if channel is not None:
+            return channel.id
+    return None
+
+def is_anti_nuke_enabled(guild_id):
+    """Check if anti-nuke protection is enabled without creating default settings"""
+    return anti_nuke_settings.get(guild_id, {}).get('enabled', False)
+
+class AuditLogPoller:
+    """Fetches a guild's audit log once per window and resolves waiting events from an index"""
+
+    def __init__(self, guild):
+        self.guild = guild
+        self.entries = {}  # {(action, target_id): entry}
+        self.entries_by_action = {}  # {action: [entry]} oldest first
+        self.indexed = []  # [(indexed_at, entry)]
+        self.claimed = set()  # Entry IDs handed to untargeted lookups
+        self.waiters = []  # [[action, target_id, channel_id, future, polls_left]]
+        self.last_entry_id = None
+        self.task = None
+
+    def lookup(self, action, target_id=None, channel_id=None):
+        if target_id is not None:
+            return self.entries.get((action, target_id))
+        
+        # Untargeted lookups accept several actions and claim the oldest unclaimed entry in the channel
+        actions = action if isinstance(action, tuple) else (action,)
+        candidates = [entry for entry_action in actions for entry in self.entries_by_action.get(entry_action, [])]
+        for entry in sorted(candidates, key=lambda entry: entry.id):
+            if entry.id in self.claimed:
+                continue
+            if channel_id is not None and get_audit_entry_channel_id(entry) != channel_id:
+                continue
+            self.claimed.add(entry.id)
+            return entry
+        return None
+
+    async def resolve(self, action, target_id=None, channel_id=None):
+        entry = self.lookup(action, target_id, channel_id)
+        if entry:
+            return entry
+        
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append([action, target_id, channel_id, future, AUDIT_LOG_MAX_POLLS])
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.poll())
+        return await future
+
+    def index(self, entry):
+        # Ignore stale entries so old actions are never attributed to new events
+        if (discord.utils.utcnow() - entry.created_at).total_seconds() > AUDIT_LOG_ENTRY_TTL:
+            return
+        
+        target_id = getattr(entry.target, 'id', None)
+        if target_id is not None:
+            self.entries[(entry.action, target_id)] = entry
+        self.entries_by_action.setdefault(entry.action, []).append(entry)
+        self.indexed.append((time.time(), entry))
+
+    def prune(self):
+        cutoff = time.time() - AUDIT_LOG_ENTRY_TTL
+        expired = 0
+        while expired < len(self.indexed) and self.indexed[expired][0] < cutoff:
+            expired += 1
+        if not expired:
+            return
+        
+        self.indexed = self.indexed[expired:]
+        live_ids = {entry.id for _, entry in self.indexed}
+        self.entries = {key: entry for key, entry in self.entries.items() if entry.id in live_ids}
+        self.entries_by_action = {action: [entry for entry in entries if entry.id in live_ids] for action, entries in self.entries_by_action.items()}
+        self.claimed &= live_ids
+
+    async def fetch(self):
+        kwargs = {'limit': 100}
+        if self.last_entry_id:
+            kwargs['after'] = discord.Object(id=self.last_entry_id)
+        
+        new_entries = [entry async for entry in self.guild.audit_logs(**kwargs)]
+        for entry in sorted(new_entries, key=lambda entry: entry.id):
+            self.index(entry)
+            self.last_entry_id = max(self.last_entry_id or 0, entry.id)
+        self.prune()
+
+    async def poll(self):
+        while self.waiters:
+            # Let events from the same burst pile up before fetching
+            await asyncio.sleep(AUDIT_LOG_POLL_WINDOW)
+            try:
+                await self.fetch()
+            except Exception as e:
+                print(f"❌ Audit log fetch failed for {self.guild.name}: {e}")
+            
+            remaining = []
+            for waiter in self.waiters:
+                action, target_id, channel_id, future, polls_left = waiter
+                if future.done():
+                    continue
+                entry = self.lookup(action, target_id, channel_id)
+                if entry:
+                    future.set_result(entry)
+                elif polls_left <= 1:
+                    future.set_result(None)
+                else:
+                    waiter[4] -= 1
+                    remaining.append(waiter)
+            self.waiters = remaining
+
+async def resolve_audit_log_entry(guild, action, target_id=None, channel_id=None):
+    """Find the audit log entry behind a gateway event through the guild's shared poller"""
+    if guild.id not in audit_log_pollers:
+        audit_log_pollers[guild.id] = AuditLogPoller(guild)
+    return await audit_log_pollers[guild.id].resolve(action, target_id, channel_id)
 
 async def increment_user_action(guild_id, user_id, action_type, guild_obj=None):
     """Increment user action count and check for nuke/raid behavior"""
-    if guild_id not in anti_nuke_settings:
-        anti_nuke_settings[guild_id] = {'enabled': False, 'whitelist': [], 'max_actions': 5, 'owner_notifications': True, 'backup_enabled': False, 'backup_interval': 24}
-    
-    if not anti_nuke_settings[guild_id]['enabled']:
+    # Settings are warmed at startup, so a missing entry means protection was never enabled
+    if not is_anti_nuke_enabled(guild_id):
         return False
     
-    # Initialize tracking
+    current_time = time.time()
+    evict_idle_user_actions(current_time)
+    
+    # Record the action in the user's sliding window
     if guild_id not in user_actions:
         user_actions[guild_id] = {}
     if user_id not in user_actions[guild_id]:
-        user_actions[guild_id][user_id] = {'count': 0, 'last_reset': time.time(), 'actions': []}
-    
-    # Check if we should reset (5 minutes passed)
-    current_time = time.time()
-    if current_time - user_actions[guild_id][user_id]['last_reset'] > ACTION_RESET_TIME:
-        reset_user_actions(guild_id, user_id)
-    
-    # Add action to history
-    user_actions[guild_id][user_id]['actions'].append({
-        'type': action_type,
-        'timestamp': current_time
-    })
+        user_actions[guild_id][user_id] = ActionWindow()
     
-    # Increment count
-    user_actions[guild_id][user_id]['count'] += 1
+    window = user_actions[guild_id][user_id]
+    window.record(action_type, current_time)
+    mark_anti_nuke_dirty('user_actions', (guild_id, user_id))
     
     # Check for raid behavior (even for whitelisted users - notify owner)
-    if user_actions[guild_id][user_id]['count'] >= RAID_DETECTION_THRESHOLD:
-        await notify_owner_of_suspicious_activity(guild_obj, user_id, action_type, user_actions[guild_id][user_id])
+    if window.count(current_time) >= RAID_DETECTION_THRESHOLD:
+        await notify_owner_of_suspicious_activity(guild_obj, user_id, action_type, window)
     
-    # Check if limit exceeded for non-whitelisted users
+    # Check if weighted limit exceeded for non-whitelisted users
     if not is_whitelisted(guild_id, user_id):
         max_actions = anti_nuke_settings[guild_id].get('max_actions', 5)
-        if user_actions[guild_id][user_id]['count'] >= max_actions:
+        if window.weighted_count(get_action_weights(guild_id), current_time) >= max_actions:
             return True  # Trigger anti-nuke
     
     return False
 
+def serialize_backup_overwrites(channel):
+    """Serialize a channel's permission overwrites for backups"""
+    return [{'id': overwrite[0].id, 'type': str(type(overwrite[0])), 'allow': overwrite[1].allow.value, 'deny': overwrite[1].deny.value} for overwrite in channel.overwrites.items()]
+
+def serialize_backup_category(category):
+    """Serialize a category for backups"""
+    return {
+        'id': category.id,
+        'name': category.name,
+        'position': category.position,
+        'overwrites': serialize_backup_overwrites(category)
+    }
+
+def serialize_backup_channel(channel):
+    """Serialize a text or voice channel for backups (None for other channel types)"""
+    if isinstance(channel, discord.TextChannel):
+        return {
+            'id': channel.id,
+            'name': channel.name,
+            'type': 'text',
+            'category': channel.category.name if channel.category else None,
+            'category_id': channel.category_id,
+            'position': channel.position,
+            'topic': channel.topic,
+            'slowmode_delay': channel.slowmode_delay,
+            'nsfw': channel.nsfw,
+            'overwrites': serialize_backup_overwrites(channel)
+        }
+    elif isinstance(channel, discord.VoiceChannel):
+        return {
+            'id': channel.id,
+            'name': channel.name,
+            'type': 'voice',
+            'category': channel.category.name if channel.category else None,
+            'category_id': channel.category_id,
+            'position': channel.position,
+            'bitrate': channel.bitrate,
+            'user_limit': channel.user_limit,
+            'overwrites': serialize_backup_overwrites(channel)
+        }
+    return None
+
+def serialize_backup_role(role):
+    """Serialize a role for backups"""
+    return {
+        'id': role.id,
+        'name': role.name,
+        'color': role.color.value,
+        'hoist': role.hoist,
+        'mentionable': role.mentionable,
+        'permissions': role.permissions.value,
+        'position': role.position
+    }
+
+def store_server_backup(guild_id, backup_data, backup_name, full=True, checkpoint_at=None):
+    """Store a backup checkpoint and trim old checkpoints and change log entries"""
+    if guild_id not in server_backups:
+        server_backups[guild_id] = []
+
+    # Check if premium for backup limits
+    is_premium = is_premium_server(guild_id)
+    max_backups = 20 if is_premium else 10
+
+    backup = {
+        'name': backup_name,
+        'timestamp': backup_data['timestamp'],
+        'data': backup_data,
+        'full': full,
+        'checkpoint_at': checkpoint_at if checkpoint_at is not None else time.time()
+    }
+    server_backups[guild_id].append(backup)
+    pending_backup_rows.append((guild_id, backup_name, backup['timestamp'], backup['checkpoint_at'], int(full), json.dumps(backup_data)))
+
+    # Remove old backups if over limit - never the newest full snapshot /denuke replays from
+    server_backups[guild_id] = trim_backup_checkpoints(server_backups[guild_id], max_backups)
+
+    mark_anti_nuke_dirty('backups', guild_id)
+    
+    # Changes older than the oldest checkpoint can no longer be replayed
+    oldest_checkpoint = get_checkpoint_time(server_backups[guild_id][0])
+    if guild_id in backup_change_logs:
+        backup_change_logs[guild_id] = [change for change in backup_change_logs[guild_id] if change['timestamp'] >= oldest_checkpoint]
+
 async def create_server_backup(guild):
     """Create a comprehensive server backup"""
     try:
@@ -5994,71 +6331,21 @@ async def create_server_backup(guild):
         
         # Backup categories
         for category in guild.categories:
-            backup_data['categories'].append({
-                'name': category.name,
-                'position': category.position,
-                'overwrites': [{'id': overwrite[0].id, 'type': str(type(overwrite[0])), 'allow': overwrite[1].allow.value, 'deny': overwrite[1].deny.value} for overwrite in category.overwrites.items()]
-            })
+            backup_data['categories'].append(serialize_backup_category(category))
         
         # Backup channels
         for channel in guild.channels:
-            if isinstance(channel, discord.TextChannel):
-                channel_data = {
-                    'name': channel.name,
-                    'type': 'text',
-                    'category': channel.category.name if channel.category else None,
-                    'position': channel.position,
-                    'topic': channel.topic,
-                    'slowmode_delay': channel.slowmode_delay,
-                    'nsfw': channel.nsfw,
-                    'overwrites': [{'id': overwrite[0].id, 'type': str(type(overwrite[0])), 'allow': overwrite[1].allow.value, 'deny': overwrite[1].deny.value} for overwrite in channel.overwrites.items()]
-                }
-            elif isinstance(channel, discord.VoiceChannel):
-                channel_data = {
-                    'name': channel.name,
-                    'type': 'voice',
-                    'category': channel.category.name if channel.category else None,
-                    'position': channel.position,
-                    'bitrate': channel.bitrate,
-                    'user_limit': channel.user_limit,
-                    'overwrites': [{'id': overwrite[0].id, 'type': str(type(overwrite[0])), 'allow': overwrite[1].allow.value, 'deny': overwrite[1].deny.value} for overwrite in channel.overwrites.items()]
-                }
-            else:
-                continue
-            
-            backup_data['channels'].append(channel_data)
+            channel_data = serialize_backup_channel(channel)
+            if channel_data:
+                backup_data['channels'].append(channel_data)
         
         # Backup roles
         for role in guild.roles:
             if role.name != "@everyone":
-                backup_data['roles'].append({
-                    'name': role.name,
-                    'color': role.color.value,
-                    'hoist': role.hoist,
-                    'mentionable': role.mentionable,
-                    'permissions': role.permissions.value,
-                    'position': role.position
-                })
-        
-        # Store backup
-        if guild.id not in server_backups:
-            server_backups[guild.id] = []
-        
-        # Check if premium for backup limits
-        is_premium = is_premium_server(guild.id)
-        max_backups = 20 if is_premium else 10
+                backup_data['roles'].append(serialize_backup_role(role))
         
-        # Add new backup
         backup_name = f"Auto-Backup-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        server_backups[guild.id].append({
-            'name': backup_name,
-            'timestamp': backup_data['timestamp'],
-            'data': backup_data
-        })
-        
-        # Remove old backups if over limit
-        if len(server_backups[guild.id]) > max_backups:
-            server_backups[guild.id] = server_backups[guild.id][-max_backups:]
+        store_server_backup(guild.id, backup_data, backup_name, full=True)
         
         print(f"📄 Created backup for {guild.name}: {backup_name}")
         return True
@@ -6067,6 +6354,350 @@ async def create_server_backup(guild):
         print(f"❌ Backup creation failed for {guild.name}: {e}")
         return False
 
+# Incremental backups - checkpoints plus a change log fed by gateway events
+backup_change_logs = {}  # {guild_id: [{'timestamp': float, 'kind': str, 'op': str, 'id': int, 'data': dict}]}
+backup_next_due = {}  # {guild_id: timestamp}
+backup_scheduler_task = None
+BACKUP_CHANGE_LOG_LIMIT = 2000  # Changes before a checkpoint is forced
+BACKUP_FULL_SNAPSHOT_INTERVAL = 7 * 86400  # Full guild walk at least weekly to correct drift
+BACKUP_SCHEDULER_TICK = 300  # 5 minutes
+BACKUP_SCHEDULER_JITTER = 3600  # Spread guilds over an hour
+
+def record_backup_change(guild, kind, op, obj_id, data=None):
+    """Record a channel/category/role change in the guild's backup change log"""
+    settings = anti_nuke_settings.get(guild.id)
+    if not settings or not settings.get('backup_enabled', False):
+        return
+    
+    # Changes are only useful on top of an existing checkpoint
+    if not server_backups.get(guild.id):
+        return
+    
+    if guild.id not in backup_change_logs:
+        backup_change_logs[guild.id] = []
+    
+    change = {
+        'timestamp': time.time(),
+        'kind': kind,
+        'op': op,
+        'id': obj_id,
+        'data': data
+    }
+    backup_change_logs[guild.id].append(change)
+    pending_backup_change_rows.append((guild.id, change['timestamp'], kind, op, obj_id, json.dumps(data) if data else None))
+    
+    # Fold long logs into a checkpoint so replay stays cheap
+    if len(pending_backup_changes(guild.id)) >= BACKUP_CHANGE_LOG_LIMIT:
+        checkpoint_server_backup(guild.id)
+
+def record_channel_backup_change(channel, op):
+    """Record a channel or category change for incremental backups"""
+    if isinstance(channel, discord.CategoryChannel):
+        data = serialize_backup_category(channel) if op == 'upsert' else None
+        record_backup_change(channel.guild, 'category', op, channel.id, data)
+    elif isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
+        data = serialize_backup_channel(channel) if op == 'upsert' else None
+        record_backup_change(channel.guild, 'channel', op, channel.id, data)
+
+def record_role_backup_change(role, op):
+    """Record a role change for incremental backups"""
+    if role.is_default():
+        return
+    data = serialize_backup_role(role) if op == 'upsert' else None
+    record_backup_change(role.guild, 'role', op, role.id, data)
+
+def get_checkpoint_time(backup):
+    """Get the exact time a checkpoint reflects (older backups only have a whole-second timestamp)"""
+    return backup.get('checkpoint_at', backup['timestamp'])
+
+def pending_backup_changes(guild_id):
+    """Get changes recorded since the latest checkpoint"""
+    if not server_backups.get(guild_id):
+        return []
+    last_checkpoint = get_checkpoint_time(server_backups[guild_id][-1])
+    return [change for change in backup_change_logs.get(guild_id, []) if change['timestamp'] > last_checkpoint]
+
+def apply_backup_changes(backup_data, changes):
+    """Replay change log entries on top of a checkpoint and return the resulting backup data"""
+    collections = {'category': 'categories', 'channel': 'channels', 'role': 'roles'}
+    items = {}
+    for kind, key in collections.items():
+        # Entries without an ID come from pre-incremental backups and are kept as-is
+        items[kind] = {entry.get('id', f"legacy-{i}"): dict(entry) for i, entry in enumerate(backup_data[key])}
+    
+    for change in changes:
+        if change['op'] == 'delete':
+            items[change['kind']].pop(change['id'], None)
+        else:
+            items[change['kind']][change['id']] = dict(change['data'])
+    
+    # Keep channel category names in sync with renamed categories
+    category_names = {cat_id: cat['name'] for cat_id, cat in items['category'].items()}
+    for channel_data in items['channel'].values():
+        if channel_data.get('category_id') is not None:
+            channel_data['category'] = category_names.get(channel_data['category_id'])
+    
+    result = dict(backup_data)
+    for kind, key in collections.items():
+        result[key] = sorted(items[kind].values(), key=lambda entry: entry['position'])
+    return result
+
+def checkpoint_server_backup(guild_id):
+    """Materialize a checkpoint from the latest checkpoint plus pending changes (no API calls)"""
+    changes = pending_backup_changes(guild_id)
+    if not changes:
+        return False
+    
+    checkpoint_at = max(change['timestamp'] for change in changes)
+    backup_data = apply_backup_changes(server_backups[guild_id][-1]['data'], changes)
+    backup_data['timestamp'] = int(checkpoint_at)
+    backup_name = f"Auto-Backup-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    store_server_backup(guild_id, backup_data, backup_name, full=False, checkpoint_at=checkpoint_at)
+    return True
+
+def build_backup_at(guild_id, timestamp):
+    """Rebuild the server layout as it was at the given point in time"""
+    checkpoints = [backup for backup in server_backups.get(guild_id, []) if get_checkpoint_time(backup) <= timestamp]
+    if not checkpoints:
+        return None
+    
+    base = checkpoints[-1]
+    base_time = get_checkpoint_time(base)
+    changes = [change for change in backup_change_logs.get(guild_id, []) if base_time < change['timestamp'] <= timestamp]
+    backup_data = apply_backup_changes(base['data'], changes)
+    backup_data['timestamp'] = int(timestamp)
+    return backup_data
+
+# Persistent anti-nuke state - SQLite backed, warmed into memory at startup, flushed in batches
+ANTI_NUKE_FLUSH_INTERVAL = 5  # Seconds between batched writes
+DEFAULT_ANTI_NUKE_SETTINGS = {'enabled': False, 'whitelist': [], 'max_actions': 5, 'owner_notifications': True, 'backup_enabled': False, 'backup_interval': 24}
+anti_nuke_dirty = {'settings': set(), 'raid_alerts': set(), 'user_actions': set(), 'backups': set()}  # {table: {guild_id, or (guild_id, user_id) for user_actions}}
+pending_backup_rows = []  # [(guild_id, name, timestamp, checkpoint_at, full, data_json)] - checkpoints not yet written
+pending_backup_change_rows = []  # [(guild_id, timestamp, kind, op, object_id, data_json)]
+
+def get_anti_nuke_settings(guild_id):
+    """Get a guild's anti-nuke settings, creating (and persisting) defaults if needed"""
+    if guild_id not in anti_nuke_settings:
+        anti_nuke_settings[guild_id] = dict(DEFAULT_ANTI_NUKE_SETTINGS, whitelist=[])
+        mark_anti_nuke_dirty('settings', guild_id)
+    return anti_nuke_settings[guild_id]
+
+def mark_anti_nuke_dirty(table, key):
+    """Queue in-memory anti-nuke state for the next batched write - a guild ID, or (guild_id, user_id) for user_actions"""
+    anti_nuke_dirty[table].add(key)
+
+def load_anti_nuke_state():
+    """Warm the in-memory anti-nuke caches from the database"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT guild_id, settings FROM anti_nuke_settings')
+        for guild_id, settings_json in cursor.fetchall():
+            settings = dict(DEFAULT_ANTI_NUKE_SETTINGS)
+            settings.update(json.loads(settings_json))
+            anti_nuke_settings[guild_id] = settings
+        
+        cursor.execute('SELECT guild_id, last_alert, alert_count FROM anti_nuke_raid_alerts')
+        for guild_id, last_alert, alert_count in cursor.fetchall():
+            raid_alerts[guild_id] = {'last_alert': last_alert, 'alert_count': alert_count}
+        
+        cutoff = time.time() - ACTION_RESET_TIME
+        cursor.execute('SELECT guild_id, user_id, action_type, timestamps FROM anti_nuke_user_actions')
+        for guild_id, user_id, action_type, timestamps_json in cursor.fetchall():
+            timestamps = [timestamp for timestamp in json.loads(timestamps_json) if timestamp > cutoff]
+            if not timestamps:
+                # Rewriting the user on the next flush drops the expired row
+                mark_anti_nuke_dirty('user_actions', (guild_id, user_id))
+                continue
+            window = user_actions.setdefault(guild_id, {}).setdefault(user_id, ActionWindow())
+            window.events[action_type] = deque(timestamps, maxlen=ACTION_RING_SIZE)
+            window.last_seen = max(window.last_seen, timestamps[-1])
+        
+        cursor.execute('SELECT guild_id, name, timestamp, checkpoint_at, full, data FROM server_backups ORDER BY checkpoint_at')
+        for guild_id, name, timestamp, checkpoint_at, full, data_json in cursor.fetchall():
+            server_backups.setdefault(guild_id, []).append({
+                'name': name,
+                'timestamp': timestamp,
+                'data': json.loads(data_json),
+                'full': bool(full),
+                'checkpoint_at': checkpoint_at
+            })
+        
+        cursor.execute('SELECT guild_id, timestamp, kind, op, object_id, data FROM server_backup_changes ORDER BY timestamp')
+        for guild_id, timestamp, kind, op, object_id, data_json in cursor.fetchall():
+            backup_change_logs.setdefault(guild_id, []).append({
+                'timestamp': timestamp,
+                'kind': kind,
+                'op': op,
+                'id': object_id,
+                'data': json.loads(data_json) if data_json else None
+            })
+        
+        conn.close()
+        print(f"🛡️ Loaded anti-nuke state for {len(anti_nuke_settings)} guilds")
+        
+    except Exception as e:
+        print(f"❌ Failed to load anti-nuke state: {e}")
+
+def collect_anti_nuke_writes():
+    """Snapshot dirty in-memory state into rows (runs on the event loop)"""
+    dirty = {table: keys.copy() for table, keys in anti_nuke_dirty.items()}
+    for keys in anti_nuke_dirty.values():
+        keys.clear()
+    
+    writes = {
+        'settings': [(guild_id, json.dumps(anti_nuke_settings[guild_id])) for guild_id in dirty['settings'] if guild_id in anti_nuke_settings],
+        'raid_alerts': [(guild_id, raid_alerts[guild_id]['last_alert'], raid_alerts[guild_id]['alert_count']) for guild_id in dirty['raid_alerts'] if guild_id in raid_alerts],
+        'user_action_keys': list(dirty['user_actions']),
+        'user_actions': [],
+        'backup_guilds': list(dirty['backups']),
+        'backups': pending_backup_rows[:],
+        'backup_trims': [],
+        'backup_changes': pending_backup_change_rows[:]
+    }
+    pending_backup_rows.clear()
+    pending_backup_change_rows.clear()
+    
+    # Only the users whose windows changed are rewritten
+    for guild_id, user_id in dirty['user_actions']:
+        window = user_actions.get(guild_id, {}).get(user_id)
+        if window:
+            for action_type, ring in window.events.items():
+                writes['user_actions'].append((guild_id, user_id, action_type, json.dumps(list(ring))))
+    
+    # New checkpoints are inserted above - stored ones only need trimming
+    for guild_id in dirty['backups']:
+        checkpoints = server_backups.get(guild_id, [])
+        if checkpoints:
+            writes['backup_trims'].append((guild_id, get_checkpoint_time(checkpoints[0])))
+    
+    return writes
+
+def write_anti_nuke_state(writes):
+    """Write a batch of anti-nuke state in one transaction (runs in a worker thread)"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany('INSERT OR REPLACE INTO anti_nuke_settings (guild_id, settings) VALUES (?, ?)', writes['settings'])
+        cursor.executemany('INSERT OR REPLACE INTO anti_nuke_raid_alerts (guild_id, last_alert, alert_count) VALUES (?, ?, ?)', writes['raid_alerts'])
+        cursor.executemany('DELETE FROM anti_nuke_user_actions WHERE guild_id = ? AND user_id = ?', writes['user_action_keys'])
+        cursor.executemany('INSERT INTO anti_nuke_user_actions (guild_id, user_id, action_type, timestamps) VALUES (?, ?, ?, ?)', writes['user_actions'])
+        cursor.executemany('INSERT INTO server_backups (guild_id, name, timestamp, checkpoint_at, full, data) VALUES (?, ?, ?, ?, ?, ?)', writes['backups'])
+        cursor.executemany('DELETE FROM server_backups WHERE guild_id = ? AND checkpoint_at < ?', writes['backup_trims'])
+        cursor.executemany('INSERT INTO server_backup_changes (guild_id, timestamp, kind, op, object_id, data) VALUES (?, ?, ?, ?, ?, ?)', writes['backup_changes'])
+        cursor.executemany('DELETE FROM server_backup_changes WHERE guild_id = ? AND timestamp < ?', writes['backup_trims'])
+        conn.commit()
+    finally:
+        conn.close()
+
+async def flush_anti_nuke_state():
+    """Persist all dirty anti-nuke state in a single background transaction"""
+    writes = collect_anti_nuke_writes()
+    if not any(writes.values()):
+        return
+    try:
+        await asyncio.to_thread(write_anti_nuke_state, writes)
+    except Exception as e:
+        print(f"❌ Failed to persist anti-nuke state: {e}")
+        # Re-queue so the next flush retries
+        for guild_id, _ in writes['settings']:
+            mark_anti_nuke_dirty('settings', guild_id)
+        for guild_id, _, _ in writes['raid_alerts']:
+            mark_anti_nuke_dirty('raid_alerts', guild_id)
+        for key in writes['user_action_keys']:
+            mark_anti_nuke_dirty('user_actions', key)
+        for guild_id in writes['backup_guilds']:
+            mark_anti_nuke_dirty('backups', guild_id)
+        pending_backup_rows[:0] = writes['backups']
+        pending_backup_change_rows[:0] = writes['backup_changes']
+
+@tasks.loop(seconds=ANTI_NUKE_FLUSH_INTERVAL)
+async def anti_nuke_state_flusher():
+    await flush_anti_nuke_state()
+
+# Anti-nuke alert delivery - cached log channel resolution and a prioritized outbound queue
+ANTI_NUKE_LOG_KEYWORDS = ("log", "audit", "mod", "admin", "antinuke")
+ANTI_NUKE_OWNER_FALLBACK_KEYWORDS = ("log", "audit", "mod", "admin", "owner", "antinuke")  # Where owner DMs go when DMs are closed
+ALERT_PRIORITY_CRITICAL = 0  # Containment notices
+ALERT_PRIORITY_NORMAL = 1  # Owner DMs and raid warnings
+log_channel_cache = {}  # {guild_id: {keywords: channel_id or None}}
+anti_nuke_alert_queue = asyncio.PriorityQueue()  # (priority, seq, destination, kwargs, fallback, delivered future)
+anti_nuke_alert_seq = 0
+anti_nuke_alert_task = None
+
+def resolve_anti_nuke_log_channel(guild, keywords=ANTI_NUKE_LOG_KEYWORDS):
+    """Resolve the guild's anti-nuke log channel, scanning the channel list at most once per change"""
+    configured_id = anti_nuke_settings.get(guild.id, {}).get('log_channel')
+    if configured_id:
+        channel = guild.get_channel(configured_id)
+        if channel:
+            return channel
+    
+    guild_cache = log_channel_cache.setdefault(guild.id, {})
+    if keywords not in guild_cache:
+        guild_cache[keywords] = None
+        for channel in guild.text_channels:
+            if any(keyword in channel.name.lower() for keyword in keywords):
+                guild_cache[keywords] = channel.id
+                break
+    
+    channel_id = guild_cache[keywords]
+    if channel_id is None:
+        return None
+    
+    channel = guild.get_channel(channel_id)
+    if channel is None:
+        # Channel vanished without an event reaching us - rescan next time
+        log_channel_cache.pop(guild.id, None)
+    return channel
+
+def invalidate_log_channel_cache(channel):
+    """Drop a guild's cached log channels - any created, deleted or renamed channel can change the best match"""
+    if isinstance(channel, discord.TextChannel):
+        log_channel_cache.pop(channel.guild.id, None)
+
+def queue_anti_nuke_alert(destination, priority=ALERT_PRIORITY_NORMAL, fallback=None, **kwargs):
+    """Queue an alert message for delivery; fallback is a (destination, kwargs) pair used if sending is forbidden.
+
+    Returns a future resolved with the sent message (None if nothing was sent), so callers can edit it later.
+    """
+    global anti_nuke_alert_seq
+    delivered = asyncio.get_running_loop().create_future()
+    if destination is None:
+        delivered.set_result(None)
+        return delivered
+    anti_nuke_alert_seq += 1
+    anti_nuke_alert_queue.put_nowait((priority, anti_nuke_alert_seq, destination, kwargs, fallback, delivered))
+    ensure_anti_nuke_alert_worker()
+    return delivered
+
+async def anti_nuke_alert_worker():
+    """Deliver queued anti-nuke alerts, most urgent first"""
+    while True:
+        _, _, destination, kwargs, fallback, delivered = await anti_nuke_alert_queue.get()
+        message = None
+        try:
+            message = await destination.send(**kwargs)
+        except discord.Forbidden:
+            if fallback and fallback[0]:
+                try:
+                    message = await fallback[0].send(**fallback[1])
+                except Exception as e:
+                    print(f"❌ Failed to deliver fallback anti-nuke alert: {e}")
+        except Exception as e:
+            print(f"❌ Failed to deliver anti-nuke alert: {e}")
+        finally:
+            if not delivered.done():
+                delivered.set_result(message)
+            anti_nuke_alert_queue.task_done()
+
+def ensure_anti_nuke_alert_worker():
+    """Start the alert worker unless it is already running"""
+    global anti_nuke_alert_task
+    if anti_nuke_alert_task is None or anti_nuke_alert_task.done():
+        anti_nuke_alert_task = asyncio.create_task(anti_nuke_alert_worker())
+
 async def notify_owner_of_suspicious_activity(guild, user_id, action_type, action_data):
     """Notify server owner of suspicious activity"""
     try:
@@ -6086,6 +6717,7 @@ async def notify_owner_of_suspicious_activity(guild, user_id, action_type, actio
         # Update alert tracking
         raid_alerts[guild_id]['last_alert'] = current_time
         raid_alerts[guild_id]['alert_count'] += 1
+        mark_anti_nuke_dirty('raid_alerts', guild_id)
         
         user = guild.get_member(user_id) or bot.get_user(user_id)
         user_name = user.display_name if hasattr(user, 'display_name') else str(user) if user else f"User {user_id}"
@@ -6114,13 +6746,13 @@ async def notify_owner_of_suspicious_activity(guild, user_id, action_type, actio
         
         # Activity details
         action_list = []
-        for action in action_data['actions'][-5:]:  # Last 5 actions
-            time_ago = int(current_time - action['timestamp'])
-            action_list.append(f"• {action['type'].replace('_', ' ').title()} ({time_ago}s ago)")
+        for recent_type, timestamp in action_data.recent(5):  # Last 5 actions
+            time_ago = int(current_time - timestamp)
+            action_list.append(f"• {recent_type.replace('_', ' ').title()} ({time_ago}s ago)")
         
         embed.add_field(
             name="⚡ Recent Actions",
-            value=f"**Count:** {action_data['count']} actions in 5 minutes\n" + "\n".join(action_list),
+            value=f"**Count:** {action_data.count(current_time)} actions in 5 minutes\n" + "\n".join(action_list),
             inline=False
         )
         
@@ -6148,62 +6780,25 @@ async def notify_owner_of_suspicious_activity(guild, user_id, action_type, actio
             inline=True
         )
         
-        # Send DM to owner
-        try:
-            await guild.owner.send(embed=embed)
-            print(f"🚨 Sent raid alert to {guild.owner} for {guild.name}")
-        except discord.Forbidden:
-            # Try to send to a log channel if DM fails
-            log_channel = None
-            for channel in guild.text_channels:
-                if any(keyword in channel.name.lower() for keyword in ["log", "audit", "mod", "admin", "owner", "antinuke"]):
-                    log_channel = channel
-                    break
-            
-            if log_channel:
-                embed.add_field(name="⚠️ Notice", value="Could not DM server owner - posting here instead", inline=False)
-                await log_channel.send(f"{guild.owner.mention}", embed=embed)
+        # Send DM to owner, falling back to the log channel if DMs are closed
+        fallback_embed = embed.copy()
+        fallback_embed.add_field(name="⚠️ Notice", value="Could not DM server owner - posting here instead", inline=False)
+        fallback = (resolve_anti_nuke_log_channel(guild, ANTI_NUKE_OWNER_FALLBACK_KEYWORDS), {'content': guild.owner.mention, 'embed': fallback_embed})
+        queue_anti_nuke_alert(guild.owner, ALERT_PRIORITY_NORMAL, fallback, embed=embed)
+        print(f"🚨 Queued raid alert to {guild.owner} for {guild.name}")
         
     except Exception as e:
         print(f"❌ Failed to send raid alert: {e}")
 
-async def trigger_anti_nuke(guild, user, action_type):
-    """Trigger anti-nuke protection with advanced response"""
+anti_nuke_followups = set()  # Deferred mitigation tasks, referenced until they finish
+
+async def run_anti_nuke_followup(guild, user, action_type, actions_taken, containment_time):
+    """Deferred path - logging, owner notification and emergency backup"""
     try:
-        member = guild.get_member(user.id)
-        actions_taken = []
-        
-        if member:
-            # Remove dangerous permissions
-            dangerous_roles = []
-            for role in member.roles:
-                if (role.permissions.administrator or role.permissions.manage_guild or 
-                    role.permissions.manage_channels or role.permissions.manage_roles or
-                    role.permissions.ban_members or role.permissions.kick_members):
-                    dangerous_roles.append(role)
-            
-            if dangerous_roles:
-                await member.remove_roles(*dangerous_roles, reason="🚨 Anti-nuke protection triggered")
-                actions_taken.append(f"Removed {len(dangerous_roles)} dangerous roles")
-            
-            # Timeout user for 10 minutes
-            try:
-                await member.timeout(datetime.timedelta(minutes=10), reason="🚨 Anti-nuke protection - suspicious activity")
-                actions_taken.append("Applied 10-minute timeout")
-            except:
-                pass
-        
-        # Create emergency backup if not recent
-        if guild.id not in server_backups or not server_backups[guild.id]:
-            if await create_server_backup(guild):
-                actions_taken.append("Created emergency server backup")
-        
         # Log to server
-        log_channel = None
-        for channel in guild.text_channels:
-            if any(keyword in channel.name.lower() for keyword in ["log", "audit", "mod", "admin", "antinuke"]):
-                log_channel = channel
-                break
+        log_channel = resolve_anti_nuke_log_channel(guild)
+        log_embed = None
+        log_delivery = None
         
         if log_channel:
             embed = discord.Embed(
@@ -6215,7 +6810,7 @@ async def trigger_anti_nuke(guild, user, action_type):
             
             embed.add_field(
                 name="⚡ Trigger Details",
-                value=f"**Actions:** {user_actions[guild.id][user.id]['count']} in 5 minutes\n**Threshold:** {anti_nuke_settings[guild.id].get('max_actions', 5)}",
+                value=f"**Actions:** {get_action_window(guild.id, user.id).count(time.time())} in 5 minutes\n**Threshold:** {anti_nuke_settings[guild.id].get('max_actions', 5)}\n**Contained in:** {containment_time * 1000:.0f}ms",
                 inline=False
             )
             
@@ -6231,12 +6826,43 @@ async def trigger_anti_nuke(guild, user, action_type):
                 inline=False
             )
             
-            await log_channel.send(embed=embed)
+            log_embed = embed
+            log_delivery = queue_anti_nuke_alert(log_channel, ALERT_PRIORITY_CRITICAL, embed=embed)
         
         # Always notify owner
-        await notify_owner_of_suspicious_activity(guild, user.id, f"ANTI-NUKE TRIGGERED: {action_type}", user_actions[guild.id][user.id])
+        await notify_owner_of_suspicious_activity(guild, user.id, f"ANTI-NUKE TRIGGERED: {action_type}", get_action_window(guild.id, user.id))
         
-        print(f"🚨 Anti-nuke activated for {user} in {guild.name}: {', '.join(actions_taken)}")
+        # Create emergency backup if none exists - slow on big guilds, so it runs last
+        if guild.id not in server_backups or not server_backups[guild.id]:
+            backup_created = await create_server_backup(guild)
+            if backup_created:
+                print(f"💾 Created emergency server backup for {guild.name}")
+            
+            # The log message went out before the backup finished - add the result to it now
+            log_message = await log_delivery if log_delivery else None
+            if log_message:
+                log_embed.add_field(
+                    name="💾 Emergency Backup",
+                    value="• Created emergency server backup" if backup_created else "• Emergency backup failed",
+                    inline=False
+                )
+                await log_message.edit(embed=log_embed)
+        
+    except Exception as e:
+        print(f"❌ Anti-nuke follow-up error: {e}")
+
+async def trigger_anti_nuke(guild, user, action_type):
+    """Trigger anti-nuke protection with advanced response"""
+    try:
+        started = time.perf_counter()
+        actions_taken = await contain_anti_nuke_threat(guild, user)
+        containment_time = time.perf_counter() - started
+        
+        followup = asyncio.create_task(run_anti_nuke_followup(guild, user, action_type, actions_taken, containment_time))
+        anti_nuke_followups.add(followup)
+        followup.add_done_callback(anti_nuke_followups.discard)
+        
+        print(f"🚨 Anti-nuke contained {user} in {guild.name} in {containment_time * 1000:.0f}ms: {', '.join(actions_taken)}")
         
     except Exception as e:
         print(f"❌ Anti-nuke error: {e}")
@@ -6246,28 +6872,47 @@ async def start_backup_scheduler():
     """Start automatic backup scheduling for all guilds"""
     while True:
         try:
-            for guild_id, settings in anti_nuke_settings.items():
-                if settings.get('backup_enabled', False):
-                    guild = bot.get_guild(guild_id)
-                    if guild:
-                        # Check if it's time for backup
-                        interval_hours = settings.get('backup_interval', 24)
-                        last_backup_time = 0
-                        
-                        if guild_id in server_backups and server_backups[guild_id]:
-                            last_backup_time = server_backups[guild_id][-1]['timestamp']
-                        
-                        current_time = time.time()
-                        if current_time - last_backup_time >= (interval_hours * 3600):
-                            await create_server_backup(guild)
-                            print(f"📄 Auto-backup completed for {guild.name}")
+            current_time = time.time()
+            for guild_id, settings in list(anti_nuke_settings.items()):
+                if not settings.get('backup_enabled', False):
+                    backup_next_due.pop(guild_id, None)
+                    continue
+                
+                guild = bot.get_guild(guild_id)
+                if not guild:
+                    continue
+                
+                interval_seconds = settings.get('backup_interval', 24) * 3600
+                
+                # Jitter each guild's first slot so guilds are not all snapshotted in the same tick
+                if guild_id not in backup_next_due:
+                    last_backup_time = server_backups[guild_id][-1]['timestamp'] if server_backups.get(guild_id) else 0
+                    backup_next_due[guild_id] = max(last_backup_time + interval_seconds, current_time) + random.uniform(0, BACKUP_SCHEDULER_JITTER)
+                
+                if current_time < backup_next_due[guild_id]:
+                    continue
+                
+                backup_next_due[guild_id] = current_time + interval_seconds
+                
+                # Full guild walk only when there is no checkpoint or the last full one is stale
+                full_backups = [backup for backup in server_backups.get(guild_id, []) if backup.get('full', True)]
+                if not full_backups or current_time - full_backups[-1]['timestamp'] >= BACKUP_FULL_SNAPSHOT_INTERVAL:
+                    await create_server_backup(guild)
+                    print(f"📄 Auto-backup completed for {guild.name}")
+                elif checkpoint_server_backup(guild_id):
+                    print(f"📄 Incremental auto-backup completed for {guild.name}")
             
-            # Wait 1 hour before checking again
-            await asyncio.sleep(3600)
+            await asyncio.sleep(BACKUP_SCHEDULER_TICK)
             
         except Exception as e:
             print(f"❌ Backup scheduler error: {e}")
-            await asyncio.sleep(3600)
+            await asyncio.sleep(BACKUP_SCHEDULER_TICK)
+
+def ensure_backup_scheduler():
+    """Start the backup scheduler unless it is already running"""
+    global backup_scheduler_task
+    if backup_scheduler_task is None or backup_scheduler_task.done():
+        backup_scheduler_task = asyncio.create_task(start_backup_scheduler())
 
 # ADVANCED ANTI-NUKE COMMAND SYSTEM - SPLIT INTO SEPARATE COMMANDS
 
@@ -6279,14 +6924,11 @@ async def antinuke_enable(interaction: discord.Interaction):
         return
 
     guild_id = interaction.guild.id
-    if guild_id not in anti_nuke_settings:
-        anti_nuke_settings[guild_id] = {
-            'enabled': False, 'whitelist': [], 'max_actions': 5, 
-            'owner_notifications': True, 'backup_enabled': False, 'backup_interval': 24
-        }
+    get_anti_nuke_settings(guild_id)
 
     protection_emoji = get_custom_emoji('protection', '🛡️')
     anti_nuke_settings[guild_id]['enabled'] = True
+    mark_anti_nuke_dirty('settings', guild_id)
     embed = create_success_embed(f"{protection_emoji} Anti-Nuke Protection Activated", "Advanced server protection is now **ACTIVE**!", interaction.user)
     embed.add_field(
         name=f"{protection_emoji} Protection Features", 
@@ -6310,13 +6952,10 @@ async def antinuke_disable(interaction: discord.Interaction):
         return
 
     guild_id = interaction.guild.id
-    if guild_id not in anti_nuke_settings:
-        anti_nuke_settings[guild_id] = {
-            'enabled': False, 'whitelist': [], 'max_actions': 5, 
-            'owner_notifications': True, 'backup_enabled': False, 'backup_interval': 24
-        }
+    get_anti_nuke_settings(guild_id)
 
     anti_nuke_settings[guild_id]['enabled'] = False
+    mark_anti_nuke_dirty('settings', guild_id)
     embed = create_success_embed("❌ Anti-Nuke Protection Disabled", "Server protection has been **DEACTIVATED**.", interaction.user)
     embed.add_field(name="⚠️ Critical Warning", value="Your server is now **VULNERABLE** to:\n• Mass channel deletion\n• Role destruction\n• Mass bans/kicks\n• Permission escalation attacks", inline=False)
     
@@ -6328,20 +6967,24 @@ async def antinuke_disable(interaction: discord.Interaction):
     max_actions="Maximum actions before triggering protection (1-20)",
     backup_interval="Backup interval in hours (Premium: 1-24, Free: 24 only)",
     enable_backup="Enable automatic server backups",
-    reset_activity="Reset all user action counts"
+    reset_activity="Reset all user action counts",
+    log_channel="Channel for anti-nuke alerts (defaults to the first log/mod channel found)",
+    clear_log_channel="Forget the configured log channel and go back to finding one automatically",
+    weight_action="Action type whose weight to change",
+    action_weight="How much one action of that type counts toward the threshold (1-10)"
 )
-async def antinuke_config(interaction: discord.Interaction, max_actions: int = None, backup_interval: int = None, enable_backup: bool = None, reset_activity: bool = False):
+@discord.app_commands.choices(weight_action=[
+    discord.app_commands.Choice(name=action.replace('_', ' ').title(), value=action) for action in ANTI_NUKE_ACTIONS
+])
+async def antinuke_config(interaction: discord.Interaction, max_actions: int = None, backup_interval: int = None, enable_backup: bool = None, reset_activity: bool = False,
+                          log_channel: discord.TextChannel = None, clear_log_channel: bool = False, weight_action: discord.app_commands.Choice[str] = None, action_weight: int = None):
     if not interaction.user.guild_permissions.administrator:
         embed = create_error_embed("Permission Denied", "You need Administrator permission to manage anti-nuke.")
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
 
     guild_id = interaction.guild.id
-    if guild_id not in anti_nuke_settings:
-        anti_nuke_settings[guild_id] = {
-            'enabled': False, 'whitelist': [], 'max_actions': 5, 
-            'owner_notifications': True, 'backup_enabled': False, 'backup_interval': 24
-        }
+    get_anti_nuke_settings(guild_id)
 
     settings = anti_nuke_settings[guild_id]
     changes_made = []
@@ -6371,16 +7014,34 @@ async def antinuke_config(interaction: discord.Interaction, max_actions: int = N
 
     if enable_backup is not None:
         settings['backup_enabled'] = enable_backup
-        if enable_backup and guild_id not in backup_tasks:
-            asyncio.create_task(start_backup_scheduler())
+        if enable_backup:
+            ensure_backup_scheduler()
         changes_made.append(f"Auto-backup: **{'Enabled' if enable_backup else 'Disabled'}**")
 
     if reset_activity:
         if guild_id in user_actions:
+            for user_id in user_actions[guild_id]:
+                mark_anti_nuke_dirty('user_actions', (guild_id, user_id))
             user_actions[guild_id] = {}
         changes_made.append("Activity counts: **Reset**")
 
+    if log_channel is not None:
+        settings['log_channel'] = log_channel.id
+        changes_made.append(f"Log channel: {log_channel.mention}")
+    elif clear_log_channel and settings.get('log_channel'):
+        del settings['log_channel']
+        changes_made.append("Log channel: **Automatic**")
+
+    if weight_action is not None and action_weight is not None:
+        if action_weight < 1 or action_weight > 10:
+            embed = create_error_embed("Invalid Weight", "Action weights must be between 1 and 10.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        settings.setdefault('action_weights', {})[weight_action.value] = action_weight
+        changes_made.append(f"{weight_action.name} weight: **{action_weight}**")
+
     if changes_made:
+        mark_anti_nuke_dirty('settings', guild_id)
         embed = create_success_embed("⚙️ Configuration Updated", f"Anti-nuke settings have been updated successfully!", interaction.user)
         embed.add_field(name="🔧 Changes Made", value="\n".join(f"• {change}" for change in changes_made), inline=False)
     else:
@@ -6395,11 +7056,16 @@ async def antinuke_config(interaction: discord.Interaction, max_actions: int = N
         
         embed.add_field(name="🔋 Protection Status", value=protection_status, inline=True)
         embed.add_field(name="⚙️ Action Threshold", value=f"{settings['max_actions']} actions", inline=True)
+        if settings.get('action_weights'):
+            weights_text = ", ".join(f"{action.replace('_', ' ').title()} x{weight}" for action, weight in settings['action_weights'].items())
+            embed.add_field(name="⚖️ Action Weights", value=weights_text, inline=False)
         embed.add_field(name="👥 Whitelisted Users", value=f"{len(settings['whitelist'])}", inline=True)
         
         embed.add_field(name="📬 Owner Notifications", value="✅ Enabled" if settings['owner_notifications'] else "❌ Disabled", inline=True)
         embed.add_field(name="💾 Auto-Backup", value="✅ Enabled" if settings.get('backup_enabled', False) else "❌ Disabled", inline=True)
         embed.add_field(name="⏰ Backup Interval", value=f"{settings.get('backup_interval', 24)}h", inline=True)
+        resolved_log_channel = resolve_anti_nuke_log_channel(interaction.guild)
+        embed.add_field(name="📝 Log Channel", value=resolved_log_channel.mention if resolved_log_channel else "❌ Not found", inline=True)
         
         # Show backup status
         backup_count = len(server_backups.get(guild_id, []))
@@ -6438,11 +7104,7 @@ async def whitelist(interaction: discord.Interaction, action: discord.app_comman
         return
 
     guild_id = interaction.guild.id
-    if guild_id not in anti_nuke_settings:
-        anti_nuke_settings[guild_id] = {
-            'enabled': False, 'whitelist': [], 'max_actions': 5,
-            'owner_notifications': True, 'backup_enabled': False, 'backup_interval': 24
-        }
+    get_anti_nuke_settings(guild_id)
 
     if action.value == "add":
         if not user:
@@ -6450,6 +7112,7 @@ async def whitelist(interaction: discord.Interaction, action: discord.app_comman
         else:
             if user.id not in anti_nuke_settings[guild_id]['whitelist']:
                 anti_nuke_settings[guild_id]['whitelist'].append(user.id)
+                mark_anti_nuke_dirty('settings', guild_id)
                 embed = create_success_embed("✅ User Whitelisted", f"**{user.display_name}** is now **EXEMPT** from anti-nuke protection", interaction.user)
                 embed.add_field(name="⚠️ Important", value="Whitelisted users can still trigger owner notifications if they perform suspicious actions.", inline=False)
                 embed.add_field(name="👥 Total Whitelisted", value=f"{len(anti_nuke_settings[guild_id]['whitelist'])} users", inline=True)
@@ -6462,6 +7125,7 @@ async def whitelist(interaction: discord.Interaction, action: discord.app_comman
         else:
             if user.id in anti_nuke_settings[guild_id]['whitelist']:
                 anti_nuke_settings[guild_id]['whitelist'].remove(user.id)
+                mark_anti_nuke_dirty('settings', guild_id)
                 embed = create_success_embed("❌ User Removed", f"**{user.display_name}** removed from whitelist and is now **PROTECTED AGAINST**", interaction.user)
                 embed.add_field(name="👥 Remaining Whitelisted", value=f"{len(anti_nuke_settings[guild_id]['whitelist'])} users", inline=True)
             else:
@@ -6514,6 +7178,7 @@ async def whitelist(interaction: discord.Interaction, action: discord.app_comman
         else:
             count = len(anti_nuke_settings[guild_id]['whitelist'])
             anti_nuke_settings[guild_id]['whitelist'] = []
+            mark_anti_nuke_dirty('settings', guild_id)
             embed = create_success_embed("🔄 Whitelist Cleared", f"Removed **{count}** users from the whitelist. All users are now subject to anti-nuke protection.", interaction.user)
     
     else:
@@ -6523,121 +7188,22 @@ async def whitelist(interaction: discord.Interaction, action: discord.app_comman
     await log_command_action(interaction, "whitelist", f"Action: {action.value} {'for ' + user.display_name if user else ''}")
 
 # SERVER RESTORATION SYSTEM
+
 async def restore_server_from_backup(guild, backup_data, interaction):
     """Restore server from backup data"""
     try:
-        restored_items = {'channels': 0, 'categories': 0, 'roles': 0, 'errors': []}
-        
-        # First, delete existing channels and categories (except system channels)
-        for channel in guild.channels:
-            if not isinstance(channel, (discord.TextChannel, discord.VoiceChannel, discord.CategoryChannel)):
-                continue
-            if channel.name.lower() in ['general', 'system messages']:
-                continue
-            try:
-                await channel.delete(reason="🔄 Server restoration - cleaning up")
-            except:
-                pass
-        
-        # Delete existing roles (except @everyone and bot roles)
-        for role in guild.roles:
-            if role.name in ['@everyone'] or role.managed:
-                continue
-            try:
-                await role.delete(reason="🔄 Server restoration - cleaning up")
-            except:
-                pass
+        engine = RestoreEngine(guild, backup_data)
+        engine.plan()
         
-        # Restore roles first
-        role_mapping = {}
-        for role_data in backup_data['roles']:
+        # Live progress embed, edited as operations complete
+        if interaction:
             try:
-                new_role = await guild.create_role(
-                    name=role_data['name'],
-                    color=discord.Color(role_data['color']),
-                    hoist=role_data['hoist'],
-                    mentionable=role_data['mentionable'],
-                    permissions=discord.Permissions(role_data['permissions']),
-                    reason="🔄 Server restoration - restoring roles"
-                )
-                role_mapping[role_data['name']] = new_role
-                restored_items['roles'] += 1
-            except Exception as e:
-                restored_items['errors'].append(f"Role '{role_data['name']}': {str(e)}")
-        
-        # Restore categories
-        category_mapping = {}
-        for cat_data in backup_data['categories']:
-            try:
-                overwrites = {}
-                for overwrite_data in cat_data['overwrites']:
-                    if overwrite_data['type'] == "<class 'discord.member.Member'>":
-                        target = guild.get_member(overwrite_data['id'])
-                    else:
-                        target = guild.get_role(overwrite_data['id'])
-                    
-                    if target:
-                        overwrites[target] = discord.PermissionOverwrite.from_pair(
-                            discord.Permissions(overwrite_data['allow']),
-                            discord.Permissions(overwrite_data['deny'])
-                        )
-                
-                new_category = await guild.create_category(
-                    name=cat_data['name'],
-                    overwrites=overwrites,
-                    position=cat_data['position'],
-                    reason="🔄 Server restoration - restoring categories"
-                )
-                category_mapping[cat_data['name']] = new_category
-                restored_items['categories'] += 1
-            except Exception as e:
-                restored_items['errors'].append(f"Category '{cat_data['name']}': {str(e)}")
-        
-        # Restore channels
-        for channel_data in backup_data['channels']:
-            try:
-                category = category_mapping.get(channel_data['category'])
-                
-                overwrites = {}
-                for overwrite_data in channel_data['overwrites']:
-                    if overwrite_data['type'] == "<class 'discord.member.Member'>":
-                        target = guild.get_member(overwrite_data['id'])
-                    else:
-                        target = guild.get_role(overwrite_data['id'])
-                    
-                    if target:
-                        overwrites[target] = discord.PermissionOverwrite.from_pair(
-                            discord.Permissions(overwrite_data['allow']),
-                            discord.Permissions(overwrite_data['deny'])
-                        )
-                
-                if channel_data['type'] == 'text':
-                    await guild.create_text_channel(
-                        name=channel_data['name'],
-                        category=category,
-                        topic=channel_data.get('topic'),
-                        slowmode_delay=channel_data.get('slowmode_delay', 0),
-                        nsfw=channel_data.get('nsfw', False),
-                        overwrites=overwrites,
-                        position=channel_data['position'],
-                        reason="🔄 Server restoration - restoring text channels"
-                    )
-                elif channel_data['type'] == 'voice':
-                    await guild.create_voice_channel(
-                        name=channel_data['name'],
-                        category=category,
-                        bitrate=channel_data.get('bitrate', 64000),
-                        user_limit=channel_data.get('user_limit', 0),
-                        overwrites=overwrites,
-                        position=channel_data['position'],
-                        reason="🔄 Server restoration - restoring voice channels"
-                    )
-                
-                restored_items['channels'] += 1
-                
-            except Exception as e:
-                restored_items['errors'].append(f"Channel '{channel_data['name']}': {str(e)}")
+                engine.progress_message = await interaction.followup.send(embed=engine.build_progress_embed(), ephemeral=True, wait=True)
+            except Exception:
+                engine.progress_message = None
         
+        restored_items = await engine.run()
+        print(f"🔄 Restore for {guild.name} finished in {restored_items['duration']:.1f}s with {len(restored_items['errors'])} errors")
         return restored_items
         
     except Exception as e:
@@ -6645,8 +7211,11 @@ async def restore_server_from_backup(guild, backup_data, interaction):
         return None
 
 @bot.tree.command(name="denuke", description="🔄 Restore server from backup (EMERGENCY ONLY)")
-@discord.app_commands.describe(backup_name="Backup to restore from (leave empty to see available backups)")
-async def denuke(interaction: discord.Interaction, backup_name: str = None):
+@discord.app_commands.describe(
+    backup_name="Backup to restore from (leave empty to see available backups)",
+    minutes_ago="Restore the layout as it was this many minutes ago instead of a named backup"
+)
+async def denuke(interaction: discord.Interaction, backup_name: str = None, minutes_ago: int = None):
     if not interaction.user.guild_permissions.administrator:
         embed = create_error_embed("Permission Denied", "You need Administrator permission to restore server backups.")
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -6665,8 +7234,8 @@ async def denuke(interaction: discord.Interaction, backup_name: str = None):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
 
-    # If no backup name provided, show available backups
-    if not backup_name:
+    # If no backup name or point in time provided, show available backups
+    if not backup_name and minutes_ago is None:
         backups = server_backups[guild_id]
         embed = create_embed(
             title="📄 Available Server Backups",
@@ -6688,7 +7257,7 @@ async def denuke(interaction: discord.Interaction, backup_name: str = None):
         
         embed.add_field(
             name="🔄 How to Restore",
-            value="Use `/denuke backup_name:<backup_name>` to restore from a specific backup.\n\n⚠️ **WARNING:** This will completely rebuild your server!",
+            value="Use `/denuke backup_name:<backup_name>` to restore from a specific backup, or `/denuke minutes_ago:<minutes>` to restore to a point in time.\n\n⚠️ **WARNING:** This will completely rebuild your server!",
             inline=False
         )
         
@@ -6701,12 +7270,31 @@ async def denuke(interaction: discord.Interaction, backup_name: str = None):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
 
+    # Rebuild a point-in-time backup from checkpoints and the change log
+    if minutes_ago is not None:
+        if minutes_ago < 0:
+            embed = create_error_embed("Invalid Time", "Minutes ago must be zero or more.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        restore_time = time.time() - minutes_ago * 60
+        backup_data = build_backup_at(guild_id, restore_time)
+        if not backup_data:
+            oldest = server_backups[guild_id][0]['timestamp']
+            embed = create_error_embed("Too Far Back", f"The oldest available checkpoint is from <t:{oldest}:F>.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        backup_name = f"Point-in-time-{minutes_ago}m"
+        backup_to_restore = {'name': backup_name, 'timestamp': backup_data['timestamp'], 'data': backup_data}
+    
     # Find the specified backup
-    backup_to_restore = None
-    for backup in server_backups[guild_id]:
-        if backup['name'] == backup_name:
-            backup_to_restore = backup
-            break
+    else:
+        backup_to_restore = None
+        for backup in server_backups[guild_id]:
+            if backup['name'] == backup_name:
+                backup_to_restore = backup
+                break
     
     if not backup_to_restore:
         available_names = [b['name'] for b in server_backups[guild_id][-5:]]  # Show last 5
@@ -6779,7 +7367,7 @@ async def denuke(interaction: discord.Interaction, backup_name: str = None):
         
         success_embed.add_field(
             name="📊 Restoration Summary",
-            value=f"• **Channels:** {restoration_result['channels']} restored\n• **Categories:** {restoration_result['categories']} restored\n• **Roles:** {restoration_result['roles']} restored",
+            value=f"• **Channels:** {restoration_result['channels']} restored\n• **Categories:** {restoration_result['categories']} restored\n• **Roles:** {restoration_result['roles']} restored\n• **Time:** {restoration_result['duration']:.1f}s",
             inline=False
         )
         
@@ -6861,8 +7449,11 @@ async def on_ready():
     else:
         print("🎭 Auto-meme system already running")
     
-    # Start backup scheduler
-    asyncio.create_task(start_backup_scheduler())
+    # Start anti-nuke state persistence and backup scheduler
+    if not anti_nuke_state_flusher.is_running():
+        anti_nuke_state_flusher.start()
+    ensure_anti_nuke_alert_worker()
+    ensure_backup_scheduler()
     print("📄 Backup scheduler started")
     print("🛡️ Advanced anti-nuke system ready!")
     print("🔄 Denuke restoration system ready!")
@@ -9903,6 +10494,20 @@ async def embedbuilder(interaction: discord.Interaction, title: str = None, desc
     await log_command_action(interaction, "embedbuilder", f"Created advanced embed: {title or 'No title'}")
 
 # REACTION ROLE SYSTEM
+reaction_role_index = {}  # {message_id: {emoji: role_id}}
+
+def load_reaction_role_index():
+    """Load every configured reaction role into memory"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT message_id, emoji, role_id FROM reaction_roles')
+        for message_id, emoji, role_id in cursor.fetchall():
+            reaction_role_index.setdefault(message_id, {})[emoji] = role_id
+        conn.close()
+    except Exception as e:
+        print(f"❌ Failed to load reaction roles: {e}")
+
 @bot.tree.command(name="reactionrole", description="⚡ Setup reaction role system")
 @discord.app_commands.describe(
     action="Action to perform",
@@ -9941,12 +10546,13 @@ async def reactionrole(interaction: discord.Interaction, action: discord.app_com
             message = await interaction.channel.fetch_message(msg_id)
 
             cursor.execute('''
-                INSERT INTO reaction_roles (guild_id, message_id, emoji, role_id)
+                INSERT OR REPLACE INTO reaction_roles (guild_id, message_id, emoji, role_id)
                 VALUES (?, ?, ?, ?)
             ''', (guild_id, msg_id, str(emoji), role.id))
 
             conn.commit()
             conn.close()
+            reaction_role_index.setdefault(msg_id, {})[str(emoji)] = role.id
 
             # Add reaction to message
             await message.add_reaction(emoji)
@@ -9967,6 +10573,52 @@ async def reactionrole(interaction: discord.Interaction, action: discord.app_com
             await interaction.response.send_message(embed=embed)
             conn.close()
 
+    elif action.value == "remove":
+        if not all([message_id, emoji]):
+            embed = create_error_embed("Missing Information", "Please provide the message ID and emoji to remove.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            conn.close()
+            return
+
+        try:
+            msg_id = int(message_id)
+        except ValueError:
+            embed = create_error_embed("Invalid Message ID", "Please provide a valid message ID.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            conn.close()
+            return
+
+        cursor.execute('DELETE FROM reaction_roles WHERE guild_id = ? AND message_id = ? AND emoji = ?', (guild_id, msg_id, str(emoji)))
+        removed = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        if not removed:
+            embed = create_error_embed("Not Found", "No reaction role matches that message and emoji.")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        message_roles = reaction_role_index.get(msg_id, {})
+        message_roles.pop(str(emoji), None)
+        if not message_roles:
+            reaction_role_index.pop(msg_id, None)
+
+        embed = create_success_embed("Reaction Role Removed", f"Removed the {emoji} reaction role from message {msg_id}", interaction.user)
+        await interaction.response.send_message(embed=embed)
+
+    elif action.value == "clear":
+        cursor.execute('SELECT DISTINCT message_id FROM reaction_roles WHERE guild_id = ?', (guild_id,))
+        message_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute('DELETE FROM reaction_roles WHERE guild_id = ?', (guild_id,))
+        conn.commit()
+        conn.close()
+
+        for msg_id in message_ids:
+            reaction_role_index.pop(msg_id, None)
+
+        embed = create_success_embed("Reaction Roles Cleared", f"Removed reaction roles from **{len(message_ids)}** messages.", interaction.user)
+        await interaction.response.send_message(embed=embed)
+
     elif action.value == "list":
         cursor.execute('SELECT message_id, emoji, role_id FROM reaction_roles WHERE guild_id = ?', (guild_id,))
         reaction_roles = cursor.fetchall()
@@ -9993,57 +10645,45 @@ async def reactionrole(interaction: discord.Interaction, action: discord.app_com
 
         await interaction.response.send_message(embed=embed)
 
+def resolve_reaction_role(payload):
+    """Look up the role bound to a raw reaction event, or None"""
+    if payload.guild_id is None:
+        return None, None
+    message_roles = reaction_role_index.get(payload.message_id)
+    if not message_roles:
+        return None, None
+    role_id = message_roles.get(str(payload.emoji))
+    if role_id is None:
+        return None, None
+    guild = bot.get_guild(payload.guild_id)
+    if not guild:
+        return None, None
+    return guild, guild.get_role(role_id)
+
 @bot.event
-async def on_reaction_add(reaction, user):
+async def on_raw_reaction_add(payload):
     """Handle reaction role assignment"""
-    if user.bot:
+    if payload.member and payload.member.bot:
         return
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT role_id FROM reaction_roles
-            WHERE guild_id = ? AND message_id = ? AND emoji = ?
-        ''', (reaction.message.guild.id, reaction.message.id, str(reaction.emoji)))
-
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            role = reaction.message.guild.get_role(result[0])
-            if role:
-                member = reaction.message.guild.get_member(user.id)
-                if member and role not in member.roles:
-                    await member.add_roles(role, reason="Reaction role assignment")
+        guild, role = resolve_reaction_role(payload)
+        if role:
+            member = payload.member or guild.get_member(payload.user_id)
+            if member and role not in member.roles:
+                await member.add_roles(role, reason="Reaction role assignment")
     except Exception as e:
         print(f"Error in reaction role add: {e}")
 
 @bot.event
-async def on_reaction_remove(reaction, user):
+async def on_raw_reaction_remove(payload):
     """Handle reaction role removal"""
-    if user.bot:
-        return
-
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT role_id FROM reaction_roles
-            WHERE guild_id = ? AND message_id = ? AND emoji = ?
-        ''', (reaction.message.guild.id, reaction.message.id, str(reaction.emoji)))
-
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            role = reaction.message.guild.get_role(result[0])
-            if role:
-                member = reaction.message.guild.get_member(user.id)
-                if member and role in member.roles:
-                    await member.remove_roles(role, reason="Reaction role removal")
+        guild, role = resolve_reaction_role(payload)
+        if role:
+            member = guild.get_member(payload.user_id)
+            if member and not member.bot and role in member.roles:
+                await member.remove_roles(role, reason="Reaction role removal")
     except Exception as e:
         print(f"Error in reaction role remove: {e}")
 
@@ -11175,11 +11815,22 @@ async def main():
     print("📊 Leveling system with rank cards activated!")
     print("💰 Complete economy system with gambling ready!")
     
+    # Startup work lives here rather than at import time - rank card render workers are spawned
+    # processes that re-import this module, and must not migrate the database or load bot state
+    init_db()
+    # Warm caches before the gateway connects so protection is active immediately
+    load_anti_nuke_state()
+    load_reaction_role_index()
+    
     # Load all cogs
     await load_cogs()
     
     # Start the bot
-    await bot.start(TOKEN)
+    try:
+        await bot.start(TOKEN)
+    finally:
+        # Persist anything changed since the last flush interval
+        await flush_anti_nuke_state()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,133 @@
+from bisect import bisect_right, insort
+
+RANK_INDEX_PRECISION = 10  # Scores below 2^10 get a bucket each; above that buckets widen by powers of two
+RANK_INDEX_INITIAL_BUCKETS = 1024
+RANK_INDEX_MAX_BUCKETS = 1 << 15  # Covers every score below 2^64; larger scores share the last bucket
+
+def score_bucket(score):
+    """Log-linear bucket for a score - exact below 2^precision, then 2^(precision - 1) buckets per doubling"""
+    shift = score.bit_length() - RANK_INDEX_PRECISION
+    if shift <= 0:
+        return score
+    return min((shift << (RANK_INDEX_PRECISION - 1)) + (score >> shift), RANK_INDEX_MAX_BUCKETS - 1)
+
+class RankIndex:
+    """O(log n) rank lookups over per-user scores using a Fenwick tree of score buckets
+
+    Buckets are log-linear rather than fixed-width, so the tree grows with the
+    number of doublings in the highest score instead of its value - a balance of
+    a billion needs about 11k buckets, where 1024-coin buckets needed a million.
+    Each bucket keeps its scores sorted, so lookups inside a wide, crowded top
+    bucket are a bisect rather than a scan.
+    """
+
+    def __init__(self):
+        self.size = RANK_INDEX_INITIAL_BUCKETS
+        self.tree = [0] * (self.size + 1)
+        self.buckets = {}  # {bucket: sorted list of the scores in it, one per user}
+        self.scores = {}  # {user_id: score}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Bulk-build an index from (user_id, score) rows in O(n)"""
+        index = cls()
+        max_bucket = 0
+        for user_id, score in rows:
+            score = max(0, score or 0)
+            bucket = score_bucket(score)
+            index.scores[user_id] = score
+            index.buckets.setdefault(bucket, []).append(score)
+            max_bucket = max(max_bucket, bucket)
+        for bucket_scores in index.buckets.values():
+            bucket_scores.sort()
+        index.rebuild(max_bucket)
+        return index
+
+    def __len__(self):
+        return len(self.scores)
+
+    def rebuild(self, max_bucket=0):
+        """Resize to fit max_bucket and rebuild the tree from bucket counts"""
+        while max_bucket >= self.size:
+            self.size *= 2
+        tree = [0] * (self.size + 1)
+        for bucket, bucket_scores in self.buckets.items():
+            tree[bucket + 1] += len(bucket_scores)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def _add(self, bucket, delta):
+        i = bucket + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, bucket):
+        """Users in buckets 0..bucket"""
+        i = min(bucket + 1, self.size)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _insert(self, user_id, score):
+        bucket = score_bucket(score)
+        insort(self.buckets.setdefault(bucket, []), score)
+        if bucket >= self.size:
+            self.rebuild(bucket)
+        else:
+            self._add(bucket, 1)
+        self.scores[user_id] = score
+
+    def remove(self, user_id):
+        score = self.scores.pop(user_id, None)
+        if score is None:
+            return
+        bucket = score_bucket(score)
+        bucket_scores = self.buckets[bucket]
+        if len(bucket_scores) == 1:
+            del self.buckets[bucket]
+        else:
+            del bucket_scores[bisect_right(bucket_scores, score) - 1]
+        self._add(bucket, -1)
+
+    def update(self, user_id, score):
+        """Set a user's score, inserting them if needed"""
+        score = max(0, score or 0)
+        if self.scores.get(user_id) == score:
+            return
+        self.remove(user_id)
+        self._insert(user_id, score)
+
+    def count_above(self, score):
+        """Users with a strictly higher score"""
+        bucket = score_bucket(score)
+        above = len(self.scores) - self._prefix(bucket)
+        bucket_scores = self.buckets.get(bucket)
+        if bucket_scores:
+            above += len(bucket_scores) - bisect_right(bucket_scores, score)
+        return above
+
+    def rank(self, score):
+        # Ties share a rank, matching COUNT(*) + 1 WHERE score > ?
+        return self.count_above(score) + 1
+
+    def score_at(self, position):
+        """Score held by the user at 1-based position in descending order"""
+        remaining = len(self.scores) - position + 1  # position among ascending scores
+        if remaining < 1 or position < 1:
+            return None
+
+        pos = 0
+        step = 1 << (self.size.bit_length() - 1)
+        while step:
+            if pos + step <= self.size and self.tree[pos + step] < remaining:
+                pos += step
+                remaining -= self.tree[pos]
+            step >>= 1
+
+        return self.buckets[pos][remaining - 1]
@@ -0,0 +1,246 @@
+import asyncio
+import time
+
+import aiohttp
+import discord
+
+RESTORE_BUCKET_LIMITS = {'channel_delete': 10, 'role_delete': 5, 'role_create': 5, 'channel_create': 5}  # Concurrent requests per route bucket
+RESTORE_MAX_RETRIES = 3
+RESTORE_RETRY_BASE_DELAY = 1  # Seconds, doubled after each retry
+RESTORE_PROGRESS_INTERVAL = 2  # Seconds between progress embed edits
+RESTORE_COLOR_RUNNING = 0x5DADE2  # Matches the bot's info color
+RESTORE_COLOR_FINISHED = 0x00FF88  # Matches the bot's success color
+MEMBER_OVERWRITE_TYPE = "<class 'discord.member.Member'>"
+RESTORABLE_CHANNEL_TYPES = (discord.ChannelType.text, discord.ChannelType.voice, discord.ChannelType.category)
+
+def is_transient_restore_error(error):
+    """Check if a restore API error is worth retrying"""
+    if isinstance(error, (discord.Forbidden, discord.NotFound)):
+        return False
+    if isinstance(error, discord.HTTPException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, OSError))
+
+class RestoreOperation:
+    def __init__(self, key, bucket, label, action, deps=()):
+        self.key = key
+        self.bucket = bucket
+        self.label = label
+        self.action = action
+        self.deps = list(deps)
+
+class RestoreEngine:
+    """Runs a server restore as a dependency graph of API operations.
+
+    Independent operations run concurrently, limited per route bucket, and
+    overwrites are resolved through the recreated roles.
+    """
+
+    def __init__(self, guild, backup_data, progress_message=None):
+        self.guild = guild
+        self.backup_data = backup_data
+        self.progress_message = progress_message
+        self.operations = {}
+        self.tasks = {}
+        self.role_mapping = {}  # {backup_role_id: new_role}
+        self.category_mapping = {}  # {backup_category_id or name: new_category}
+        self.results = {'channels': 0, 'categories': 0, 'roles': 0, 'deleted': 0, 'errors': []}
+        self.semaphores = {bucket: asyncio.Semaphore(limit) for bucket, limit in RESTORE_BUCKET_LIMITS.items()}
+        self.completed = 0
+        self.started_at = time.monotonic()
+        self.last_progress_update = 0
+
+    def add(self, key, bucket, label, action, deps=()):
+        self.operations[key] = RestoreOperation(key, bucket, label, action, deps)
+
+    def plan(self):
+        """Build the delete/create dependency graph"""
+        channel_delete_keys = []
+        for channel in self.guild.channels:
+            if channel.type not in RESTORABLE_CHANNEL_TYPES:
+                continue
+            if channel.name.lower() in ['general', 'system messages']:
+                continue
+            key = f"delete-channel-{channel.id}"
+            self.add(key, 'channel_delete', f"Channel '{channel.name}'", lambda c=channel: self.delete_object(c))
+            channel_delete_keys.append(key)
+
+        role_delete_keys = []
+        for role in self.guild.roles:
+            if role.is_default() or role.managed:
+                continue
+            key = f"delete-role-{role.id}"
+            self.add(key, 'role_delete', f"Role '{role.name}'", lambda r=role: self.delete_object(r))
+            role_delete_keys.append(key)
+
+        # Roles are recreated once old roles are gone so the role cap is never hit
+        role_create_keys = []
+        for index, role_data in enumerate(self.backup_data['roles']):
+            key = f"create-role-{index}"
+            self.add(key, 'role_create', f"Role '{role_data['name']}'", lambda d=role_data: self.create_role(d), role_delete_keys)
+            role_create_keys.append(key)
+
+        if role_create_keys:
+            self.add("reorder-roles", 'role_create', "Role positions", self.reorder_roles, role_create_keys)
+
+        # Categories need the recreated roles for their overwrites
+        category_keys = {}
+        for index, cat_data in enumerate(self.backup_data['categories']):
+            key = f"create-category-{index}"
+            self.add(key, 'channel_create', f"Category '{cat_data['name']}'", lambda d=cat_data: self.create_category(d), channel_delete_keys + role_create_keys)
+            category_keys[cat_data['name']] = key
+            if cat_data.get('id') is not None:
+                category_keys[cat_data['id']] = key
+
+        for index, channel_data in enumerate(self.backup_data['channels']):
+            deps = channel_delete_keys + role_create_keys
+            category_key = category_keys.get(channel_data.get('category_id')) or category_keys.get(channel_data.get('category'))
+            if category_key:
+                deps = deps + [category_key]
+            self.add(f"create-channel-{index}", 'channel_create', f"Channel '{channel_data['name']}'", lambda d=channel_data: self.create_channel(d), deps)
+
+    def resolve_overwrites(self, overwrite_list):
+        """Map backed-up overwrites onto current members and recreated roles"""
+        overwrites = {}
+        for overwrite_data in overwrite_list:
+            if overwrite_data['type'] == MEMBER_OVERWRITE_TYPE:
+                target = self.guild.get_member(overwrite_data['id'])
+            elif overwrite_data['id'] == self.guild.id:
+                target = self.guild.default_role
+            else:
+                target = self.role_mapping.get(overwrite_data['id']) or self.guild.get_role(overwrite_data['id'])
+
+            if target:
+                overwrites[target] = discord.PermissionOverwrite.from_pair(
+                    discord.Permissions(overwrite_data['allow']),
+                    discord.Permissions(overwrite_data['deny'])
+                )
+        return overwrites
+
+    async def delete_object(self, obj):
+        try:
+            await obj.delete(reason="🔄 Server restoration - cleaning up")
+        except discord.NotFound:
+            pass  # Already gone
+        self.results['deleted'] += 1
+
+    async def create_role(self, role_data):
+        new_role = await self.guild.create_role(
+            name=role_data['name'],
+            color=discord.Color(role_data['color']),
+            hoist=role_data['hoist'],
+            mentionable=role_data['mentionable'],
+            permissions=discord.Permissions(role_data['permissions']),
+            reason="🔄 Server restoration - restoring roles"
+        )
+        if role_data.get('id') is not None:
+            self.role_mapping[role_data['id']] = new_role
+        self.results['roles'] += 1
+
+    async def reorder_roles(self):
+        """Restore role hierarchy with a single bulk position edit"""
+        ordered = sorted((role_data for role_data in self.backup_data['roles'] if role_data.get('id') in self.role_mapping), key=lambda role_data: role_data['position'])
+        positions = {self.role_mapping[role_data['id']]: position for position, role_data in enumerate(ordered, start=1)}
+        if positions:
+            await self.guild.edit_role_positions(positions, reason="🔄 Server restoration - restoring role order")
+
+    async def create_category(self, cat_data):
+        new_category = await self.guild.create_category(
+            name=cat_data['name'],
+            overwrites=self.resolve_overwrites(cat_data['overwrites']),
+            position=cat_data['position'],
+            reason="🔄 Server restoration - restoring categories"
+        )
+        self.category_mapping[cat_data['name']] = new_category
+        if cat_data.get('id') is not None:
+            self.category_mapping[cat_data['id']] = new_category
+        self.results['categories'] += 1
+
+    async def create_channel(self, channel_data):
+        category = self.category_mapping.get(channel_data.get('category_id')) or self.category_mapping.get(channel_data['category'])
+        overwrites = self.resolve_overwrites(channel_data['overwrites'])
+
+        if channel_data['type'] == 'text':
+            await self.guild.create_text_channel(
+                name=channel_data['name'],
+                category=category,
+                topic=channel_data.get('topic'),
+                slowmode_delay=channel_data.get('slowmode_delay', 0),
+                nsfw=channel_data.get('nsfw', False),
+                overwrites=overwrites,
+                position=channel_data['position'],
+                reason="🔄 Server restoration - restoring text channels"
+            )
+        elif channel_data['type'] == 'voice':
+            await self.guild.create_voice_channel(
+                name=channel_data['name'],
+                category=category,
+                bitrate=channel_data.get('bitrate', 64000),
+                user_limit=channel_data.get('user_limit', 0),
+                overwrites=overwrites,
+                position=channel_data['position'],
+                reason="🔄 Server restoration - restoring voice channels"
+            )
+        self.results['channels'] += 1
+
+    async def run_operation(self, operation):
+        """Run one operation after its dependencies, retrying transient failures"""
+        for dep in operation.deps:
+            await self.tasks[dep]
+
+        async with self.semaphores.get(operation.bucket, self.semaphores['channel_create']):
+            for attempt in range(RESTORE_MAX_RETRIES + 1):
+                try:
+                    await operation.action()
+                    break
+                except Exception as e:
+                    if attempt < RESTORE_MAX_RETRIES and is_transient_restore_error(e):
+                        await asyncio.sleep(RESTORE_RETRY_BASE_DELAY * (2 ** attempt))
+                        continue
+                    self.results['errors'].append(f"{operation.label}: {str(e)}")
+                    break
+
+        self.completed += 1
+        await self.update_progress()
+
+    def build_progress_embed(self, finished=False):
+        elapsed = time.monotonic() - self.started_at
+        total = len(self.operations)
+        percent = int(self.completed / total * 100) if total else 100
+        filled = percent // 10
+        embed = discord.Embed(
+            title="✅ Restoration Finished" if finished else "🔄 Restoring Server...",
+            description=f"`{'█' * filled}{'░' * (10 - filled)}` **{percent}%** ({self.completed}/{total} operations)",
+            color=RESTORE_COLOR_FINISHED if finished else RESTORE_COLOR_RUNNING
+        )
+        embed.add_field(
+            name="📊 Progress",
+            value=f"• **Deleted:** {self.results['deleted']}\n• **Roles:** {self.results['roles']}/{len(self.backup_data['roles'])}\n• **Categories:** {self.results['categories']}/{len(self.backup_data['categories'])}\n• **Channels:** {self.results['channels']}/{len(self.backup_data['channels'])}",
+            inline=True
+        )
+        embed.add_field(name="⏱️ Elapsed", value=f"{elapsed:.1f}s", inline=True)
+        embed.add_field(name="⚠️ Errors", value=str(len(self.results['errors'])), inline=True)
+        return embed
+
+    async def update_progress(self, force=False):
+        if not self.progress_message:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_progress_update < RESTORE_PROGRESS_INTERVAL:
+            return
+        self.last_progress_update = now
+        try:
+            await self.progress_message.edit(embed=self.build_progress_embed(finished=force))
+        except Exception:
+            pass
+
+    async def run(self):
+        if not self.operations:
+            self.plan()
+        self.started_at = time.monotonic()
+        for key, operation in self.operations.items():
+            self.tasks[key] = asyncio.ensure_future(self.run_operation(operation))
+        await asyncio.gather(*self.tasks.values())
+        await self.update_progress(force=True)
+        self.results['duration'] = time.monotonic() - self.started_at
+        return self.results
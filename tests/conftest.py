@@ -0,0 +1,11 @@
+import os
+import sys
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The bot imports these modules as the `cogs` package - mirror that layout so `cogs.X` imports resolve
+if 'cogs' not in sys.modules:
+    cogs = types.ModuleType('cogs')
+    cogs.__path__ = [REPO_ROOT]
+    sys.modules['cogs'] = cogs
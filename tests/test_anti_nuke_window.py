@@ -0,0 +1,64 @@
+from collections import deque
+
+from cogs.anti_nuke import ActionWindow, ACTION_RESET_TIME, ACTION_RING_SIZE
+
+def test_action_just_inside_window_counts():
+    window = ActionWindow()
+    window.record('channel_delete', 1000.0)
+    assert window.count(1000.0 + ACTION_RESET_TIME - 0.001) == 1
+
+def test_action_just_outside_window_expires():
+    window = ActionWindow()
+    window.record('channel_delete', 1000.0)
+    assert window.count(1000.0 + ACTION_RESET_TIME) == 0
+    assert window.events == {}
+
+def test_burst_straddling_old_reset_boundary_is_counted():
+    # Four actions just before the old fixed reset at t=300 and one just after - a reset counter saw 1
+    window = ActionWindow()
+    for timestamp in (296, 297, 298, 299, 301):
+        window.record('role_delete', timestamp)
+    assert window.count(301) == 5
+
+def test_window_slides_one_action_at_a_time():
+    window = ActionWindow()
+    for timestamp in range(0, 300, 60):  # 0, 60, 120, 180, 240
+        window.record('member_ban', timestamp)
+    assert window.count(299) == 5
+    assert window.count(300) == 4  # t=0 ages out exactly at the edge
+    assert window.count(359.999) == 4
+    assert window.count(360) == 3
+
+def test_window_edge_across_action_types():
+    window = ActionWindow()
+    window.record('channel_delete', 0)
+    window.record('role_delete', 1)
+    window.record('member_kick', 2)
+    assert window.count(ACTION_RESET_TIME + 0.5) == 2
+    assert set(window.events) == {'role_delete', 'member_kick'}
+    assert window.count(ACTION_RESET_TIME + 2) == 0
+
+def test_weighted_count_uses_overrides_and_default_weight():
+    window = ActionWindow()
+    window.record('channel_delete', 10)
+    window.record('channel_delete', 11)
+    window.record('webhook_create', 12)
+    assert window.weighted_count({'channel_delete': 3}, 12) == 7
+    assert window.weighted_count({'channel_delete': 3}, 10 + ACTION_RESET_TIME) == 4
+
+def test_ring_buffer_keeps_only_recent_timestamps():
+    window = ActionWindow()
+    for timestamp in range(ACTION_RING_SIZE + 10):
+        window.record('channel_create', timestamp)
+    ring = window.events['channel_create']
+    assert isinstance(ring, deque)
+    assert len(ring) == ACTION_RING_SIZE
+    assert ring[0] == 10
+    assert window.last_seen == ACTION_RING_SIZE + 9
+
+def test_recent_returns_newest_actions_oldest_first():
+    window = ActionWindow()
+    window.record('channel_delete', 1)
+    window.record('role_delete', 2)
+    window.record('channel_delete', 3)
+    assert window.recent(2) == [('role_delete', 2), ('channel_delete', 3)]
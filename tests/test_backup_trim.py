@@ -0,0 +1,25 @@
+from cogs.anti_nuke import trim_backup_checkpoints
+
+def checkpoints(layout):
+    """'F' for a full snapshot, 'i' for an incremental checkpoint, oldest first"""
+    return [{'checkpoint_at': index, 'full': kind == 'F'} for index, kind in enumerate(layout)]
+
+def kept(layout, max_backups):
+    return ''.join('F' if backup['full'] else 'i' for backup in trim_backup_checkpoints(checkpoints(layout), max_backups))
+
+def test_under_the_limit_nothing_is_trimmed():
+    assert kept('Fiii', 10) == 'Fiii'
+
+def test_oldest_checkpoints_go_once_a_newer_full_snapshot_exists():
+    assert kept('FiiiFii', 4) == 'iFii'
+    assert kept('FiiiFiiFi', 3) == 'iFi'
+
+def test_busy_guild_keeps_its_full_base_past_the_limit():
+    # Fifteen incremental checkpoints since the last full walk, limit of ten
+    trimmed = trim_backup_checkpoints(checkpoints('FiiF' + 'i' * 15), 10)
+    assert trimmed[0]['full'] and trimmed[0]['checkpoint_at'] == 3
+    assert len(trimmed) == 16
+
+def test_legacy_checkpoints_without_a_flag_count_as_full():
+    legacy = [{'timestamp': index} for index in range(12)]
+    assert trim_backup_checkpoints(legacy, 10) == legacy[-10:]
@@ -0,0 +1,127 @@
+import asyncio
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from cogs import giveaways
+from cogs.giveaways import GIVEAWAY_END_RETRY_DELAY, GiveawayEmbedUpdater, GiveawaySystem
+
+GUILD_ID = 3
+CHANNEL_ID = 2
+MESSAGE_ID = 555
+
+class FakeMessage:
+    def __init__(self, channel):
+        self.channel = channel
+        self.embeds = [discord.Embed(title="🎉 Giveaway")]
+
+    async def edit(self, embed):
+        await asyncio.sleep(self.channel.edit_delay)
+        self.channel.edits.append(embed.title)
+
+class FakeChannel:
+    def __init__(self, edit_delay=0):
+        self.id = CHANNEL_ID
+        self.edit_delay = edit_delay
+        self.edits = []
+        self.fetch_gate = None
+
+    async def fetch_message(self, message_id):
+        gate, self.fetch_gate = self.fetch_gate, None
+        if gate:
+            await gate.wait()
+        return FakeMessage(self)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self)
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    channel = FakeChannel()
+    guild = SimpleNamespace(id=GUILD_ID, get_channel=lambda channel_id: channel, get_member=lambda user_id: None)
+    bot = SimpleNamespace(shard_count=1, shard_id=None, get_guild=lambda guild_id: guild, get_channel=lambda channel_id: channel)
+    system = GiveawaySystem(bot)
+    system.channel = channel
+
+    conn = sqlite3.connect(giveaways.DATABASE_FILE)
+    with conn:
+        giveaway_id = conn.execute('''
+            INSERT INTO giveaways (guild_id, channel_id, message_id, host_id, title, prize, winners, ends_at)
+            VALUES (?, ?, ?, 1, 'Test', 'Nitro', 1, datetime('now'))
+        ''', (GUILD_ID, CHANNEL_ID, MESSAGE_ID)).lastrowid
+    conn.close()
+    system.register_giveaway(giveaway_id, GUILD_ID, CHANNEL_ID, MESSAGE_ID, 1, None)
+    system.giveaway_id = giveaway_id
+    return system
+
+def is_ended(giveaway_id):
+    conn = sqlite3.connect(giveaways.DATABASE_FILE)
+    try:
+        return conn.execute('SELECT ended FROM giveaways WHERE id = ?', (giveaway_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_failed_end_keeps_giveaway_open_and_retries(system):
+    async def broken_draw(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+    system.draw_winners = broken_draw
+
+    started = time.time()
+    asyncio.run(system.end_giveaway(system.giveaway_id))
+
+    assert not is_ended(system.giveaway_id)
+    assert system.giveaway_messages[system.giveaway_id] == MESSAGE_ID
+    assert started + GIVEAWAY_END_RETRY_DELAY <= system.scheduler.scheduled[system.giveaway_id] <= time.time() + GIVEAWAY_END_RETRY_DELAY
+    giveaway = system.active_giveaways[MESSAGE_ID]
+    assert system.add_entry(giveaway, 42)  # Still taking entries
+
+def test_entries_are_refused_while_ending(system):
+    giveaway = system.active_giveaways[MESSAGE_ID]
+    seen = []
+
+    async def draw(*args, **kwargs):
+        seen.append(system.add_entry(giveaway, 99))
+        return []
+    system.draw_winners = draw
+
+    asyncio.run(system.end_giveaway(system.giveaway_id))
+
+    assert seen == [False]
+    assert is_ended(system.giveaway_id)
+    assert system.giveaway_id not in system.giveaway_messages
+    assert not system.pending_entries
+
+def race_end_against_update(system, cached_embed):
+    """Start an entry-count edit, end the giveaway while it is in progress, and return the edit order"""
+    async def scenario():
+        system.embed_updater = GiveawayEmbedUpdater(system.update_giveaway_embed, interval=0, tick=0.001)
+        giveaway = system.active_giveaways[MESSAGE_ID]
+        gate = asyncio.Event()
+        if cached_embed:
+            giveaway['embed'] = discord.Embed(title="🎉 Giveaway")  # The updater goes straight to the edit
+        else:
+            system.channel.fetch_gate = gate  # The updater blocks in fetch_message
+        system.add_entry(giveaway, 42)
+        system.embed_updater.start()
+        await asyncio.sleep(0.01)
+
+        ending = asyncio.create_task(system.end_giveaway(system.giveaway_id))
+        await asyncio.sleep(0.01)
+        gate.set()
+        await ending
+        await asyncio.sleep(0.1)
+        system.embed_updater.stop()
+        return system.channel.edits
+
+    return asyncio.run(scenario())
+
+def test_in_flight_edit_lands_before_results_embed(system):
+    system.channel.edit_delay = 0.05
+    assert race_end_against_update(system, cached_embed=True) == ["🎉 Giveaway", "🎉 Test - ENDED"]
+
+def test_edit_fetched_during_end_is_dropped(system):
+    assert race_end_against_update(system, cached_embed=False) == ["🎉 Test - ENDED"]
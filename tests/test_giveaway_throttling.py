@@ -0,0 +1,126 @@
+import asyncio
+from collections import deque
+
+import pytest
+
+from cogs.giveaways import GiveawayEmbedUpdater, GiveawayScheduler
+
+class FakeClock:
+    """Manual clock whose sleep advances time instead of waiting"""
+
+    def __init__(self, now=1000.0, stop_at=None):
+        self.now = now
+        self.stop_at = stop_at
+        self.on_tick = None
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        if self.stop_at is not None and self.now >= self.stop_at:
+            raise asyncio.CancelledError
+        if self.on_tick:
+            self.on_tick(self.now)
+
+def make_updater(clock, edits, **kwargs):
+    async def edit(giveaway_id):
+        edits.append((clock.now, giveaway_id))
+    return GiveawayEmbedUpdater(edit, clock=clock, sleep=clock.sleep, **kwargs)
+
+def test_changes_within_interval_coalesce_into_one_edit():
+    clock = FakeClock()
+    updater = make_updater(clock, [], interval=15)
+
+    updater.mark_dirty(1, 10)
+    assert updater.due_updates(clock()) == [1]
+
+    # Many entries inside the interval - nothing is due until it passes
+    for offset in (1, 5, 14.999):
+        updater.mark_dirty(1, 10)
+        assert updater.due_updates(clock() + offset) == []
+    assert updater.due_updates(clock() + 15) == [1]
+    assert updater.due_updates(clock() + 30) == []  # No changes since the last edit
+
+def test_channel_limit_defers_extra_giveaways_to_next_window():
+    clock = FakeClock()
+    updater = make_updater(clock, [], interval=15, channel_limit=5, channel_window=5)
+    for giveaway_id in range(8):
+        updater.mark_dirty(giveaway_id, 10)
+
+    first = updater.due_updates(clock())
+    assert len(first) == 5
+    assert updater.due_updates(clock() + 4.999) == []
+    second = updater.due_updates(clock() + 5)
+    assert sorted(first + second) == list(range(8))
+
+def test_channels_are_limited_independently():
+    clock = FakeClock()
+    updater = make_updater(clock, [], channel_limit=1, channel_window=5)
+    updater.mark_dirty(1, 10)
+    updater.mark_dirty(2, 10)
+    updater.mark_dirty(3, 20)
+    assert sorted(updater.due_updates(clock())) == [1, 3]
+
+def test_channel_window_slides():
+    clock = FakeClock()
+    updater = make_updater(clock, [], interval=0, channel_limit=2, channel_window=5)
+    updater.channel_edits[10] = deque([clock() - 4.5, clock() - 1])
+    assert not updater.channel_has_capacity(10, clock())
+    assert updater.channel_has_capacity(10, clock() + 0.5)  # Oldest edit ages out exactly at the window edge
+
+def test_forget_drops_pending_changes():
+    clock = FakeClock()
+    updater = make_updater(clock, [])
+    updater.mark_dirty(1, 10)
+    updater.forget(1)
+    assert updater.due_updates(clock()) == []
+
+def test_run_loop_respects_both_limits_under_churn():
+    clock = FakeClock(stop_at=1120.0)
+    edits = []
+    updater = make_updater(clock, edits, interval=15, channel_limit=5, channel_window=5, tick=1)
+
+    # Eight giveaways in one channel gain entries every second
+    clock.on_tick = lambda now: [updater.mark_dirty(giveaway_id, 10) for giveaway_id in range(8)]
+    clock.on_tick(clock.now)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(updater.run())
+
+    assert edits
+    by_giveaway = {}
+    for timestamp, giveaway_id in edits:
+        by_giveaway.setdefault(giveaway_id, []).append(timestamp)
+    for timestamps in by_giveaway.values():
+        assert all(later - earlier >= 15 for earlier, later in zip(timestamps, timestamps[1:]))
+    for timestamp, _ in edits:
+        assert sum(1 for other, _ in edits if timestamp - 5 < other <= timestamp) <= 5
+    assert set(by_giveaway) == set(range(8))
+
+def test_scheduler_pops_due_giveaways_in_end_order():
+    async def end(giveaway_id):
+        pass
+
+    scheduler = GiveawayScheduler(end)
+    scheduler.schedule(1, 300.0)
+    scheduler.schedule(2, 100.0)
+    scheduler.schedule(3, 200.0)
+
+    assert scheduler.pop_due(99.999) == []
+    assert scheduler.pop_due(200.0) == [2, 3]
+    assert scheduler.pop_due(1000.0) == [1]
+    assert scheduler.scheduled == {}
+
+def test_scheduler_skips_rescheduled_and_cancelled_entries():
+    async def end(giveaway_id):
+        pass
+
+    scheduler = GiveawayScheduler(end)
+    scheduler.schedule(1, 100.0)
+    scheduler.schedule(2, 100.0)
+    scheduler.schedule(1, 500.0)  # Extended
+    scheduler.cancel(2)
+
+    assert scheduler.pop_due(200.0) == []
+    assert scheduler.pop_due(500.0) == [1]
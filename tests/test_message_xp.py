@@ -0,0 +1,72 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+from cogs import leveling
+from cogs.leveling import LevelingSystem
+
+GUILD_ID = 1
+
+@pytest.fixture
+def cog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return LevelingSystem(SimpleNamespace(get_guild=lambda guild_id: None))
+
+def stored(user_id):
+    conn = sqlite3.connect(leveling.DATABASE_FILE)
+    try:
+        return conn.execute('SELECT total_xp, message_count, level FROM user_levels WHERE user_id = ? AND guild_id = ?', (user_id, GUILD_ID)).fetchone()
+    finally:
+        conn.close()
+
+def test_messages_are_buffered_and_written_in_one_transaction(cog, monkeypatch):
+    writes = []
+    write_xp_awards = leveling.write_xp_awards
+    monkeypatch.setattr(leveling, 'write_xp_awards', lambda *args: writes.append(args) or write_xp_awards(*args))
+
+    async def scenario():
+        config = await cog.get_leveling_config(GUILD_ID)
+        config.cooldown = 0
+        for _ in range(3):
+            assert await cog.add_xp(1, GUILD_ID, xp_amount=40)
+        assert await cog.add_xp(2, GUILD_ID, xp_amount=15)
+        assert stored(1) is None  # Nothing written until the flush
+        await cog.flush_xp_awards()
+        for worker in cog.level_up_workers.values():
+            worker.cancel()
+
+    asyncio.run(scenario())
+    assert len(writes) == 1
+    assert stored(1) == (120, 3, 1)
+    assert stored(2) == (15, 1, 0)
+    assert cog.level_up_pending == {GUILD_ID: {1: (0, 1)}}
+
+def test_cooldown_still_applies_before_buffering(cog):
+    async def scenario():
+        assert await cog.add_xp(1, GUILD_ID, xp_amount=10)
+        assert not await cog.add_xp(1, GUILD_ID, xp_amount=10)
+        await cog.flush_xp_awards()
+
+    asyncio.run(scenario())
+    assert stored(1) == (10, 1, 0)
+
+def test_failed_flush_keeps_awards_for_the_next_one(cog, monkeypatch):
+    write_xp_awards = leveling.write_xp_awards
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def scenario():
+        config = await cog.get_leveling_config(GUILD_ID)
+        config.cooldown = 0
+        await cog.add_xp(1, GUILD_ID, xp_amount=30)
+        monkeypatch.setattr(leveling, 'write_xp_awards', locked)
+        await cog.flush_xp_awards()
+        await cog.add_xp(1, GUILD_ID, xp_amount=5)
+        monkeypatch.setattr(leveling, 'write_xp_awards', write_xp_awards)
+        await cog.flush_xp_awards()
+
+    asyncio.run(scenario())
+    assert stored(1) == (35, 2, 0)
@@ -0,0 +1,61 @@
+import random
+
+from cogs.rank_index import RANK_INDEX_MAX_BUCKETS, RankIndex, score_bucket
+
+def brute_rank(scores, score):
+    return sum(1 for other in scores.values() if other > score) + 1
+
+def test_buckets_are_monotonic_and_contiguous():
+    previous = score_bucket(0)
+    for score in range(1, 1 << 16):
+        bucket = score_bucket(score)
+        assert bucket in (previous, previous + 1)
+        previous = bucket
+    assert score_bucket(2 ** 63 - 1) < RANK_INDEX_MAX_BUCKETS
+    assert score_bucket(10 ** 30) == RANK_INDEX_MAX_BUCKETS - 1
+
+def test_ranks_match_brute_force_under_updates():
+    rng = random.Random(3)
+    index = RankIndex.from_rows((user_id, rng.randrange(5000)) for user_id in range(300))
+    for _ in range(3000):
+        user_id = rng.randrange(400)
+        score = int(rng.paretovariate(0.8) * 100)  # Heavy tail - some scores in the billions
+        index.update(user_id, score)
+        if rng.random() < 0.05:
+            index.remove(rng.randrange(400))
+
+    for score in list(index.scores.values())[:200] + [-1, 0, 10 ** 12, 10 ** 25]:
+        assert index.rank(score) == brute_rank(index.scores, score)
+
+def test_score_at_walks_descending_order():
+    rng = random.Random(5)
+    index = RankIndex()
+    for user_id in range(500):
+        index.update(user_id, rng.choice((0, 7, 1023, 1024, 5000, 10 ** 9, 10 ** 9 + 1, 2 ** 63 - 1)) + rng.randrange(3))
+
+    ordered = sorted(index.scores.values(), reverse=True)
+    assert [index.score_at(position) for position in range(1, len(ordered) + 1)] == ordered
+    assert index.score_at(0) is None
+    assert index.score_at(len(ordered) + 1) is None
+
+def test_tree_stays_small_for_huge_scores():
+    index = RankIndex.from_rows([(1, 10), (2, 10 ** 9)])
+    assert index.size <= 16384
+    index.update(3, 2 ** 63 - 1)
+    assert index.size <= RANK_INDEX_MAX_BUCKETS
+    assert index.rank(2 ** 63 - 1) == 1
+    assert index.rank(10 ** 9) == 2
+
+def test_crowded_bucket_ranks_and_positions():
+    rng = random.Random(9)
+    base = 2 ** 40  # One bucket spans 2^31 scores here
+    index = RankIndex.from_rows((user_id, base + rng.randrange(2 ** 20)) for user_id in range(2000))
+    assert len(index.buckets) == 1
+    for user_id in range(0, 2000, 7):
+        index.update(user_id, base + rng.randrange(2 ** 20))
+    index.remove(3)
+
+    ordered = sorted(index.scores.values(), reverse=True)
+    assert [index.score_at(position) for position in range(1, len(ordered) + 1)] == ordered
+    for score in ordered[::50] + [base - 1, base + 2 ** 20]:
+        assert index.rank(score) == brute_rank(index.scores, score)
@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import time
+
+import discord
+
+from cogs import restore_engine
+from cogs.restore_engine import RestoreEngine, RESTORE_BUCKET_LIMITS
+
+API_LATENCY = 0.002  # Seconds per fake API call
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "fake"
+
+class FakeAPI:
+    """Counts calls and tracks in-flight requests per bucket"""
+
+    def __init__(self, latency=API_LATENCY):
+        self.latency = latency
+        self.ids = itertools.count(10_000)
+        self.calls = 0
+        self.in_flight = {}
+        self.peak = {}
+        self.failures = {}  # {name: [exceptions to raise before succeeding]}
+
+    async def call(self, bucket, name=None):
+        self.calls += 1
+        self.in_flight[bucket] = self.in_flight.get(bucket, 0) + 1
+        self.peak[bucket] = max(self.peak.get(bucket, 0), self.in_flight[bucket])
+        try:
+            await asyncio.sleep(self.latency)
+            pending = self.failures.get(name)
+            if pending:
+                raise pending.pop(0)
+        finally:
+            self.in_flight[bucket] -= 1
+
+class FakeRole:
+    def __init__(self, api, role_id, name, default=False):
+        self.api = api
+        self.id = role_id
+        self.name = name
+        self.managed = False
+        self.default = default
+        self.deleted = False
+
+    def is_default(self):
+        return self.default
+
+    async def delete(self, reason=None):
+        await self.api.call('role_delete')
+        self.deleted = True
+
+class FakeChannel:
+    def __init__(self, api, channel_id, name, channel_type, **fields):
+        self.api = api
+        self.id = channel_id
+        self.name = name
+        self.type = channel_type
+        self.deleted = False
+        self.__dict__.update(fields)
+
+    async def delete(self, reason=None):
+        await self.api.call('channel_delete')
+        self.deleted = True
+
+class FakeGuild:
+    def __init__(self, api, channel_count, role_count):
+        self.api = api
+        self.id = 1
+        self.default_role = FakeRole(api, self.id, "@everyone", default=True)
+        self.roles = [self.default_role] + [FakeRole(api, 100 + i, f"old-role-{i}") for i in range(role_count)]
+        self.channels = [FakeChannel(api, 5000 + i, f"old-channel-{i}", discord.ChannelType.text) for i in range(channel_count)]
+        self.created_roles = []
+        self.created_channels = []
+        self.role_positions = None
+
+    def get_member(self, member_id):
+        return None
+
+    def get_role(self, role_id):
+        return None
+
+    async def create_role(self, name, **fields):
+        await self.api.call('role_create', name)
+        role = FakeRole(self.api, next(self.api.ids), name)
+        self.created_roles.append(role)
+        return role
+
+    async def edit_role_positions(self, positions, reason=None):
+        await self.api.call('role_create')
+        self.role_positions = positions
+
+    async def create_category(self, name, overwrites, position, reason=None):
+        await self.api.call('channel_create', name)
+        category = FakeChannel(self.api, next(self.api.ids), name, discord.ChannelType.category, overwrites=overwrites)
+        self.created_channels.append(category)
+        return category
+
+    async def create_text_channel(self, name, category, overwrites, **fields):
+        await self.api.call('channel_create', name)
+        channel = FakeChannel(self.api, next(self.api.ids), name, discord.ChannelType.text, category=category, overwrites=overwrites)
+        self.created_channels.append(channel)
+        return channel
+
+    async def create_voice_channel(self, name, category, overwrites, **fields):
+        await self.api.call('channel_create', name)
+        channel = FakeChannel(self.api, next(self.api.ids), name, discord.ChannelType.voice, category=category, overwrites=overwrites)
+        self.created_channels.append(channel)
+        return channel
+
+class FakeMessage:
+    def __init__(self):
+        self.edits = []
+
+    async def edit(self, embed):
+        self.edits.append(embed)
+
+def make_backup(channel_count=500, category_count=10, role_count=20):
+    roles = [{'id': 900 + i, 'name': f"role-{i}", 'color': 0, 'hoist': False, 'mentionable': False, 'permissions': 0, 'position': i + 1} for i in range(role_count)]
+    categories = [{'id': 700 + i, 'name': f"category-{i}", 'position': i, 'overwrites': []} for i in range(category_count)]
+    channels = []
+    for i in range(channel_count):
+        category = categories[i % category_count]
+        overwrite = {'id': roles[i % role_count]['id'], 'type': "<class 'discord.role.Role'>", 'allow': 1024, 'deny': 0}
+        channels.append({
+            'id': 20_000 + i,
+            'name': f"channel-{i}",
+            'type': 'voice' if i % 5 == 0 else 'text',
+            'category': category['name'],
+            'category_id': category['id'],
+            'position': i,
+            'overwrites': [overwrite]
+        })
+    return {'roles': roles, 'categories': categories, 'channels': channels}
+
+def test_restore_500_channel_guild_runs_in_parallel():
+    api = FakeAPI()
+    guild = FakeGuild(api, channel_count=500, role_count=50)
+    backup = make_backup()
+    message = FakeMessage()
+
+    engine = RestoreEngine(guild, backup, progress_message=message)
+    started = time.perf_counter()
+    results = asyncio.run(engine.run())
+    elapsed = time.perf_counter() - started
+
+    # The same restore with instant API calls is the engine's own CPU cost, which
+    # grows on a loaded host; only the time spent waiting on the API should shrink
+    instant = FakeAPI(latency=0)
+    started = time.perf_counter()
+    asyncio.run(RestoreEngine(FakeGuild(instant, channel_count=500, role_count=50), backup).run())
+    overhead = time.perf_counter() - started
+
+    sequential = api.calls * API_LATENCY
+    print(f"\nRestored 500 channels with {api.calls} API calls in {elapsed:.2f}s "
+          f"({overhead:.2f}s engine overhead, sequential floor {sequential:.2f}s)")
+
+    assert results['errors'] == []
+    assert results['deleted'] == 550
+    assert results['roles'] == 20
+    assert results['categories'] == 10
+    assert results['channels'] == 500
+    assert elapsed - overhead < sequential / 3
+
+    # Never more requests in flight than the bucket allows
+    for bucket, peak in api.peak.items():
+        assert peak <= RESTORE_BUCKET_LIMITS[bucket]
+
+    # A finished embed is always the last edit
+    assert message.edits[-1].title == "✅ Restoration Finished"
+
+def test_restore_remaps_overwrites_and_categories():
+    api = FakeAPI(latency=0)
+    guild = FakeGuild(api, channel_count=3, role_count=2)
+    backup = make_backup(channel_count=20, category_count=2, role_count=4)
+
+    asyncio.run(RestoreEngine(guild, backup).run())
+
+    new_roles = {role.name: role for role in guild.created_roles}
+    channels = [channel for channel in guild.created_channels if channel.type != discord.ChannelType.category]
+    assert len(channels) == 20
+    for channel in channels:
+        channel_data = backup['channels'][int(channel.name.split('-')[1])]
+        # Overwrites point at the recreated role, not the deleted backup role ID
+        (target,) = channel.overwrites
+        assert target is new_roles[f"role-{(channel_data['id'] - 20_000) % 4}"]
+        assert channel.category.name == channel_data['category']
+
+    # Deletes always finish before anything is recreated
+    assert all(channel.deleted for channel in guild.channels)
+    assert set(guild.role_positions) == set(guild.created_roles)
+
+def test_restore_retries_transient_errors_only(monkeypatch):
+    monkeypatch.setattr(restore_engine, 'RESTORE_RETRY_BASE_DELAY', 0)
+    api = FakeAPI(latency=0)
+    api.failures['channel-1'] = [discord.HTTPException(FakeResponse(429), "rate limited"), discord.HTTPException(FakeResponse(502), "bad gateway")]
+    api.failures['channel-2'] = [discord.Forbidden(FakeResponse(403), "missing permissions")]
+    guild = FakeGuild(api, channel_count=0, role_count=0)
+
+    results = asyncio.run(RestoreEngine(guild, make_backup(channel_count=4, category_count=1, role_count=1)).run())
+
+    created = {channel.name for channel in guild.created_channels}
+    assert 'channel-1' in created
+    assert 'channel-2' not in created
+    assert len(results['errors']) == 1
+    assert results['errors'][0].startswith("Channel 'channel-2'")